@@ -0,0 +1,210 @@
+"""
+Benchmarks of the client against a local emulation of the Octopus Energy API.
+
+e.g.
+
+    python -m benchmarks.run --latency 0.02 --json results.json
+    python -m benchmarks.run --latency 0.02 --baseline results.json
+"""
+import argparse
+import datetime
+import json
+import sys
+import time
+import tracemalloc
+
+from octopus_energy_client import OctopusEnergy, FleetClient, MeterConfig, ResourceType, ChargeType, UrllibTransport
+from .stub import OctopusStub
+
+
+UTC = datetime.timezone.utc
+YEAR_FROM = datetime.datetime(2022, 1, 1, tzinfo=UTC)
+YEAR_TO = datetime.datetime(2023, 1, 1, tzinfo=UTC)
+
+# Metrics compared against a baseline, all of which are better when lower.
+COMPARED_METRICS = ("seconds_p50", "seconds_p95", "peak_memory_mb")
+
+
+def percentile(values, fraction):
+    """
+    The value at a fraction of the way through the sorted values, interpolating between neighbours.
+
+    :param list values: The values.
+    :param float fraction: e.g. 0.95 for the 95th percentile.
+    :rtype: float
+    """
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def create_client(stub, **kwargs):
+    client = OctopusEnergy(
+        api_key="benchmark",
+        electricity_serial="21L0000001",
+        electricity_mpan="1200000000001",
+        electricity_product_code="AGILE-18-02-21",
+        electricity_region="C",
+        gas_serial="G4P00000001",
+        gas_mprn="3000000001",
+        **kwargs
+    )
+    client.base_url = stub.base_url
+    return client
+
+
+def scenarios(stub, meters):
+    """
+    The benchmark scenarios, each a function making the requests and returning the number of records retrieved.
+
+    :rtype: dict
+    """
+    client = create_client(stub, max_workers=8)
+    urllib_client = create_client(stub, max_workers=8, transport=UrllibTransport())
+
+    def single_page():
+        return len(client.get_consumption_for_period(ResourceType.ELECTRICITY, YEAR_FROM, YEAR_FROM + datetime.timedelta(days=1), page_size=48)["results"])
+
+    def backfill_sequential():
+        return sum(1 for _ in client.iter_consumption(ResourceType.ELECTRICITY, YEAR_FROM, YEAR_TO, page_size=1000, prefetch=False))
+
+    def backfill_all_pages():
+        return len(client.get_consumption_for_period(ResourceType.ELECTRICITY, YEAR_FROM, YEAR_TO, page_size=1000, all_pages=True)["results"])
+
+    def backfill_stream():
+        return sum(1 for _ in client.iter_consumption(ResourceType.ELECTRICITY, YEAR_FROM, YEAR_TO, page_size=25000, stream=True))
+
+    def backfill_series():
+        return len(client.get_consumption_for_period(ResourceType.ELECTRICITY, YEAR_FROM, YEAR_TO, page_size=25000, as_series=True))
+
+    def backfill_series_urllib():
+        return len(urllib_client.get_consumption_for_period(ResourceType.ELECTRICITY, YEAR_FROM, YEAR_TO, page_size=25000, as_series=True))
+
+    def backfill_chunked_3_years():
+        return client.get_consumption_in_chunks(ResourceType.ELECTRICITY, datetime.datetime(2020, 1, 1, tzinfo=UTC), YEAR_TO)["count"]
+
+    def tariff_backfill_chunked():
+        return client.get_tariff_data_in_chunks(ResourceType.ELECTRICITY, ChargeType.STANDARD_UNIT_RATES, YEAR_FROM, YEAR_TO)["count"]
+
+    fleet = FleetClient(
+        [MeterConfig(ResourceType.ELECTRICITY, f"12000000{i:05d}", f"21L{i:07d}") for i in range(meters)],
+        api_key="benchmark",
+        max_workers=16
+    )
+    for fleet_client in fleet.clients.values():
+        fleet_client.base_url = stub.base_url
+
+    def many_meters_week():
+        results = fleet.get_consumption(YEAR_FROM, YEAR_FROM + datetime.timedelta(days=7))
+        return sum(len(result.data["results"]) for result in results.values() if result.ok)
+
+    return {
+        "single_page": (single_page, 20),
+        "backfill_sequential": (backfill_sequential, 1),
+        "backfill_all_pages": (backfill_all_pages, 1),
+        "backfill_stream": (backfill_stream, 1),
+        "backfill_series": (backfill_series, 1),
+        "backfill_series_urllib": (backfill_series_urllib, 1),
+        "backfill_chunked_3_years": (backfill_chunked_3_years, 1),
+        "tariff_backfill_chunked": (tariff_backfill_chunked, 1),
+        "many_meters_week": (many_meters_week, 1),
+    }
+
+
+def measure(stub, fn, repeat):
+    """
+    Times repeated calls of a scenario, then measures its peak memory in a separate call, as tracing allocations
+    slows it down.
+
+    :returns: Timing percentiles, throughput, request counts and peak memory.
+    :rtype: dict
+    """
+    fn()  # Warm up connections and caches of parsed timestamps.
+
+    stub.reset()
+    timings = []
+    records = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        records = fn()
+        timings.append(time.perf_counter() - start)
+    requests = stub.counters["requests"] // repeat
+    response_bytes = stub.counters["bytes"] // repeat
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "records": records,
+        "requests": requests,
+        "response_mb": round(response_bytes / 1e6, 2),
+        "seconds_p50": round(percentile(timings, 0.5), 4),
+        "seconds_p95": round(percentile(timings, 0.95), 4),
+        "seconds_p99": round(percentile(timings, 0.99), 4),
+        "records_per_second": round(records / percentile(timings, 0.5)) if records else 0,
+        "peak_memory_mb": round(peak / 1e6, 2),
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Compares results with a baseline run.
+
+    :returns: Descriptions of the metrics which are worse than the baseline by more than the threshold.
+    :rtype: list
+    """
+    regressions = []
+    for name, metrics in results.items():
+        for metric in COMPARED_METRICS:
+            before = baseline.get(name, {}).get(metric)
+            if not before:
+                continue
+            change = (metrics[metric] - before) / before
+            print(f"{name:28} {metric:16} {before:>10} -> {metrics[metric]:>10} ({change:+.0%})")
+            if change > threshold:
+                regressions.append(f"{name} {metric} {change:+.0%}")
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Octopus Energy client against a local API stub.")
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds the stub waits before each response (default 0.02).")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs of each scenario, multiplied for cheap scenarios (default 3).")
+    parser.add_argument("--meters", type=int, default=50, help="Number of meters in the many-meter scenario (default 50).")
+    parser.add_argument("--scenario", action="append", help="Run only the named scenario. May be repeated.")
+    parser.add_argument("--json", help="Write the results to this file.")
+    parser.add_argument("--baseline", help="Compare the results with those of an earlier run.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Fractional slowdown against the baseline treated as a regression (default 0.2).")
+    args = parser.parse_args(argv)
+
+    results = {}
+    with OctopusStub(latency=args.latency) as stub:
+        for name, (fn, multiplier) in scenarios(stub, args.meters).items():
+            if args.scenario and name not in args.scenario:
+                continue
+            results[name] = measure(stub, fn, args.repeat * multiplier)
+            print(name, json.dumps(results[name]), flush=True)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print("Regressions:", *regressions, sep="\n  ")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,238 @@
+import datetime
+import json
+import multiprocessing
+import re
+import socket
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, urlencode
+
+from octopus_energy_client.util import HALF_HOUR, iso_format, to_timestamp, from_timestamp
+
+
+# Largest page sizes the API will return.
+MAX_CONSUMPTION_PAGE_SIZE = 25000
+MAX_TARIFF_PAGE_SIZE = 1500
+
+# Indices of the counters shared between the stub process and the benchmark.
+CONNECTIONS, REQUESTS, BYTES = range(3)
+
+_METER_POINT = re.compile(r"^/v1/(electricity|gas)-meter-points/([^/]+)/?$")
+_CONSUMPTION = re.compile(r"^/v1/(electricity|gas)-meter-points/([^/]+)/meters/([^/]+)/consumption/?$")
+_TARIFF = re.compile(r"^/v1/products/([^/]+)/(electricity|gas)-tariffs/([^/]+)/(standard-unit-rates|day-unit-rates|night-unit-rates|standing-charges)/?$")
+_GRID_SUPPLY_POINTS = re.compile(r"^/v1/industry/grid-supply-points/?$")
+
+
+def _consumption_value(slot):
+    # Deterministic, varied consumption in kWh for a half-hourly slot.
+    return round(((slot * 2654435761) % 1000) / 1000, 3)
+
+
+def _rate_value(slot):
+    return round(5 + ((slot * 40503) % 3000) / 100, 2)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        # Headers and body are written separately; without this Nagle's algorithm delays the body of each response.
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.server.api.count(CONNECTIONS)
+
+    def do_GET(self):
+        status, body = self.server.api.respond(self.path)
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+        self.server.api.count(BYTES, len(payload))
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _Api:
+    """
+    Responses of the emulated API, served from the stub process.
+    """
+    def __init__(self, server_address, counters, latency, history_start, history_end):
+        self.server_address = server_address
+        self.counters = counters
+        self.latency = latency
+        self.history_start = history_start
+        self.history_end = history_end
+
+    def count(self, index, amount=1):
+        with self.counters.get_lock():
+            self.counters[index] += amount
+
+    def respond(self, request_path):
+        """
+        :returns: The status and json body of the response to a request.
+        :rtype: tuple
+        """
+        self.count(REQUESTS)
+        if self.latency:
+            time.sleep(self.latency)
+
+        split = urlsplit(request_path)
+        query = {key: values[0] for key, values in parse_qs(split.query).items()}
+
+        match = _CONSUMPTION.match(split.path)
+        if match:
+            return self._half_hourly(split.path, query, MAX_CONSUMPTION_PAGE_SIZE, self._consumption_record, ascending="-period" != query.get("order_by"))
+
+        match = _TARIFF.match(split.path)
+        if match:
+            if match.group(4) == "standing-charges":
+                return self._page(split.path, query, MAX_TARIFF_PAGE_SIZE, [{"value_exc_vat": 20.0, "value_inc_vat": 21.0, "valid_from": iso_format(from_timestamp(self.history_start)), "valid_to": None}])
+            # Rates are returned newest first.
+            return self._half_hourly(split.path, query, MAX_TARIFF_PAGE_SIZE, self._rate_record, ascending=False)
+
+        match = _METER_POINT.match(split.path)
+        if match:
+            return 200, {"gsp": "_C", "mpan": match.group(2), "profile_class": 1}
+
+        if _GRID_SUPPLY_POINTS.match(split.path):
+            return self._page(split.path, query, 100, [{"group_id": "_C"}])
+
+        return 404, {"detail": "Not found."}
+
+    @staticmethod
+    def _consumption_record(slot):
+        return {
+            "consumption": _consumption_value(slot),
+            "interval_start": iso_format(from_timestamp(slot * HALF_HOUR)),
+            "interval_end": iso_format(from_timestamp((slot + 1) * HALF_HOUR)),
+        }
+
+    @staticmethod
+    def _rate_record(slot):
+        value = _rate_value(slot)
+        return {
+            "value_exc_vat": value,
+            "value_inc_vat": round(value * 1.05, 4),
+            "valid_from": iso_format(from_timestamp(slot * HALF_HOUR)),
+            "valid_to": iso_format(from_timestamp((slot + 1) * HALF_HOUR)),
+        }
+
+    def _links(self, path, query, page, has_next):
+        def link(number):
+            host, port = self.server_address
+            return f"http://{host}:{port}{path}?{urlencode(dict(query, page=number))}"
+
+        return link(page + 1) if has_next else None, link(page - 1) if page > 1 else None
+
+    def _page_bounds(self, query, max_page_size, count):
+        page_size = min(int(query.get("page_size", 100)), max_page_size)
+        page = int(query.get("page", 1))
+        start = (page - 1) * page_size
+        if page < 1 or (start >= count and page != 1):
+            return None
+        return page, page_size, start
+
+    def _page(self, path, query, max_page_size, results):
+        bounds = self._page_bounds(query, max_page_size, len(results))
+        if bounds is None:
+            return 404, {"detail": "Invalid page."}
+
+        page, page_size, start = bounds
+        next_url, previous_url = self._links(path, query, page, start + page_size < len(results))
+        return 200, {"count": len(results), "next": next_url, "previous": previous_url, "results": results[start:start + page_size]}
+
+    def _half_hourly(self, path, query, max_page_size, record, ascending):
+        # Records are generated for the requested page only, so very long histories cost nothing until requested.
+        # As the API does, and tests/stub_server.period_handler does, the period selects every slot which overlaps
+        # it, including one starting exactly at period_to.
+        first = -(-self.history_start // HALF_HOUR)
+        last = self.history_end // HALF_HOUR
+        if "period_from" in query:
+            first = max(first, to_timestamp(query["period_from"]) // HALF_HOUR)
+        if "period_to" in query:
+            last = min(last, to_timestamp(query["period_to"]) // HALF_HOUR + 1)
+        count = max(0, last - first)
+
+        bounds = self._page_bounds(query, max_page_size, count)
+        if bounds is None:
+            return 404, {"detail": "Invalid page."}
+
+        page, page_size, start = bounds
+        offsets = range(start, min(count, start + page_size))
+        slots = [first + offset for offset in offsets] if ascending else [last - 1 - offset for offset in offsets]
+        next_url, previous_url = self._links(path, query, page, start + page_size < count)
+        return 200, {"count": count, "next": next_url, "previous": previous_url, "results": [record(slot) for slot in slots]}
+
+
+def _serve(ready, counters, latency, history_start, history_end):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.daemon_threads = True
+    server.api = _Api(server.server_address, counters, latency, history_start, history_end)
+    ready.put(server.server_address)
+    server.serve_forever()
+
+
+class OctopusStub:
+    """
+    A local HTTP server emulating the Octopus Energy API endpoints used by the client, for benchmarking.
+
+    Every meter has half-hourly consumption and every product has half-hourly unit rates (and an open-ended
+    standing charge) between history_start and history_end. Responses follow the API's filtering by period, which
+    includes the interval starting at period_to, and by order_by, page and page_size, including count and
+    next/previous links, with page sizes capped as the API caps them. Each request is delayed by latency seconds
+    to model the network and server.
+
+    The server runs in a separate process so that it does not compete with the client for the GIL, and so that
+    memory measured in the benchmark process is the client's alone.
+
+    e.g.
+
+        with OctopusStub(latency=0.05) as stub:
+            client = OctopusEnergy(...)
+            client.base_url = stub.base_url
+    """
+    def __init__(self, latency=0.0, history_start=datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc), history_end=datetime.datetime(2023, 1, 1, tzinfo=datetime.timezone.utc)):
+        """
+        :param float latency: (optional, default 0) Seconds to wait before responding to each request.
+        :param datetime.datetime history_start: (optional) Start of the data held for every meter and product.
+        :param datetime.datetime history_end: (optional) End of the data held for every meter and product.
+        """
+        self._counters = multiprocessing.Array("q", 3)
+        self._ready = multiprocessing.Queue()
+        self._process = multiprocessing.Process(
+            target=_serve,
+            args=(self._ready, self._counters, latency, to_timestamp(history_start), to_timestamp(history_end)),
+            daemon=True
+        )
+        self.server_address = None
+
+    def __enter__(self):
+        self._process.start()
+        self.server_address = self._ready.get(timeout=30)
+        return self
+
+    def __exit__(self, *exc_info):
+        self._process.terminate()
+        self._process.join()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address
+        return f"http://{host}:{port}/v1"
+
+    @property
+    def counters(self):
+        """
+        :returns: The number of connections and requests made to the stub and the bytes it has sent.
+        :rtype: dict
+        """
+        with self._counters.get_lock():
+            return {"connections": self._counters[CONNECTIONS], "requests": self._counters[REQUESTS], "bytes": self._counters[BYTES]}
+
+    def reset(self):
+        with self._counters.get_lock():
+            for index in range(len(self._counters)):
+                self._counters[index] = 0
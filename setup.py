@@ -32,5 +32,14 @@ setup(
     packages=find_packages(where="src"),
     include_package_data=True,
     install_requires=["requests", "pytz"],
-    python_requires=">=3.6"
+    extras_require={
+        "async": ["aiohttp"],
+        "numpy": ["numpy"],
+        "parquet": ["pyarrow"],
+        "fast": ["orjson", "msgspec"],
+    },
+    entry_points={
+        "console_scripts": ["octopus-export=octopus_energy_client.export:main"],
+    },
+    python_requires=">=3.8"
 )
@@ -1,11 +1,62 @@
-from .client import OctopusEnergy
-from .enums import ResourceType, ChargeType, Aggregate
-from .util import iso_format
-
-__all__ = [
-    "OctopusEnergy",
-    "ResourceType",
-    "ChargeType",
-    "Aggregate",
-    "iso_format"
-]
+import importlib
+
+
+# The module defining each public name. Modules are imported when a name is first used, so that importing the
+# package does not pull in requests, aiohttp or numpy until they are needed.
+_EXPORTS = {
+    "OctopusEnergy": "client",
+    "AsyncOctopusEnergy": "async_client",
+    "ResourceType": "enums",
+    "ChargeType": "enums",
+    "Aggregate": "enums",
+    "iso_format": "util",
+    "create_session": "session",
+    "Transport": "transport",
+    "RequestsTransport": "transport",
+    "UrllibTransport": "transport",
+    "ReplayTransport": "transport",
+    "ConsumptionStore": "store",
+    "ResponseCache": "cache",
+    "MemoryCache": "cache",
+    "DiskCache": "cache",
+    "ConsumptionSeries": "series",
+    "RateSeries": "series",
+    "RateIndex": "rates",
+    "CostEngine": "costs",
+    "calculate_costs": "costs",
+    "SlotOptimizer": "scheduling",
+    "TariffComparison": "comparison",
+    "TariffCandidate": "comparison",
+    "FleetClient": "fleet",
+    "MeterConfig": "fleet",
+    "MeterResult": "fleet",
+    "RateLimiter": "ratelimit",
+    "shared_rate_limiter": "ratelimit",
+    "SingleFlight": "coalesce",
+    "AsyncSingleFlight": "coalesce",
+    "StreamedPage": "streaming",
+    "ConsumptionAggregator": "aggregation",
+    "aggregate": "aggregation",
+    "RequestEvent": "metrics",
+    "MetricsCollector": "metrics",
+    "SyncScheduler": "sync",
+    "SyncJob": "sync",
+    "ConsumptionJob": "sync",
+    "TariffJob": "sync",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,200 @@
+import time
+from array import array
+from .enums import Aggregate
+from .series import ConsumptionSeries, as_consumption_series
+from .localtime import LONDON, SECONDS_PER_DAY, np, require_numpy, utc_offsets, local_days
+
+
+SECONDS_PER_HOUR = 60 * 60
+
+# Aggregations which can be calculated from half-hourly consumption, finest first.
+LEVELS = (Aggregate.HOURLY, Aggregate.DAILY, Aggregate.WEEKLY, Aggregate.MONTHLY, Aggregate.QUARTERLY)
+
+
+def _as_arrays(consumption):
+    arrays = as_consumption_series(consumption).to_numpy()
+    return arrays["interval_start"], arrays["interval_end"], arrays["consumption"]
+
+
+def _to_array(typecode, values):
+    result = array(typecode)
+    result.frombytes(values.tobytes())
+    return result
+
+
+def _to_series(starts, ends, values):
+    return ConsumptionSeries(_to_array("q", starts.astype(np.int64)), _to_array("q", ends.astype(np.int64)), _to_array("d", values.astype(np.float64)))
+
+
+def local_midnights(days, tz=LONDON):
+    """
+    The start of each of an array of local days, in seconds since the epoch.
+
+    :param numpy.ndarray days: Local days since 1970-01-01 (int64).
+    :param datetime.tzinfo tz: (optional, default Europe/London) The timezone.
+    :rtype: numpy.ndarray
+    """
+    midnights = np.asarray(days, dtype=np.int64) * SECONDS_PER_DAY
+    # The offset at local midnight is found by refining a guess made with the offset at UTC midnight.
+    guess = midnights - utc_offsets(midnights, tz)
+    return midnights - utc_offsets(guess, tz)
+
+
+def _month_start_days(months):
+    return months.astype("datetime64[M]").astype("datetime64[D]").astype(np.int64)
+
+
+def _buckets(days, level):
+    # Returns each interval's bucket key and a function giving the local start day of a bucket key.
+    if level == Aggregate.DAILY:
+        return days, lambda keys: keys
+    if level == Aggregate.WEEKLY:
+        # Weeks start on Monday; 1970-01-01 was a Thursday.
+        return (days + 3) // 7, lambda keys: keys * 7 - 3
+    months = days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    if level == Aggregate.MONTHLY:
+        return months, _month_start_days
+    if level == Aggregate.QUARTERLY:
+        return months // 3, lambda keys: _month_start_days(keys * 3)
+    raise ValueError(f"Cannot aggregate half-hourly consumption by {level}")
+
+
+def _aggregate(starts, values, days, level, tz):
+    if level == Aggregate.HOURLY:
+        # UK offsets are whole hours, so local hours are UTC hours; this keeps the repeated hour in October apart.
+        keys, inverse = np.unique(starts // SECONDS_PER_HOUR, return_inverse=True)
+        return keys * SECONDS_PER_HOUR, (keys + 1) * SECONDS_PER_HOUR, np.bincount(inverse, weights=values, minlength=len(keys))
+
+    bucket_keys, start_day = _buckets(days, level)
+    keys, inverse = np.unique(bucket_keys, return_inverse=True)
+    return (
+        local_midnights(start_day(keys), tz),
+        local_midnights(start_day(keys + 1), tz),
+        np.bincount(inverse, weights=values, minlength=len(keys))
+    )
+
+
+def aggregate(consumption, levels=LEVELS, tz=LONDON):
+    """
+    Aggregates half-hourly consumption to several coarser levels at once, as the API's group_by parameter would.
+
+    Buckets follow local time: days start at local midnight, weeks on Monday and months and quarters on the 1st,
+    so days are 23 or 25 hours long when the clocks change. Each interval's local day is calculated once and
+    shared by every level.
+
+    e.g.
+
+        aggregate(octopus_client.get_consumption_for_period(ResourceType.ELECTRICITY, period_from, period_to, page_size=25000))[Aggregate.DAILY]
+
+    :param consumption: Half-hourly consumption, as a ConsumptionSeries or a parsed consumption response.
+    :param iterable levels: (optional) The Aggregate levels to calculate. Default: every level coarser than half-hourly.
+    :param datetime.tzinfo tz: (optional, default Europe/London) Timezone defining the buckets.
+    :returns: A ConsumptionSeries for each level, in ascending order of interval_start, keyed by Aggregate.
+    :rtype: dict
+    """
+    require_numpy("aggregate")
+    starts, _, values = _as_arrays(consumption)
+    days = local_days(starts, tz)
+
+    return {level: _to_series(*_aggregate(starts, values, days, level, tz)) for level in levels}
+
+
+class ConsumptionAggregator:
+    """
+    Half-hourly consumption which can be viewed at any Aggregate level, caching the buckets of completed periods.
+
+    A bucket is complete once it ends before both the current time and the end of the consumption held, so only
+    the latest, incomplete bucket of each level is recalculated when more consumption is added or the level is
+    requested again. Adding consumption earlier than a level's completed buckets discards that level's cache.
+
+    e.g.
+
+        aggregator = ConsumptionAggregator(octopus_client.get_consumption_for_period(ResourceType.ELECTRICITY, period_from, period_to, page_size=25000))
+        aggregator.get(Aggregate.DAILY)
+        aggregator.get(Aggregate.MONTHLY)
+    """
+    def __init__(self, consumption=None, tz=LONDON, clock=time.time):
+        """
+        Initialiser for the ConsumptionAggregator class. Requires numpy.
+
+        :param consumption: (optional) Half-hourly consumption, as a ConsumptionSeries or a parsed consumption response.
+        :param datetime.tzinfo tz: (optional, default Europe/London) Timezone defining the buckets.
+        :param callable clock: (optional, default time.time) Function returning the current time in seconds since the epoch.
+        """
+        require_numpy("ConsumptionAggregator")
+        self.tz = tz
+        self.clock = clock
+        self._starts = np.zeros(0, dtype=np.int64)
+        self._ends = np.zeros(0, dtype=np.int64)
+        self._values = np.zeros(0, dtype=np.float64)
+        self._complete = {}
+
+        if consumption is not None:
+            self.extend(consumption)
+
+    def __len__(self):
+        return len(self._starts)
+
+    def extend(self, consumption):
+        """
+        Adds half-hourly consumption. Intervals which are already held are replaced.
+
+        :param consumption: Half-hourly consumption, as a ConsumptionSeries or a parsed consumption response.
+        """
+        starts, ends, values = _as_arrays(consumption)
+        if not len(starts):
+            return
+
+        earliest = starts.min()
+        for level in [level for level, cached in self._complete.items() if earliest < cached[3]]:
+            del self._complete[level]
+
+        # New intervals come first so that np.unique keeps them in place of existing ones.
+        self._starts, index = np.unique(np.concatenate([starts, self._starts]), return_index=True)
+        self._ends = np.concatenate([ends, self._ends])[index]
+        self._values = np.concatenate([values, self._values])[index]
+
+    def get(self, level):
+        """
+        Consumption at an aggregation level.
+
+        :param Aggregate level: The aggregation level, e.g. Aggregate.DAILY.
+        :returns: Consumption for each bucket, in ascending order of interval_start.
+        :rtype: ConsumptionSeries
+        """
+        if level == Aggregate.HALF_HOURLY:
+            return _to_series(self._starts, self._ends, self._values)
+
+        cached_starts, cached_ends, cached_values, boundary = self._complete.get(level, (
+            np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64), np.iinfo(np.int64).min
+        ))
+
+        tail = np.searchsorted(self._starts, boundary)
+        starts = self._starts[tail:]
+        tail_starts, tail_ends, tail_values = _aggregate(starts, self._values[tail:], local_days(starts, self.tz), level, self.tz)
+
+        if len(self._ends):
+            complete = tail_ends <= min(self.clock(), self._ends.max())
+            if complete.any():
+                self._complete[level] = (
+                    np.concatenate([cached_starts, tail_starts[complete]]),
+                    np.concatenate([cached_ends, tail_ends[complete]]),
+                    np.concatenate([cached_values, tail_values[complete]]),
+                    tail_ends[complete].max()
+                )
+
+        return _to_series(
+            np.concatenate([cached_starts, tail_starts]),
+            np.concatenate([cached_ends, tail_ends]),
+            np.concatenate([cached_values, tail_values])
+        )
+
+    def get_all(self, levels=LEVELS):
+        """
+        Consumption at several aggregation levels.
+
+        :param iterable levels: (optional) The Aggregate levels. Default: every level coarser than half-hourly.
+        :returns: A ConsumptionSeries for each level, keyed by Aggregate.
+        :rtype: dict
+        """
+        return {level: self.get(level) for level in levels}
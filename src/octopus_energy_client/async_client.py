@@ -0,0 +1,261 @@
+import asyncio
+import logging
+import time
+from .client import OctopusEnergyBase
+from .enums import Aggregate
+from .metrics import RequestEvent
+from .pagination import page_count, is_paginated, merge_pages
+from .transport import RETRY_STATUSES, retry_delay, basic_auth
+from .decoding import loads
+from .series import ConsumptionSeries, RateSeries
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncOctopusEnergy(OctopusEnergyBase):
+    """
+    Asyncio API for retrieving Octopus Energy data.
+
+    Mirrors the OctopusEnergy client, with each request method implemented as a coroutine. Requires aiohttp,
+    which can be installed with `pip install octopus-energy-client[async]`.
+
+    e.g.
+
+        async with AsyncOctopusEnergy() as client:
+            consumption = await client.get_consumption_for_period(ResourceType.ELECTRICITY, period_from, period_to, all_pages=True)
+    """
+    def __init__(self, *args, session=None, max_concurrency=10, max_retries=3, backoff_factor=0.5, rate_limiter=None, hooks=None, single_flight=None, **kwargs):
+        """
+        Initialiser for the AsyncOctopusEnergy class.
+
+        Meter and tariff configuration is described in OctopusEnergyBase.
+
+        :param aiohttp.ClientSession session: (optional) Session used for all requests, which may be shared between clients. Default: a session owned by, and closed with, this client.
+        :param int max_concurrency: (optional, default 10) Maximum number of requests in flight when fetching pages concurrently.
+        :param int max_retries: (optional, default 3) Maximum number of retries for rate limited (429) and failed (5xx) requests.
+        :param float backoff_factor: (optional, default 0.5) Multiplier for the exponential backoff between retries.
+        :param RateLimiter rate_limiter: (optional) Limiter which every attempt waits on, and which adapts to throttled responses. e.g. shared_rate_limiter()
+        :param list hooks: (optional) Callables passed a RequestEvent measuring each request made to the API, e.g. MetricsCollector(). DNS and connection times are not recorded.
+        :param AsyncSingleFlight single_flight: (optional) Coalesces concurrent requests for the same URL into one. May be shared between clients on the same event loop.
+        """
+        if aiohttp is None:
+            raise ImportError("AsyncOctopusEnergy requires aiohttp. Install it with `pip install octopus-energy-client[async]`.")
+
+        super().__init__(*args, **kwargs)
+        self.session = session
+        self._owns_session = session is None
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.rate_limiter = rate_limiter
+        self.hooks = list(hooks or [])
+        self.single_flight = single_flight
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        """
+        Closes the client's session, unless it was supplied by the caller.
+        """
+        if self._owns_session and self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def _get_session(self):
+        # Sessions must be created inside a running event loop, so the default session is created on first use.
+        if self.session is None:
+            self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.max_concurrency))
+        return self.session
+
+    async def get_data(self, url):
+        """
+        Makes an API-key authenticated request to the octopus API using the given URL.
+
+        Rate limited (429) and failed (5xx) requests, and those which fail to connect or time out, are retried with
+        exponential backoff, honouring any Retry-After header. Once retries are exhausted the last response is returned. When the client has a rate
+        limiter, every attempt waits for it and reports its status to it. Each request, including its retries,
+        is measured and passed to the client's hooks. When the client has a single_flight, a request for a URL
+        which is already in flight awaits that request and returns the same parsed object, which must not be modified.
+
+        :param str url: The URL to request.
+        :returns: A parsed json object of results.
+        :rtype: dict
+        """
+        if self.single_flight is not None:
+            return await self.single_flight.do((self.api_key, url), lambda: self._get_data(url))
+        return await self._get_data(url)
+
+    async def _get_data(self, url):
+        session = self._get_session()
+        headers = {"Authorization": basic_auth(self.api_key)}
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        start = time.perf_counter()
+
+        for attempt in range(1, self.max_retries + 2):
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire_async()
+
+            # Set once the response is being read by _read_measured, which reports its own errors to the hooks.
+            measured = False
+            try:
+                async with session.get(url, headers=headers, timeout=timeout) as r:
+                    if self.rate_limiter is not None:
+                        self.rate_limiter.update(r.status, r.headers.get("Retry-After"))
+                    if r.status not in RETRY_STATUSES or attempt > self.max_retries:
+                        if not self.hooks:
+                            return loads(await r.read())
+                        measured = True
+                        return await self._read_measured(url, r, start, attempt - 1)
+                    delay = retry_delay(r.headers.get("Retry-After"), attempt, self.backoff_factor)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if attempt > self.max_retries:
+                    if not measured:
+                        self._emit(RequestEvent(url, total=time.perf_counter() - start, retries=attempt - 1, error=type(e).__name__))
+                    raise
+                delay = retry_delay(None, attempt, self.backoff_factor)
+            except Exception as e:
+                if not measured:
+                    self._emit(RequestEvent(url, total=time.perf_counter() - start, retries=attempt - 1, error=type(e).__name__))
+                raise
+
+            logger.debug(f"Retrying {url} in {delay}s (attempt {attempt})")
+            await asyncio.sleep(delay)
+
+    async def _read_measured(self, url, r, start, retries):
+        event = RequestEvent(url, r.status, ttfb=time.perf_counter() - start, retries=retries)
+        body = await r.read()
+        event.bytes = len(body)
+        event.total = time.perf_counter() - start
+
+        decode_start = time.perf_counter()
+        try:
+            return loads(body)
+        except ValueError as e:
+            event.error = type(e).__name__
+            raise
+        finally:
+            event.decode = time.perf_counter() - decode_start
+            self._emit(event)
+
+    def _emit(self, event):
+        for hook in self.hooks:
+            try:
+                hook(event)
+            except Exception:
+                logger.exception(f"Request hook {hook!r} failed")
+
+    async def get_all_pages(self, url_for_page, page_size):
+        """
+        Retrieves every page of a paginated endpoint.
+
+        The first page is requested alone to discover the total count, after which the remaining pages are
+        requested concurrently, limited by max_concurrency.
+
+        :param callable url_for_page: Function returning the URL for a page number, or for the first page when given None.
+        :param int page_size: The page size used in the URLs.
+        :returns: A single response containing the results of all pages, in page order.
+        :rtype: dict
+        """
+        first = await self.get_data(url_for_page(None))
+        if not is_paginated(first) or not first.get("next"):
+            return first
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def fetch(page):
+            async with semaphore:
+                return await self.get_data(url_for_page(page))
+
+        rest = await asyncio.gather(*(fetch(page) for page in range(2, page_count(first["count"], page_size) + 1)))
+        return merge_pages([first] + list(rest))
+
+    ##############
+    # Meter Data #
+    ##############
+
+    async def get_meter_point(self, resource_type):
+        """
+        Retrieves information about the meter point. See OctopusEnergy.get_meter_point.
+
+        :param ResourceType resource_type: The Type of resource to retrieve, e.g. ResourceType.ELECTRICITY.
+        :returns: A dictionary containing details of the meter point.
+        :rtype: dict
+        """
+        return await self.get_data(self.meter_url(resource_type))
+
+    async def get_grid_supply_points(self, postcode=None):
+        """
+        Retrieves a list of grid supply points. See OctopusEnergy.get_grid_supply_points.
+
+        :param str postcode: (optional) A postcode to filter on.
+        :returns: A dictionary containing a list of grid supply point objects.
+        :rtype: dict
+        """
+        return await self.get_data(self.grid_supply_points_url(postcode))
+
+    ###############
+    # Tariff Data #
+    ###############
+
+    async def get_tariff_data(self, resource_type, charge_type, period_from=None, period_to=None, page_size=100, page=None, all_pages=False, as_series=False):
+        """
+        Makes an API-key authenticated request for tariff data to the octopus API. See OctopusEnergy.get_tariff_data.
+
+        :param bool all_pages: (optional, default False) Retrieve every page concurrently and return the merged results. The page parameter is ignored.
+        :param bool as_series: (optional, default False) Return the rates as a columnar RateSeries rather than a dictionary.
+        :returns: Tariff information.
+        :rtype: dict or RateSeries
+        """
+        if all_pages:
+            data = await self.get_all_pages(
+                lambda p: self.tariff_data_url(resource_type, charge_type, period_from, period_to, page_size, p),
+                page_size
+            )
+        else:
+            data = await self.get_data(self.tariff_data_url(resource_type, charge_type, period_from, period_to, page_size, page))
+
+        return RateSeries.from_response(data) if as_series else data
+
+    ####################
+    # Consumption Data #
+    ####################
+
+    async def get_consumption_for_period(self, resource_type, period_from, period_to, reverse_order=False, page_size=100, page=None, group_by=Aggregate.HALF_HOURLY, all_pages=False, as_series=False):
+        """
+        Retrieves consumption data for the given resource between the given periods. See OctopusEnergy.get_consumption_for_period.
+
+        :param bool all_pages: (optional, default False) Retrieve every page concurrently and return the merged results. The page parameter is ignored.
+        :param bool as_series: (optional, default False) Return the consumption as a columnar ConsumptionSeries rather than a dictionary.
+        :returns: A dictionary object representing consumption data for the resource.
+        :rtype: dict or ConsumptionSeries
+        """
+        if all_pages:
+            data = await self.get_all_pages(
+                lambda p: self.consumption_data_url(resource_type, period_from, period_to, reverse_order, page_size, p, group_by),
+                page_size
+            )
+        else:
+            data = await self.get_data(self.consumption_data_url(resource_type, period_from, period_to, reverse_order, page_size, page, group_by))
+
+        return ConsumptionSeries.from_response(data) if as_series else data
+
+    async def get_consumption_for_date(self, resource_type, date_from, reverse_order=False, page_size=100, page=None, group_by=Aggregate.HALF_HOURLY, all_pages=False):
+        """
+        Retrieves consumption data for the meter on the given date. See OctopusEnergy.get_consumption_for_date.
+
+        :param bool all_pages: (optional, default False) Retrieve every page concurrently and return the merged results. The page parameter is ignored.
+        :returns: A dictionary object representing consumption data for the resource.
+        :rtype: dict
+        """
+        period_from, period_to = self.date_to_periods(date_from)
+        return await self.get_consumption_for_period(resource_type, period_from, period_to, reverse_order, page_size, page, group_by, all_pages)
@@ -0,0 +1,317 @@
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit, unquote
+from .util import to_timestamp
+from .decoding import loads
+
+
+# Default time to live, in seconds, of each kind of endpoint. None caches indefinitely and 0 disables caching.
+DEFAULT_TTLS = {
+    "meter_point": 24 * 60 * 60,
+    "grid_supply_points": 24 * 60 * 60,
+    "tariff": 30 * 60,
+    "consumption": 0,
+    "other": 0,
+}
+
+_ENDPOINTS = (
+    ("grid_supply_points", re.compile(r"/industry/grid-supply-points/?$")),
+    ("tariff", re.compile(r"/products/.+-tariffs/.+/(standing-charges|standard-unit-rates|day-unit-rates|night-unit-rates)/?$")),
+    ("consumption", re.compile(r"/consumption/?$")),
+    ("meter_point", re.compile(r"/(electricity|gas)-meter-points/[^/]+/?$")),
+)
+
+
+def endpoint_kind(url):
+    """
+    Classifies a URL by the kind of API endpoint it requests.
+
+    e.g. "https://api.octopus.energy/v1/industry/grid-supply-points?postcode=SW1A1AA" => "grid_supply_points"
+
+    :param str url: The URL to classify.
+    :returns: One of the keys of DEFAULT_TTLS.
+    :rtype: str
+    """
+    path = urlsplit(url).path
+    for kind, pattern in _ENDPOINTS:
+        if pattern.search(path):
+            return kind
+
+    return "other"
+
+
+def cache_key(url, api_key=None):
+    """
+    The key of a cached response. Responses to authenticated requests are keyed by a hash of the API key as well as
+    the URL, so that a cache shared between clients never returns one account's data to another, and API keys are
+    not stored in the cache.
+
+    :param str url: The requested URL.
+    :param str api_key: (optional) The API key the request was made with.
+    :rtype: str
+    """
+    if api_key is None:
+        return url
+
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:32] + " " + url
+
+
+class MemoryCache:
+    """
+    In-memory LRU cache backend, bounded by entry count and/or total size.
+    """
+    def __init__(self, max_entries=1024, max_bytes=None):
+        """
+        :param int max_entries: (optional, default 1024) Maximum number of entries, or None for no limit.
+        :param int max_bytes: (optional, default None) Maximum total size of the cached values in bytes, or None for no limit.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, now):
+        """
+        :returns: The cached value, or None if it is missing or has expired.
+        :rtype: bytes
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            value, expires = entry
+            if expires is not None and expires <= now:
+                self._remove(key)
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, expires):
+        """
+        :param str key: The cache key.
+        :param bytes value: The value to cache.
+        :param float expires: Time at which the value expires, in seconds since the epoch, or None to never expire.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (value, expires)
+            self.size_bytes += len(value)
+
+            while self._entries and self._over_limit(len(self._entries), self.size_bytes):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+    def _over_limit(self, count, size):
+        return (self.max_entries is not None and count > self.max_entries) or (self.max_bytes is not None and size > self.max_bytes)
+
+    def _remove(self, key):
+        value, _ = self._entries.pop(key)
+        self.size_bytes -= len(value)
+
+
+class DiskCache:
+    """
+    SQLite-backed LRU cache backend which persists between processes, bounded by entry count and/or total size.
+    """
+    def __init__(self, path, max_entries=None, max_bytes=256 * 1024 * 1024):
+        """
+        :param str path: Path of the SQLite database file, created if it does not exist.
+        :param int max_entries: (optional, default None) Maximum number of entries, or None for no limit.
+        :param int max_bytes: (optional, default 256MB) Maximum total size of the cached values in bytes, or None for no limit.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+
+        with self._connection:
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    expires REAL,
+                    accessed INTEGER NOT NULL
+                )
+                """
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)")
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    @property
+    def size_bytes(self):
+        with self._lock:
+            return self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+
+    def close(self):
+        self._connection.close()
+
+    def _over_limit(self, count, size):
+        return (self.max_entries is not None and count > self.max_entries) or (self.max_bytes is not None and size > self.max_bytes)
+
+    def get(self, key, now):
+        with self._lock, self._connection:
+            row = self._connection.execute("SELECT value, expires FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+
+            value, expires = row
+            if expires is not None and expires <= now:
+                self._connection.execute("DELETE FROM cache WHERE key = ?", (key,))
+                return None
+
+            self._connection.execute("UPDATE cache SET accessed = (SELECT MAX(accessed) + 1 FROM cache) WHERE key = ?", (key,))
+            return bytes(value)
+
+    def set(self, key, value, expires):
+        with self._lock, self._connection:
+            # Entries are ordered for LRU eviction by a counter which increases with every access.
+            self._connection.execute(
+                "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, (SELECT COALESCE(MAX(accessed), 0) + 1 FROM cache))",
+                (key, value, len(value), expires)
+            )
+
+            count, size = self._connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+            if not self._over_limit(count, size):
+                return
+
+            for old_key, old_size in self._connection.execute("SELECT key, size FROM cache ORDER BY accessed").fetchall():
+                if not self._over_limit(count, size):
+                    break
+                self._connection.execute("DELETE FROM cache WHERE key = ?", (old_key,))
+                count -= 1
+                size -= old_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM cache")
+
+
+class ResponseCache:
+    """
+    Cache of raw API responses, keyed by URL and API key, with a time to live for each kind of endpoint.
+
+    Tariff requests for a period which has fully passed are cached indefinitely, as historical rates do not change.
+    Hit and miss counts are available from stats() to help size the cache.
+
+    e.g.
+
+        octopus_client = OctopusEnergy(cache=ResponseCache(DiskCache("responses.db"), ttls={"consumption": 300}))
+    """
+    def __init__(self, backend=None, ttls=None, clock=time.time):
+        """
+        Initialiser for the ResponseCache class.
+
+        :param backend: (optional) Storage for cached responses, e.g. MemoryCache or DiskCache. Default: MemoryCache()
+        :param dict ttls: (optional) Overrides of DEFAULT_TTLS, in seconds. None caches indefinitely and 0 disables caching.
+        :param callable clock: (optional, default time.time) Function returning the current time in seconds since the epoch.
+        """
+        self.backend = backend if backend is not None else MemoryCache()
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def ttl_for(self, url):
+        """
+        The time to live of a response.
+
+        :param str url: The requested URL.
+        :returns: Seconds to cache the response for, None to cache it indefinitely or 0 to not cache it.
+        :rtype: float
+        """
+        kind = endpoint_kind(url)
+        if kind == "tariff":
+            # The query is split by hand, as parse_qs would decode the + of a UTC offset into a space.
+            query = dict(part.partition("=")[::2] for part in urlsplit(url).query.split("&"))
+            period_to = query.get("period_to")
+            if period_to:
+                try:
+                    if to_timestamp(unquote(period_to)) <= self.clock():
+                        return None
+                except ValueError:
+                    pass
+
+        return self.ttls.get(kind, 0)
+
+    def get(self, url, decode=loads, api_key=None):
+        """
+        Retrieves a cached response.
+
+        :param str url: The requested URL.
+        :param callable decode: (optional) Function decoding the raw body. Default: decoding.loads
+        :param str api_key: (optional) The API key the request is made with.
+        :returns: The decoded response, or None on a cache miss.
+        :rtype: dict
+        """
+        value = self.backend.get(cache_key(url, api_key), self.clock())
+
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        return decode(value)
+
+    def set(self, url, content, api_key=None):
+        """
+        Caches a response, if its endpoint is cacheable.
+
+        :param str url: The requested URL.
+        :param bytes content: The raw json body of the response.
+        :param str api_key: (optional) The API key the request was made with.
+        """
+        ttl = self.ttl_for(url)
+        if ttl == 0:
+            return
+
+        self.backend.set(cache_key(url, api_key), content, None if ttl is None else self.clock() + ttl)
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        """
+        Cache usage counters.
+
+        :returns: A dictionary of hits, misses, hit_rate, entries, bytes and evictions.
+        :rtype: dict
+        """
+        with self._lock:
+            hits, misses = self.hits, self.misses
+
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "entries": len(self.backend),
+            "bytes": self.backend.size_bytes,
+            "evictions": self.backend.evictions,
+        }
@@ -1,20 +1,31 @@
-import requests
 import os
+import copy
+import time
+import bisect
 import logging
 import datetime
 import pytz
+from concurrent.futures import ThreadPoolExecutor
 from .enums import ResourceType, Aggregate
-from .util import iso_format
+from .util import iso_format, to_timestamp, parse_timestamps
+from .transport import RequestsTransport
+from .decoding import loads
+from .pagination import page_count, is_paginated, merge_pages, iter_pages, iter_results
+from .series import ConsumptionSeries, RateSeries
+from .streaming import StreamedPage, iter_streamed_results
+from .metrics import RequestEvent, start_connection_timing, connection_timing
+from .planner import MAX_CONSUMPTION_ROWS, MAX_TARIFF_ROWS, AGGREGATE_INTERVALS, plan_ranges, date_runs, repair_ranges, stitch, consumption_gaps, rate_gaps
+from .localtime import LONDON, local_day_bounds
 
 
 logger = logging.getLogger(__name__)
 
 
-class OctopusEnergy:
+class OctopusEnergyBase:
     """
-    Python API for retrieving Octopus Energy data.
+    Meter and tariff configuration shared by the Octopus Energy clients, along with the construction of API URLs.
 
-    See https://developer.octopus.energy/docs/api/ for more details of the Octopus API.    
+    See https://developer.octopus.energy/docs/api/ for more details of the Octopus API.
     """
     base_url = "https://api.octopus.energy/v1"
 
@@ -30,10 +41,11 @@ class OctopusEnergy:
         gas_serial=None,
         gas_mprn=None,
         gas_product_code=None,
-        gas_region=None
+        gas_region=None,
+        timeout=None
     ):
         """
-        Initialiser for the OctopusEnergy class.
+        Initialiser for the Octopus Energy clients.
 
         For account keys and serial numbers, see https://octopus.energy/dashboard/developer/.
 
@@ -48,6 +60,7 @@ class OctopusEnergy:
         :param str gas_mprn: The MPRN of the gas meter point. Default: environ['OCTOPUS_GAS_MPRN']
         :param str gas_product_code: The product code for the gas account. Default: environ['OCTOPUS_GAS_PRODUCT_CODE']
         :param str gas_region: The region for the gas product. Default: environ['OCTOPUS_GAS_REGION']
+        :param float timeout: (optional, default None) Seconds to wait for the server before giving up on a request.
         """        
         self.api_key = api_key or os.environ["OCTOPUS_API_KEY"]
         self.octopus_electricity_tariff_prefix = electricity_tariff_prefix
@@ -64,6 +77,8 @@ class OctopusEnergy:
 
         self.electricity_consumption_units = "kWh"
         self.gas_consumption_units = "m³"
+
+        self.timeout = timeout
     
     def meter_url(self, resource_type):
         """
@@ -100,6 +115,46 @@ class OctopusEnergy:
 
         return f"{self.base_url}/products/{tariff_url}"
 
+    def for_tariff(self, resource_type, product_code, region, tariff_prefix=None):
+        """
+        A copy of the client with a different tariff for one resource, e.g. to retrieve the rates of another
+        product or region. The copy shares the client's session, cache and other settings.
+
+        :param ResourceType resource_type: The Type of resource whose tariff is replaced, e.g. ResourceType.ELECTRICITY.
+        :param str product_code: The product code, e.g. "AGILE-18-02-21".
+        :param str region: The region of the product, e.g. "C".
+        :param str tariff_prefix: (optional) The tariff code prefix, e.g. "E-1R-". Default: the client's prefix.
+        :returns: A client of the same class.
+        """
+        client = copy.copy(self)
+        if resource_type == ResourceType.ELECTRICITY:
+            client.ocopus_electricity_product_code = product_code
+            client.octopus_elecricity_region = region
+            if tariff_prefix is not None:
+                client.octopus_electricity_tariff_prefix = tariff_prefix
+        elif resource_type == ResourceType.GAS:
+            client.octopus_gas_product_code = product_code
+            client.octopus_gas_region = region
+            if tariff_prefix is not None:
+                client.octopus_gas_tariff_prefix = tariff_prefix
+
+        return client
+
+    def meter_ids(self, resource_type):
+        """
+        Identifiers of the configured meter for a resource.
+
+        :param ResourceType resource_type: The Type of resource, e.g. ResourceType.ELECTRICITY.
+        :returns: A tuple of the meter point (MPAN or MPRN) and the meter serial number.
+        :rtype: (str, str)
+        """
+        if resource_type == ResourceType.ELECTRICITY:
+            return self.octopus_electricity_mpan, self.octopus_electricity_serial
+        elif resource_type == ResourceType.GAS:
+            return self.octopus_gas_mprn, self.octopus_gas_serial
+        else:
+            return "", ""
+
     def consumption_url(self, resource_type):
         """
         URL for retrieving consumption data for a meter.
@@ -135,16 +190,248 @@ class OctopusEnergy:
         # Convert to UTC
         return date_from.astimezone(pytz.utc), date_to.astimezone(pytz.utc)
 
-    def get_data(self, url):
+    def grid_supply_points_url(self, postcode=None):
+        """
+        URL for retrieving grid supply points.
+
+        :param str postcode: (optional) A postcode to filter on.
+        :returns: A URL for retrieving grid supply points.
+        :rtype: str
+        """
+        postcode_str = f"?postcode={postcode}" if postcode is not None else ""
+        return f"{self.base_url}/industry/grid-supply-points{postcode_str}"
+
+    def tariff_data_url(self, resource_type, charge_type, period_from=None, period_to=None, page_size=100, page=None):
+        """
+        URL for retrieving a page of tariff data.
+
+        See get_tariff_data for a description of the parameters.
+
+        :returns: A URL for retrieving a page of tariff data.
+        :rtype: str
+        """
+        period_from_str = f"&period_from={iso_format(period_from)}" if period_from is not None else ""
+        period_to_str = f"&period_to={iso_format(period_to)}" if period_to is not None else ""
+        page_str = f"&page={page}" if page is not None else ""
+        return f"{self.tariff_url(resource_type)}/{charge_type.value}?page_size={page_size}{page_str}{period_from_str}{period_to_str}"
+
+    def consumption_data_url(self, resource_type, period_from, period_to, reverse_order=False, page_size=100, page=None, group_by=Aggregate.HALF_HOURLY):
+        """
+        URL for retrieving a page of consumption data.
+
+        See get_consumption_for_period for a description of the parameters.
+
+        :returns: A URL for retrieving a page of consumption data.
+        :rtype: str
+        """
+        order = "-period" if reverse_order else "period"
+        page_str = f"&page={page}" if page is not None else ""
+        group_by_str = f"&group_by={group_by.value}" if group_by != Aggregate.HALF_HOURLY else ""
+        return f"{self.consumption_url(resource_type)}?period_from={iso_format(period_from)}&period_to={iso_format(period_to)}&order_by={order}&page_size={page_size}{page_str}{group_by_str}"
+
+
+class OctopusEnergy(OctopusEnergyBase):
+    """
+    Python API for retrieving Octopus Energy data.
+
+    See https://developer.octopus.energy/docs/api/ for more details of the Octopus API.    
+    """
+    def __init__(self, *args, session=None, max_workers=4, store=None, cache=None, rate_limiter=None, hooks=None, single_flight=None, transport=None, **kwargs):
+        """
+        Initialiser for the OctopusEnergy class.
+
+        Meter and tariff configuration is described in OctopusEnergyBase.
+
+        :param requests.Session session: (optional) Session used for all requests, which may be shared between clients. Ignored if a transport is given. Default: create_session()
+        :param int max_workers: (optional, default 4) Number of threads used to fetch pages in parallel when all pages are requested.
+        :param ConsumptionStore store: (optional) Local store used to answer half-hourly consumption requests, fetching only missing intervals from the API.
+        :param ResponseCache cache: (optional) Cache of responses from slowly-changing endpoints, such as meter points and historical tariffs.
+        :param RateLimiter rate_limiter: (optional) Limiter which every request waits on, and which adapts to throttled responses. e.g. shared_rate_limiter(). Retries made by the transport do not wait on it; see RateLimiter.
+        :param list hooks: (optional) Callables passed a RequestEvent measuring each request made to the API, e.g. MetricsCollector().
+        :param SingleFlight single_flight: (optional) Coalesces concurrent requests for the same URL, from any thread, into one. May be shared between clients.
+        :param Transport transport: (optional) HTTP backend making the requests, e.g. UrllibTransport() to avoid importing requests. Default: RequestsTransport(session)
+        """
+        super().__init__(*args, **kwargs)
+        self.transport = transport if transport is not None else RequestsTransport(session)
+        self.max_workers = max_workers
+        self.store = store
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.hooks = list(hooks or [])
+        self.single_flight = single_flight
+
+    @property
+    def session(self):
+        """
+        The requests Session used by the client's transport, or None if the transport does not use requests.
+        """
+        return getattr(self.transport, "session", None)
+
+    def get_data(self, url, decode=loads):
         """
         Makes an API-key authenticated request to the octopus API using the given URL.
 
+        Requests are made by the client's transport, by default over a pooled requests session, so connections
+        are kept alive between calls and rate limited or failed requests are retried with backoff. Bodies are
+        decoded with the fastest JSON decoder installed (see decoding.loads), or the given decode function. When the client has a cache, cached responses
+        are returned without a request and successful responses are added to it. When the client has a rate
+        limiter, requests wait for it and the status of every attempt, including retries, is reported to it.
+        Each request, but not a cache hit, is measured and passed to the client's hooks. When the client has a
+        single_flight, a request for a URL which is already being requested by another thread waits for that
+        request and returns the same parsed object, which must not be modified.
+
         :param str url: The URL to request.
+        :param callable decode: (optional) Function decoding the raw body, e.g. ConsumptionSeries.from_json. Default: decoding.loads
         :returns: A parsed json object of results.
         :rtype: dict
         """
-        r = requests.get(url, auth=(self.api_key +':',''))
-        return r.json()
+        if self.single_flight is not None:
+            # The API key is part of the key so that clients for different accounts never share a response.
+            return self.single_flight.do((self.api_key, url, decode), lambda: self._get_data(url, decode))
+        return self._get_data(url, decode)
+
+    def _get_data(self, url, decode=loads):
+        if self.cache is not None:
+            data = self.cache.get(url, decode, self.api_key)
+            if data is not None:
+                return data
+
+        r, event, start = self._request(url)
+
+        if self.cache is not None and r.status_code == 200:
+            self.cache.set(url, r.content, self.api_key)
+
+        if event is None:
+            return decode(r.content)
+
+        event.bytes = len(r.content)
+        event.total = time.perf_counter() - start
+        decode_start = time.perf_counter()
+        try:
+            return decode(r.content)
+        except ValueError as e:
+            event.error = type(e).__name__
+            raise
+        finally:
+            event.decode = time.perf_counter() - decode_start
+            self._emit(event)
+
+    def get_data_stream(self, url, chunk_size=64 * 1024):
+        """
+        Makes an API-key authenticated request to the octopus API, decoding the response incrementally as it is read.
+
+        Unlike get_data, the body is never held in memory as a whole: records of the "results" array are decoded
+        one at a time as the page is iterated. Streamed responses are not cached, and the events passed to hooks
+        measure the request up to the arrival of the response headers.
+
+        e.g.
+
+            with octopus_client.get_data_stream(url) as page:
+                page.count
+                for record in page:
+                    ...
+
+        :param str url: The URL to request.
+        :param int chunk_size: (optional, default 64KB) Number of bytes read from the connection at a time.
+        :returns: The incrementally decoded response.
+        :rtype: StreamedPage
+        """
+        r, event, start = self._request(url, stream=True)
+        if event is not None:
+            event.total = time.perf_counter() - start
+            self._emit(event)
+
+        return StreamedPage(r.iter_content(chunk_size), r.close)
+
+    def _request(self, url, stream=False):
+        # Returns the response, a RequestEvent when the client has hooks, and the time at which the request started.
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+
+        start = time.perf_counter()
+        start_connection_timing()
+        try:
+            r = self.transport.get(url, self.api_key, timeout=self.timeout, stream=stream)
+        except Exception as e:
+            if self.hooks:
+                dns, connect = connection_timing()
+                self._emit(RequestEvent(url, dns=dns, connect=connect, total=time.perf_counter() - start, error=type(e).__name__))
+            raise
+
+        if self.rate_limiter is not None:
+            for status in r.retries:
+                self.rate_limiter.update(status)
+            self.rate_limiter.update(r.status_code, r.headers.get("retry-after"))
+
+        if not self.hooks:
+            return r, None, start
+
+        dns, connect = connection_timing()
+        return r, RequestEvent(url, r.status_code, dns=dns, connect=connect, ttfb=r.elapsed, retries=len(r.retries)), start
+
+    def _emit(self, event):
+        for hook in self.hooks:
+            try:
+                hook(event)
+            except Exception:
+                logger.exception(f"Request hook {hook!r} failed")
+
+    def get_all_pages(self, url_for_page, page_size):
+        """
+        Retrieves every page of a paginated endpoint.
+
+        The first page is requested alone to discover the total count, after which the remaining pages are
+        requested in parallel on a pool of max_workers threads.
+
+        :param callable url_for_page: Function returning the URL for a page number, or for the first page when given None.
+        :param int page_size: The page size used in the URLs.
+        :returns: A single response containing the results of all pages, in page order.
+        :rtype: dict
+        """
+        first = self.get_data(url_for_page(None))
+        if not is_paginated(first) or not first.get("next"):
+            return first
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            rest = executor.map(lambda page: self.get_data(url_for_page(page)), range(2, page_count(first["count"], page_size) + 1))
+            return merge_pages([first] + list(rest))
+
+    def get_ranges(self, url_for_range, ranges, page_size):
+        """
+        Retrieves every page of a paginated endpoint for each of several sub-ranges, in parallel on a pool of
+        max_workers threads.
+
+        The first page of every sub-range is requested, then the remaining pages of all sub-ranges, on the same
+        pool, so that no more than max_workers requests are ever in flight. A failure of any page, first or later,
+        is returned as the error response rather than raised.
+
+        :param callable url_for_range: Function taking a sub-range's period_from, period_to and page number (or None for the first page) and returning its URL.
+        :param list ranges: (period_from, period_to) tuples, e.g. from plan_ranges.
+        :param int page_size: The page size used in the URLs.
+        :returns: A single response for each sub-range, in order, or the first response which was not a page of results.
+        :rtype: list or dict
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            firsts = list(executor.map(lambda period: self.get_data(url_for_range(period[0], period[1], None)), ranges))
+            for first in firsts:
+                if not is_paginated(first):
+                    return first
+
+            rest = [
+                [
+                    executor.submit(self.get_data, url_for_range(period[0], period[1], page))
+                    for page in range(2, page_count(first["count"], page_size) + 1)
+                ] if first.get("next") else []
+                for period, first in zip(ranges, firsts)
+            ]
+            rest = [[future.result() for future in futures] for futures in rest]
+
+        for pages in rest:
+            for page in pages:
+                if not is_paginated(page):
+                    return page
+
+        return [merge_pages([first] + pages) if pages else first for first, pages in zip(firsts, rest)]
 
     ##############
     # Meter Data #
@@ -189,14 +476,13 @@ class OctopusEnergy:
         :returns: A dictionary containing a list of grid supply point objects.
         :rtype: dict
         """
-        postcode_str = f"?postcode={postcode}" if postcode is not None else ""
-        return self.get_data(f"{self.base_url}/industry/grid-supply-points{postcode_str}")
+        return self.get_data(self.grid_supply_points_url(postcode))
 
     ###############
     # Tariff Data #
     ###############
 
-    def get_tariff_data(self, resource_type, charge_type, period_from=None, period_to=None, page_size=100, page=None):
+    def get_tariff_data(self, resource_type, charge_type, period_from=None, period_to=None, page_size=100, page=None, all_pages=False, as_series=False):
         """
         Makes an API-key authenticated request for tariff data to the octopus API.
 
@@ -206,20 +492,86 @@ class OctopusEnergy:
         :param datetime.datetime period_to: The latest time period for which unit rates should be retrieved. e.g. datetime.datetime(2022, 1, 1, 23, 30, 0, tzinfo=pytz.utc)
         :param int page_size: (optional, default 100) Page size of returned results. Default 100, Max 1,500 to give up to a month of half-hourly prices.
         :param int page: (optional, default None) The page number to load.
+        :param bool all_pages: (optional, default False) Retrieve every page in parallel and return the merged results. The page parameter is ignored.
+        :param bool as_series: (optional, default False) Return the rates as a columnar RateSeries rather than a dictionary.
         :returns: Tariff information.
+        :rtype: dict or RateSeries
+        """
+        if all_pages:
+            data = self.get_all_pages(
+                lambda p: self.tariff_data_url(resource_type, charge_type, period_from, period_to, page_size, p),
+                page_size
+            )
+        elif as_series:
+            return self.get_data(self.tariff_data_url(resource_type, charge_type, period_from, period_to, page_size, page), RateSeries.from_json)
+        else:
+            data = self.get_data(self.tariff_data_url(resource_type, charge_type, period_from, period_to, page_size, page))
+
+        return RateSeries.from_response(data) if as_series else data
+
+    def iter_tariff_rates(self, resource_type, charge_type, period_from=None, period_to=None, page_size=100, prefetch=True, stream=False):
+        """
+        Iterates over individual tariff rates, following pagination automatically.
+
+        Rates are yielded as each page arrives and the next page is requested in the background, so memory is
+        bounded by the page size rather than the length of the period.
+
+        e.g.
+
+        {'value_exc_vat': 15.0, 'value_inc_vat': 15.75, 'valid_from': '2022-01-01T00:00:00Z', 'valid_to': '2022-01-01T00:30:00Z'}
+
+        :param ResourceType resource_type: The Type of resource to retrieve, e.g. ResourceType.ELECTRICITY.
+        :param ChargeType charge_type: The charge type to retrieve. e.g. ChargeType.STANDARD_UNIT_RATES
+        :param datetime.datetime period_from: (optional) The earliest time period for which rates should be retrieved.
+        :param datetime.datetime period_to: (optional) The latest time period for which rates should be retrieved.
+        :param int page_size: (optional, default 100) Page size of each request. Max 1,500.
+        :param bool prefetch: (optional, default True) Request the next page while the current page is consumed.
+        :param bool stream: (optional, default False) Decode each page incrementally as it is read rather than prefetching it, so memory stays flat however large the page size. See get_data_stream.
+        :returns: A generator of tariff rate records.
+        :rtype: generator
+        """
+        url = self.tariff_data_url(resource_type, charge_type, period_from, period_to, page_size)
+        if stream:
+            return iter_streamed_results(self.get_data_stream, url)
+        return iter_results(iter_pages(self.get_data, url, prefetch))
+
+
+    def get_tariff_data_in_chunks(self, resource_type, charge_type, period_from, period_to, max_rows=MAX_TARIFF_ROWS):
+        """
+        Retrieves tariff data for a period of any length with the fewest requests.
+
+        The period is split by plan_ranges into whole-day sub-ranges of at most max_rows half-hourly windows, which
+        are requested in parallel. Windows spanning a sub-range boundary are returned once, and any part of the
+        period not covered by a window is reported in "gaps".
+
+        e.g.
+
+        {'count': 17520, 'next': None, 'previous': None, 'results': [...], 'gaps': [(datetime.datetime(...), datetime.datetime(...))]}
+
+        :param ResourceType resource_type: The Type of resource to retrieve, e.g. ResourceType.ELECTRICITY.
+        :param ChargeType charge_type: The charge type to retrieve. e.g. ChargeType.STANDARD_UNIT_RATES
+        :param datetime.datetime period_from: The earliest time period for which tariff data should be retrieved.
+        :param datetime.datetime period_to: The latest time period for which tariff data should be retrieved.
+        :param int max_rows: (optional, default 1500) Page size of each request, and the maximum number of windows in each sub-range.
+        :returns: A dictionary object representing the tariff data for the whole period, newest first, or the first error response.
         :rtype: dict
         """
-        period_from_str = f"&period_from={iso_format(period_from)}" if period_from is not None else ""
-        period_to_str = f"&period_to={iso_format(period_to)}" if period_to is not None else ""
-        page_str = f"&page={page}" if page is not None else ""
-        return self.get_data(f"{self.tariff_url(resource_type)}/{charge_type.value}?page_size={page_size}{page_str}{period_from_str}{period_to_str}")
+        pages = self.get_ranges(
+            lambda chunk_from, chunk_to, page: self.tariff_data_url(resource_type, charge_type, chunk_from, chunk_to, max_rows, page),
+            plan_ranges(period_from, period_to, max_rows),
+            max_rows
+        )
+        if isinstance(pages, dict):
+            return pages
 
+        results = stitch(pages, "valid_from", reverse=True)
+        return {"count": len(results), "next": None, "previous": None, "results": results, "gaps": rate_gaps(results, period_from, period_to)}
 
     ####################
     # Consumption Data #
     ####################
 
-    def get_consumption_for_period(self, resource_type, period_from, period_to, reverse_order=False, page_size=100, page=None, group_by=Aggregate.HALF_HOURLY):
+    def get_consumption_for_period(self, resource_type, period_from, period_to, reverse_order=False, page_size=100, page=None, group_by=Aggregate.HALF_HOURLY, all_pages=False, as_series=False):
         """
         Retrieves consumption data for the given resource between the given periods.
 
@@ -230,15 +582,174 @@ class OctopusEnergy:
         :param int page_size: (optional, default 100) Page size of returned results. Default 100, Max 25,000 to give a full year of harlf-hourly consumption details.
         :param int page: (optional, default None) The page number to load.
         :param Aggregate group_by: (optional, default Aggregate.HALF_HOURLY) Aggregates consumption over a speficied time period.
+        :param bool all_pages: (optional, default False) Retrieve every page in parallel and return the merged results. The page parameter is ignored.
+        :param bool as_series: (optional, default False) Return the consumption as a columnar ConsumptionSeries rather than a dictionary.
         :returns: A dictionary object representing consumption data for the resource.
+        :rtype: dict or ConsumptionSeries
+
+        When the client has a store, half-hourly requests without a page number are answered from the store, after
+        fetching any intervals which are missing from it in pages of the maximum size. All results for the period
+        are then returned in one page, so page_size and all_pages have no effect.
+        """
+        if self.store is not None and group_by == Aggregate.HALF_HOURLY and page is None:
+            data = self.sync_consumption(resource_type, period_from, period_to, reverse_order)
+        elif all_pages:
+            data = self.get_all_pages(
+                lambda p: self.consumption_data_url(resource_type, period_from, period_to, reverse_order, page_size, p, group_by),
+                page_size
+            )
+        elif as_series:
+            # Decoded straight into the series, without a dictionary for each interval.
+            return self.get_data(self.consumption_data_url(resource_type, period_from, period_to, reverse_order, page_size, page, group_by), ConsumptionSeries.from_json)
+        else:
+            data = self.get_data(self.consumption_data_url(resource_type, period_from, period_to, reverse_order, page_size, page, group_by))
+
+        return ConsumptionSeries.from_response(data) if as_series else data
+
+    def sync_consumption(self, resource_type, period_from, period_to, reverse_order=False, page_size=MAX_CONSUMPTION_ROWS):
+        """
+        Retrieves half-hourly consumption for a period via the client's store.
+
+        Only the intervals missing from the store, i.e. those after its watermark and any holes before it, are
+        requested from the API, with nearby holes merged by repair_ranges and the ranges fetched in parallel.
+        Fetched records are written to the store in a single transaction before the whole period is read back from
+        disk.
+
+        :param ResourceType resource_type: The Type of resource to retrieve, e.g. ResourceType.ELECTRICITY.
+        :param datetime.datetime period_from: The earliest time period for which consumption data should be retrieved.
+        :param datetime.datetime period_to: The latest time period for which consumption data should be retrieved.
+        :param bool reverse_order: (optional, default False) Should the results be returned in reverse date order.
+        :param int page_size: (optional, default 25000) Page size used when fetching missing intervals.
+        :returns: A dictionary object representing consumption data for the resource, or the API's response if a request fails.
         :rtype: dict
         """
-        order = "-period" if reverse_order else "period"
-        page_str = f"&page={page}" if page is not None else ""
-        group_by_str = f"&group_by={group_by.value}" if group_by != Aggregate.HALF_HOURLY else ""
-        return self.get_data(f"{self.consumption_url(resource_type)}?period_from={iso_format(period_from)}&period_to={iso_format(period_to)}&order_by={order}&page_size={page_size}{page_str}{group_by_str}")
+        meter_point, serial = self.meter_ids(resource_type)
+        ranges = repair_ranges(self.store.missing_ranges(meter_point, serial, period_from, period_to))
+
+        pages = self.get_ranges(
+            lambda gap_from, gap_to, page: self.consumption_data_url(resource_type, gap_from, gap_to, page_size=page_size, page=page),
+            ranges,
+            page_size
+        )
+        if isinstance(pages, dict):
+            return pages
+
+        fetched = [record for page in pages for record in page["results"]]
+        if fetched:
+            self.store.upsert(meter_point, serial, fetched)
+
+        results = self.store.get_range(meter_point, serial, period_from, period_to, reverse_order)
+        return {"count": len(results), "next": None, "previous": None, "results": results}
+
+    def iter_consumption(self, resource_type, period_from, period_to, reverse_order=False, page_size=100, group_by=Aggregate.HALF_HOURLY, prefetch=True, stream=False):
+        """
+        Iterates over individual consumption intervals, following pagination automatically.
 
-    def get_consumption_for_date(self, resource_type, date_from, reverse_order=False, page_size=100, page=None, group_by=Aggregate.HALF_HOURLY):
+        Intervals are yielded as each page arrives and the next page is requested in the background, so memory
+        is bounded by the page size rather than the length of the period.
+
+        e.g.
+
+        {'consumption': 0.113, 'interval_start': '2022-01-01T00:00:00Z', 'interval_end': '2022-01-01T00:30:00Z'}
+
+        :param ResourceType resource_type: The Type of resource to retrieve, e.g. ResourceType.ELECTRICITY.
+        :param datetime.datetime period_from: The earliest time period for which consumption data should be retrieved.
+        :param datetime.datetime period_to: The latest time period for which consumption data should be retrieved.
+        :param bool reverse_order: (optional, default False) Should the results be returned in reverse date order.
+        :param int page_size: (optional, default 100) Page size of each request. Max 25,000.
+        :param Aggregate group_by: (optional, default Aggregate.HALF_HOURLY) Aggregates consumption over a speficied time period.
+        :param bool prefetch: (optional, default True) Request the next page while the current page is consumed.
+        :param bool stream: (optional, default False) Decode each page incrementally as it is read rather than prefetching it, so memory stays flat however large the page size. See get_data_stream.
+        :returns: A generator of consumption records.
+        :rtype: generator
+        """
+        url = self.consumption_data_url(resource_type, period_from, period_to, reverse_order, page_size, group_by=group_by)
+        if stream:
+            return iter_streamed_results(self.get_data_stream, url)
+        return iter_results(iter_pages(self.get_data, url, prefetch))
+
+    def get_consumption_in_chunks(self, resource_type, period_from, period_to, reverse_order=False, group_by=Aggregate.HALF_HOURLY, max_rows=MAX_CONSUMPTION_ROWS):
+        """
+        Retrieves consumption data for a period of any length with the fewest requests.
+
+        Half-hourly and hourly periods are split by plan_ranges into whole-day sub-ranges of at most max_rows
+        intervals, which are requested in parallel; other aggregations follow local time and are requested as a
+        single range. Intervals repeated on a sub-range boundary are returned once, and missing half-hourly or
+        hourly intervals are reported in "gaps".
+
+        e.g.
+
+        {'count': 35040, 'next': None, 'previous': None, 'results': [...], 'gaps': [(datetime.datetime(...), datetime.datetime(...))]}
+
+        :param ResourceType resource_type: The Type of resource to retrieve, e.g. ResourceType.ELECTRICITY.
+        :param datetime.datetime period_from: The earliest time period for which consumption data should be retrieved.
+        :param datetime.datetime period_to: The latest time period for which consumption data should be retrieved.
+        :param bool reverse_order: (optional, default False) Should the results be returned in reverse date order.
+        :param Aggregate group_by: (optional, default Aggregate.HALF_HOURLY) Aggregates consumption over a speficied time period.
+        :param int max_rows: (optional, default 25000) Page size of each request, and the maximum number of intervals in each sub-range.
+        :returns: A dictionary object representing consumption data for the whole period, or the first error response.
+        :rtype: dict
+        """
+        interval = AGGREGATE_INTERVALS.get(group_by)
+        ranges = plan_ranges(period_from, period_to, max_rows, interval) if interval else [(period_from, period_to)]
+
+        pages = self.get_ranges(
+            lambda chunk_from, chunk_to, page: self.consumption_data_url(resource_type, chunk_from, chunk_to, reverse_order, max_rows, page, group_by),
+            ranges,
+            max_rows
+        )
+        if isinstance(pages, dict):
+            return pages
+
+        results = stitch(pages, "interval_start", reverse_order)
+        gaps = consumption_gaps(results, period_from, period_to, interval) if interval else []
+        return {"count": len(results), "next": None, "previous": None, "results": results, "gaps": gaps}
+
+    def repair_consumption(self, resource_type, consumption, period_from, period_to, reverse_order=False, merge_gap=48, page_size=25000):
+        """
+        Fills the missing half-hourly intervals of previously retrieved consumption, without refetching the rest.
+
+        The missing intervals are found with consumption_gaps and grouped into as few ranges as possible with
+        repair_ranges, and only those ranges are requested, in parallel. Intervals still missing afterwards, e.g.
+        those the meter has not yet reported, are listed under "gaps".
+
+        e.g.
+
+            consumption = octopus_client.get_consumption_for_period(ResourceType.ELECTRICITY, period_from, period_to, page_size=25000)
+            consumption = octopus_client.repair_consumption(ResourceType.ELECTRICITY, consumption, period_from, period_to)
+            consumption["gaps"]
+
+        :param ResourceType resource_type: The Type of resource to retrieve, e.g. ResourceType.ELECTRICITY.
+        :param consumption: Half-hourly consumption for the period, as a parsed response, a list of records or a ConsumptionSeries.
+        :param datetime.datetime period_from: The start of the period to repair.
+        :param datetime.datetime period_to: The end of the period to repair.
+        :param bool reverse_order: (optional, default False) Should the results be returned in reverse date order.
+        :param int merge_gap: (optional, default 48) Maximum number of present intervals between gaps fetched in one request.
+        :param int page_size: (optional, default 25000) Page size of each request.
+        :returns: A dictionary object representing consumption data for the period, including the refetched
+                  intervals and a list of the remaining gaps, or the first error response.
+        :rtype: dict
+        """
+        if isinstance(consumption, ConsumptionSeries):
+            records = consumption.to_records()
+        else:
+            records = consumption["results"] if isinstance(consumption, dict) else consumption
+        ranges = repair_ranges(consumption_gaps(records, period_from, period_to), merge_gap)
+
+        pages = self.get_ranges(
+            lambda gap_from, gap_to, page: self.consumption_data_url(resource_type, gap_from, gap_to, page_size=page_size, page=page),
+            ranges,
+            page_size
+        )
+        if isinstance(pages, dict):
+            return pages
+
+        # Refetched intervals take precedence, as they may have been revised since the original request.
+        results = stitch(pages + [{"results": records}], "interval_start", reverse_order)
+        gaps = consumption_gaps(results, period_from, period_to)
+        return {"count": len(results), "next": None, "previous": None, "results": results, "gaps": gaps}
+
+    def get_consumption_for_date(self, resource_type, date_from, reverse_order=False, page_size=100, page=None, group_by=Aggregate.HALF_HOURLY, all_pages=False):
         """
         Retrieves consumption data for the meter on the given date.
 
@@ -248,8 +759,63 @@ class OctopusEnergy:
         :param int page_size: (optional, default 100) Page size of returned results. Default 100, Max 25,000 to give a full year of harlf-hourly consumption details.
         :param int page: (optional, default 1) The page nnumber to load.
         :param Aggregate group_by: (optional, default Aggregate.HALF_HOURLY) Aggregates consumption over a speficied time period.
+        :param bool all_pages: (optional, default False) Retrieve every page in parallel and return the merged results. The page parameter is ignored.
         :returns: A dictionary object representing consumption data for the resource.
         :rtype: dict
         """
         period_from, period_to = self.date_to_periods(date_from)
-        return self.get_consumption_for_period(resource_type, period_from, period_to, reverse_order, page_size, page, group_by)
+        return self.get_consumption_for_period(resource_type, period_from, period_to, reverse_order, page_size, page, group_by, all_pages)
+
+    def get_consumption_for_dates(self, resource_type, dates, tz=LONDON, merge_gap=7, max_rows=MAX_CONSUMPTION_ROWS, as_series=False):
+        """
+        Retrieves half-hourly consumption data for each of many dates with as few requests as possible.
+
+        Dates are grouped into runs, which are requested in parallel as ranges of at most max_rows intervals, and
+        the intervals are then split into local days. Each day runs from local midnight to local midnight, so days
+        when the clocks change have 46 or 50 intervals.
+
+        e.g. octopus_client.get_consumption_for_dates(ResourceType.ELECTRICITY, [datetime.date(2022, 3, 26), datetime.date(2022, 3, 27)]) =>
+
+        {datetime.date(2022, 3, 26): [{'consumption': 0.113, 'interval_start': '2022-03-26T00:00:00Z', ...}, ...], datetime.date(2022, 3, 27): [...]}
+
+        :param ResourceType resource_type: The Type of resource to retrieve, e.g. ResourceType.ELECTRICITY.
+        :param iterable dates: The datetime.date of each day to retrieve, in any order.
+        :param datetime.tzinfo tz: (optional, default Europe/London) Timezone defining the days.
+        :param int merge_gap: (optional, default 7) Runs of dates separated by at most this many days are requested as one range.
+        :param int max_rows: (optional, default 25000) Page size of each request, and the maximum number of intervals in each range.
+        :param bool as_series: (optional, default False) Return each day's consumption as a ConsumptionSeries.
+        :returns: The consumption records of each date, in ascending order, keyed by date.
+        :rtype: dict
+        :raises ValueError: If the API returns an error response.
+        """
+        days = sorted(set(dates))
+        runs = date_runs(days, merge_gap)
+        ranges = [
+            chunk
+            for first, last in runs
+            for chunk in plan_ranges(local_day_bounds(first, tz)[0], local_day_bounds(last, tz)[1], max_rows)
+        ]
+
+        pages = self.get_ranges(
+            lambda chunk_from, chunk_to, page: self.consumption_data_url(resource_type, chunk_from, chunk_to, False, max_rows, page),
+            ranges,
+            max_rows
+        )
+        if isinstance(pages, dict):
+            raise ValueError(f"Consumption request failed: {pages}")
+
+        bounds = [local_day_bounds(day, tz) for day in days]
+        starts = [to_timestamp(start) for start, _ in bounds]
+        ends = [to_timestamp(end) for _, end in bounds]
+
+        by_date = {day: [] for day in days}
+        records = stitch(pages, "interval_start")
+        for ts, record in zip(parse_timestamps([record["interval_start"] for record in records]), records):
+            # Merged runs include days which were not asked for, whose intervals are dropped.
+            i = bisect.bisect_right(starts, ts) - 1
+            if i >= 0 and ts < ends[i]:
+                by_date[days[i]].append(record)
+
+        if as_series:
+            return {day: ConsumptionSeries.from_response(day_records) for day, day_records in by_date.items()}
+        return by_date
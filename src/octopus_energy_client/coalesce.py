@@ -0,0 +1,125 @@
+import asyncio
+import threading
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls for the same key into one, so that threads asking for the same URL at the same
+    moment share a single request and its decoded result.
+
+    The first caller for a key makes the call; callers arriving while it is in flight wait for it and receive the
+    same result, or the same exception. Once the call completes the key is forgotten, so later calls are made
+    afresh. Shared results must be treated as read-only.
+
+    e.g.
+
+        octopus_client = OctopusEnergy(single_flight=SingleFlight())
+        ...
+        octopus_client.single_flight.stats()
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        """
+        Calls fn, unless a call for the same key is already in flight, in which case its result is awaited.
+
+        :param key: Hashable identifier of the call, e.g. a URL.
+        :param callable fn: Function taking no arguments which makes the call.
+        :returns: The result of fn.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+                leader = True
+            else:
+                self.coalesced += 1
+                leader = False
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self):
+        """
+        Coalescing counters.
+
+        :returns: A dictionary of calls made, calls coalesced into another (i.e. requests saved), and calls in flight.
+        :rtype: dict
+        """
+        with self._lock:
+            return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self._calls)}
+
+
+class AsyncSingleFlight:
+    """
+    Collapses concurrent coroutine calls for the same key into one, as SingleFlight does for threads.
+
+    The call runs as a task of its own, so a caller which is cancelled does not cancel it for the others. An
+    instance should only be used from one event loop.
+    """
+    def __init__(self):
+        self._calls = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def _forget(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Retrieves the exception so that it is not reported as unhandled when every caller was cancelled.
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, key, fn):
+        """
+        Awaits fn(), unless a call for the same key is already in flight, in which case its result is awaited.
+
+        :param key: Hashable identifier of the call, e.g. a URL.
+        :param callable fn: Coroutine function taking no arguments which makes the call.
+        :returns: The result of fn().
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = self._calls[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self.calls += 1
+        else:
+            self.coalesced += 1
+
+        return await asyncio.shield(task)
+
+    def stats(self):
+        """
+        Coalescing counters.
+
+        :returns: A dictionary of calls made, calls coalesced into another (i.e. requests saved), and calls in flight.
+        :rtype: dict
+        """
+        return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self._calls)}
@@ -0,0 +1,272 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from .enums import ChargeType
+from .pagination import is_paginated
+from .planner import MAX_TARIFF_ROWS
+from .rates import RateIndex
+from .series import as_consumption_series
+from .localtime import LONDON, np, require_numpy, local_days
+from .util import HALF_HOUR
+
+
+logger = logging.getLogger(__name__)
+
+
+def _distinct_times(starts, interval=HALF_HOUR):
+    """
+    The distinct times among starts, ascending, and the index of each start within them. Times on a common grid
+    of intervals, as a batch of half-hourly consumption is, are placed without sorting.
+    """
+    if len(starts):
+        offsets = starts - starts.min()
+        if not (offsets % interval).any() and offsets.max() // interval < 2 * len(starts):
+            slots = offsets // interval
+            present = np.bincount(slots) > 0
+            return starts.min() + np.flatnonzero(present) * interval, (np.cumsum(present) - 1)[slots]
+
+    return np.unique(starts, return_inverse=True)
+
+
+class TariffCandidate:
+    """
+    A product and region to compare a customer's consumption against.
+    """
+    def __init__(self, resource_type, product_code, region, tariff_prefix=None, consumption_factor=1.0, key=None):
+        """
+        Initialiser for the TariffCandidate class.
+
+        :param ResourceType resource_type: The Type of the tariff, e.g. ResourceType.ELECTRICITY.
+        :param str product_code: The product code, e.g. "AGILE-18-02-21".
+        :param str region: The region of the product, e.g. "C".
+        :param str tariff_prefix: (optional) The tariff code prefix, e.g. "E-1R-". Default: the client's prefix for the resource.
+        :param float consumption_factor: (optional, default 1.0) Multiplier converting consumption to kWh, e.g. for gas meters which report m³.
+        :param key: (optional) Identifier used to key results. Default: "<resource>:<product_code>:<region>"
+        """
+        self.resource_type = resource_type
+        self.product_code = product_code
+        self.region = region
+        self.tariff_prefix = tariff_prefix
+        self.consumption_factor = consumption_factor
+        self.key = key if key is not None else f"{resource_type.value}:{product_code}:{region}"
+
+    def __repr__(self):
+        return f"TariffCandidate({self.key!r})"
+
+
+class TariffComparison:
+    """
+    Costs customers' consumption against many tariffs, to find the cheapest product and region for each.
+
+    The unit rates and standing charges of every candidate are fetched concurrently, each through a copy of the
+    client configured for the candidate's tariff, and kept for the life of the comparison. Costs are then
+    calculated with NumPy for a whole batch of customers at once: rates are looked up once per distinct interval
+    start and summed into each customer's costs, so memory grows with the number of intervals in the batch.
+    Costs match CostEngine, i.e. a standing charge for each local day with consumption.
+
+    e.g.
+
+        comparison = TariffComparison(octopus_client, [
+            TariffCandidate(ResourceType.ELECTRICITY, "AGILE-18-02-21", "C"),
+            TariffCandidate(ResourceType.ELECTRICITY, "GO-VAR-22-10-14", "C"),
+            TariffCandidate(ResourceType.ELECTRICITY, "VAR-22-11-01", "C"),
+        ], period_from, period_to)
+
+        comparison.compare(octopus_client.get_consumption_for_period(ResourceType.ELECTRICITY, period_from, period_to, page_size=25000))
+        # [{'candidate': 'electricity:GO-VAR-22-10-14:C', 'energy': 71234.5, 'standing_charge': 16425.0, 'total': 87659.5, 'unpriced_intervals': 0}, ...]
+    """
+    def __init__(self, client, candidates, period_from, period_to, include_vat=True, tz=LONDON, max_workers=8):
+        """
+        Initialiser for the TariffComparison class. Requires numpy.
+
+        :param OctopusEnergy client: Client used to retrieve the rates of each candidate.
+        :param list candidates: TariffCandidate for each tariff to compare.
+        :param datetime.datetime period_from: The start of the period for which rates are retrieved.
+        :param datetime.datetime period_to: The end of the period for which rates are retrieved.
+        :param bool include_vat: (optional, default True) Use rates including VAT.
+        :param datetime.tzinfo tz: (optional, default Europe/London) Timezone defining the days that standing charges apply to.
+        :param int max_workers: (optional, default 8) Number of candidates whose rates are fetched at once, and so the maximum number of requests in flight.
+        :raises ValueError: If two candidates have the same key.
+        """
+        require_numpy("TariffComparison")
+        self.client = client
+        self.candidates = list(candidates)
+        if len({candidate.key for candidate in self.candidates}) != len(self.candidates):
+            raise ValueError("Tariff candidates must have unique keys")
+
+        self.period_from = period_from
+        self.period_to = period_to
+        self.include_vat = include_vat
+        self.tz = tz
+        self.max_workers = max_workers
+
+        self.unit_rates = {}
+        self.standing_charges = {}
+        self.errors = {}
+
+    def _fetch_candidate(self, candidate):
+        client = self.client.for_tariff(candidate.resource_type, candidate.product_code, candidate.region, candidate.tariff_prefix)
+        # Candidates are already fetched in parallel, so each fetches its own chunks and pages one at a time to keep
+        # the requests in flight within max_workers.
+        client.max_workers = 1
+        unit_rates = client.get_tariff_data_in_chunks(candidate.resource_type, ChargeType.STANDARD_UNIT_RATES, self.period_from, self.period_to)
+        if not is_paginated(unit_rates):
+            return unit_rates, None
+
+        standing_charges = client.get_tariff_data(candidate.resource_type, ChargeType.STANDING_CHARGES, self.period_from, self.period_to, page_size=MAX_TARIFF_ROWS, all_pages=True)
+        if not is_paginated(standing_charges):
+            return standing_charges, None
+
+        return RateIndex(unit_rates), RateIndex(standing_charges)
+
+    def fetch(self):
+        """
+        Retrieves the rates of every candidate not already retrieved, in parallel.
+
+        Candidates whose rates could not be retrieved are recorded in errors, with the error response or
+        exception, and are left out of comparisons. They are retried by the next call.
+
+        :returns: The errors of the candidates which failed, keyed by TariffCandidate.key.
+        :rtype: dict
+        """
+        pending = [candidate for candidate in self.candidates if candidate.key not in self.unit_rates]
+        if not pending:
+            return self.errors
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {candidate.key: executor.submit(self._fetch_candidate, candidate) for candidate in pending}
+
+        for key, future in futures.items():
+            if future.exception() is not None:
+                logger.warning(f"Rates for {key} could not be retrieved: {future.exception()!r}")
+                self.errors[key] = future.exception()
+                continue
+
+            unit_rates, standing_charges = future.result()
+            if standing_charges is None:
+                logger.warning(f"Rates for {key} could not be retrieved: {unit_rates}")
+                self.errors[key] = unit_rates
+            else:
+                self.errors.pop(key, None)
+                self.unit_rates[key] = unit_rates
+                self.standing_charges[key] = standing_charges
+
+        return self.errors
+
+    def _cost_batch(self, arrays, candidates):
+        """
+        Energy and standing charge costs and unpriced interval counts of a batch of customers, each an array with
+        a row per customer and a column per candidate.
+        """
+        starts = np.concatenate([np.zeros(0, dtype=np.int64)] + [a["interval_start"] for a in arrays])
+        usage = np.concatenate([np.zeros(0)] + [a["consumption"] for a in arrays])
+        owner = np.repeat(np.arange(len(arrays)), [len(a["interval_start"]) for a in arrays])
+
+        # Rates and local days are found once for each distinct time, as customers' intervals largely coincide.
+        times, slot = _distinct_times(starts)
+        days = local_days(times, self.tz)
+        first_day = days.min() if len(days) else 0
+        span = days.max() - first_day + 1 if len(days) else 1
+
+        # Each (customer, local day) with consumption pays one standing charge, at the rate for its earliest interval.
+        first = np.full(len(arrays) * span, len(times))
+        np.minimum.at(first, owner * span + (days - first_day)[slot], slot)
+        charged = np.flatnonzero(first < len(times))
+        day_owner, day_times = charged // span, times[first[charged]]
+
+        # Each customer's intervals are contiguous, so are summed into its row by reduceat over the non-empty ones.
+        lengths = np.array([len(a["interval_start"]) for a in arrays], dtype=np.int64)
+        nonempty = lengths > 0
+        offsets = (np.cumsum(lengths) - lengths)[nonempty]
+
+        energy = np.zeros((len(arrays), len(candidates)))
+        standing_charge = np.zeros((len(arrays), len(candidates)))
+        unpriced = np.zeros((len(arrays), len(candidates)), dtype=np.int64)
+        for column, candidate in enumerate(candidates):
+            rates = self.unit_rates[candidate.key].lookup(times, self.include_vat) * candidate.consumption_factor
+            missing = np.isnan(rates)
+            if missing.any():
+                rates = np.where(missing, 0.0, rates)
+                unpriced[nonempty, column] = np.add.reduceat(missing[slot].astype(np.int64), offsets)
+
+            if len(offsets):
+                energy[nonempty, column] = np.add.reduceat(usage * rates[slot], offsets)
+            standing_rates = np.nan_to_num(self.standing_charges[candidate.key].lookup(day_times, self.include_vat))
+            standing_charge[:, column] = np.bincount(day_owner, weights=standing_rates, minlength=len(arrays))
+
+        return energy, standing_charge, unpriced
+
+    def costs(self, consumptions, resource_type=None, batch_size=100):
+        """
+        Costs the consumption of many customers against every candidate, fetching rates first if needed.
+
+        Customers are costed in batches of batch_size, which bounds memory use: each batch holds a few arrays
+        of every interval of its customers, around 90MB for 100 customers with a year of half-hourly consumption.
+
+        :param dict consumptions: Half-hourly consumption of each customer, as a ConsumptionSeries or a parsed consumption response, keyed by any customer identifier.
+        :param ResourceType resource_type: (optional) Only cost candidates for this resource.
+        :param int batch_size: (optional, default 100) Number of customers costed at once.
+        :returns: A dictionary of the customer keys, the candidate keys, and energy, standing_charge and total
+                  costs in pence and unpriced_intervals counts, each an array with a row per customer and a column
+                  per candidate.
+        :rtype: dict
+        """
+        self.fetch()
+        candidates = [
+            candidate for candidate in self.candidates
+            if candidate.key in self.unit_rates and (resource_type is None or candidate.resource_type == resource_type)
+        ]
+        customers = list(consumptions)
+
+        shape = (len(customers), len(candidates))
+        energy, standing_charge, unpriced = np.zeros(shape), np.zeros(shape), np.zeros(shape, dtype=np.int64)
+        for batch in range(0, len(customers), batch_size):
+            arrays = [as_consumption_series(consumptions[customer]).to_numpy() for customer in customers[batch:batch + batch_size]]
+            rows = slice(batch, batch + len(arrays))
+            energy[rows], standing_charge[rows], unpriced[rows] = self._cost_batch(arrays, candidates)
+
+        return {
+            "customers": customers,
+            "candidates": [candidate.key for candidate in candidates],
+            "energy": energy,
+            "standing_charge": standing_charge,
+            "total": energy + standing_charge,
+            "unpriced_intervals": unpriced,
+        }
+
+    def compare_many(self, consumptions, resource_type=None):
+        """
+        Ranks the candidates by total cost for each of many customers.
+
+        :param dict consumptions: Half-hourly consumption of each customer, keyed by any customer identifier.
+        :param ResourceType resource_type: (optional) Only rank candidates for this resource.
+        :returns: A list of costs for each candidate, cheapest first, keyed by customer. See compare.
+        :rtype: dict
+        """
+        costs = self.costs(consumptions, resource_type)
+        ranked = {}
+        for row, customer in enumerate(costs["customers"]):
+            ranked[customer] = [
+                {
+                    "candidate": costs["candidates"][column],
+                    "energy": float(costs["energy"][row, column]),
+                    "standing_charge": float(costs["standing_charge"][row, column]),
+                    "total": float(costs["total"][row, column]),
+                    "unpriced_intervals": int(costs["unpriced_intervals"][row, column]),
+                }
+                for column in np.argsort(costs["total"][row], kind="stable")
+            ]
+
+        return ranked
+
+    def compare(self, consumption, resource_type=None):
+        """
+        Ranks the candidates by the total cost of one customer's consumption.
+
+        e.g. [{'candidate': 'electricity:AGILE-18-02-21:C', 'energy': 65012.1, 'standing_charge': 16425.0, 'total': 81437.1, 'unpriced_intervals': 0}, ...]
+
+        :param consumption: Half-hourly consumption, as a ConsumptionSeries or a parsed consumption response.
+        :param ResourceType resource_type: (optional) Only rank candidates for this resource.
+        :returns: Energy, standing charge and total costs in pence, and the number of intervals with no unit rate, for each candidate, cheapest first.
+        :rtype: list
+        """
+        return self.compare_many({None: consumption}, resource_type)[None]
@@ -0,0 +1,136 @@
+from .series import as_consumption_series
+from .rates import RateIndex
+from .localtime import LONDON, np, require_numpy, local_days
+
+
+def _as_rate_index(rates):
+    return rates if isinstance(rates, RateIndex) else RateIndex(rates)
+
+
+class CostBreakdown:
+    """
+    The cost of a consumption series, per interval, per local day and in total. All costs are in pence.
+
+    Intervals with no matching unit rate have a cost of NaN and are excluded from the totals; their number is
+    given by unpriced_intervals.
+    """
+    def __init__(self, interval_start, consumption, unit_rate, interval_cost, days, daily_energy_cost, daily_standing_charge):
+        self.interval_start = interval_start
+        self.consumption = consumption
+        self.unit_rate = unit_rate
+        self.interval_cost = interval_cost
+        self.days = days
+        self.daily_energy_cost = daily_energy_cost
+        self.daily_standing_charge = daily_standing_charge
+        self.daily_cost = daily_energy_cost + daily_standing_charge
+
+    @property
+    def energy_total(self):
+        return float(self.daily_energy_cost.sum())
+
+    @property
+    def standing_total(self):
+        return float(self.daily_standing_charge.sum())
+
+    @property
+    def total(self):
+        return self.energy_total + self.standing_total
+
+    @property
+    def unpriced_intervals(self):
+        return int(np.isnan(self.unit_rate).sum())
+
+    def daily(self):
+        """
+        Daily costs as a list of dictionaries.
+
+        e.g. [{'date': datetime.date(2022, 1, 1), 'energy': 152.3, 'standing_charge': 21.0, 'total': 173.3}, ...]
+
+        :rtype: list
+        """
+        return [
+            {"date": day, "energy": float(energy), "standing_charge": float(standing), "total": float(energy + standing)}
+            for day, energy, standing in zip(self.days.astype("datetime64[D]").tolist(), self.daily_energy_cost, self.daily_standing_charge)
+        ]
+
+
+class CostEngine:
+    """
+    Vectorized calculation of energy costs from half-hourly consumption, unit rates and standing charges.
+
+    Consumption intervals are matched to the unit rate window (valid_from/valid_to) covering their start, and a
+    standing charge is added for each local day with consumption. Rates are indexed once, so the same engine can
+    cost any number of meters on the same tariff.
+
+    e.g.
+
+        engine = CostEngine(
+            octopus_client.get_tariff_data(ResourceType.ELECTRICITY, ChargeType.STANDARD_UNIT_RATES, period_from, period_to, page_size=1500, all_pages=True),
+            octopus_client.get_tariff_data(ResourceType.ELECTRICITY, ChargeType.STANDING_CHARGES, period_from, period_to)
+        )
+        engine.calculate(octopus_client.get_consumption_for_period(ResourceType.ELECTRICITY, period_from, period_to, page_size=25000)).total
+    """
+    def __init__(self, unit_rates, standing_charges=None, include_vat=True, tz=LONDON, consumption_factor=1.0):
+        """
+        Initialiser for the CostEngine class. Requires numpy.
+
+        :param unit_rates: Unit rates in pence per kWh, as a RateIndex, a RateSeries or a parsed tariff response.
+        :param standing_charges: (optional) Standing charges in pence per day, as a RateIndex, a RateSeries or a parsed tariff response.
+        :param bool include_vat: (optional, default True) Use rates including VAT.
+        :param datetime.tzinfo tz: (optional, default Europe/London) Timezone defining the days that standing charges apply to.
+        :param float consumption_factor: (optional, default 1.0) Multiplier converting consumption to kWh, e.g. for gas meters which report m³.
+        """
+        require_numpy("CostEngine")
+        self.tz = tz
+        self.include_vat = include_vat
+        self.consumption_factor = consumption_factor
+        self.unit_rates = _as_rate_index(unit_rates)
+        self.standing_charges = _as_rate_index(standing_charges) if standing_charges is not None else None
+
+    def calculate(self, consumption):
+        """
+        Costs a consumption series.
+
+        :param consumption: Half-hourly consumption, as a ConsumptionSeries or a parsed consumption response.
+        :returns: Per-interval, daily and total costs.
+        :rtype: CostBreakdown
+        """
+        arrays = as_consumption_series(consumption).to_numpy()
+        starts = arrays["interval_start"]
+        usage = arrays["consumption"] * self.consumption_factor
+
+        unit_rate = self.unit_rates.lookup(starts, self.include_vat)
+        interval_cost = usage * unit_rate
+
+        days, inverse = np.unique(local_days(starts, self.tz), return_inverse=True)
+        daily_energy_cost = np.bincount(inverse, weights=np.nan_to_num(interval_cost), minlength=len(days))
+
+        if self.standing_charges is not None:
+            # Each day is charged at the rate for its earliest interval, whatever order the consumption is in.
+            day_starts = np.full(len(days), np.iinfo(starts.dtype).max, dtype=starts.dtype)
+            np.minimum.at(day_starts, inverse, starts)
+            daily_standing_charge = np.nan_to_num(self.standing_charges.lookup(day_starts, self.include_vat))
+        else:
+            daily_standing_charge = np.zeros(len(days))
+
+        return CostBreakdown(starts, usage, unit_rate, interval_cost, days, daily_energy_cost, daily_standing_charge)
+
+    def calculate_many(self, consumptions):
+        """
+        Costs the consumption of several meters on the same tariff.
+
+        :param dict consumptions: Consumption for each meter, keyed by any meter identifier.
+        :returns: A CostBreakdown for each meter, with the same keys.
+        :rtype: dict
+        """
+        return {key: self.calculate(consumption) for key, consumption in consumptions.items()}
+
+
+def calculate_costs(consumption, unit_rates, standing_charges=None, include_vat=True, tz=LONDON, consumption_factor=1.0):
+    """
+    Costs a consumption series against unit rates and standing charges. See CostEngine.
+
+    :returns: Per-interval, daily and total costs in pence.
+    :rtype: CostBreakdown
+    """
+    return CostEngine(unit_rates, standing_charges, include_vat, tz, consumption_factor).calculate(consumption)
@@ -0,0 +1,81 @@
+import json
+import importlib.util
+from array import array
+from .util import OPEN_ENDED
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+# msgspec is only imported once typed records are first decoded, unless it is the fastest decoder of plain JSON.
+MSGSPEC_INSTALLED = importlib.util.find_spec("msgspec") is not None
+
+# The decoder used by loads.
+DECODER = "orjson" if orjson is not None else "msgspec" if MSGSPEC_INSTALLED else "json"
+
+
+def _msgspec_loads(content):
+    # msgspec's DecodeError is not a ValueError, so it is converted to keep the contract of loads.
+    import msgspec
+    try:
+        return msgspec.json.decode(content)
+    except msgspec.DecodeError as e:
+        raise ValueError(f"Response was not valid JSON: {e}") from e
+
+
+if orjson is not None:
+    _loads = orjson.loads
+elif MSGSPEC_INSTALLED:  # pragma: no cover
+    _loads = _msgspec_loads
+else:  # pragma: no cover
+    _loads = json.loads
+
+
+def loads(content):
+    """
+    Decodes a JSON response body with the fastest decoder installed: orjson, msgspec or the standard library.
+
+    Install `octopus-energy-client[fast]` for the faster decoders.
+
+    :param bytes content: The raw body.
+    :returns: The parsed json object.
+    :raises ValueError: If the body is not valid JSON.
+    """
+    return _loads(content)
+
+
+def decode_results(content, kind):
+    """
+    Decodes the results of a page of consumption or tariff data straight into typed record structs, without
+    building a dictionary for each record. Timestamps are parsed into aware datetimes as they are decoded, and
+    fields which are not needed, such as count and next, are skipped.
+
+    :param bytes content: The raw body of the response.
+    :param str kind: "consumption" for ConsumptionStruct records, or "rate" for RateStruct records (see records).
+    :returns: A list of record structs, or None if msgspec is not installed.
+    :rtype: list
+    :raises ValueError: If the body is not a page of results, e.g. an error response, or is not valid JSON.
+    """
+    if not MSGSPEC_INSTALLED:
+        return None
+
+    from .records import PAGE_DECODERS, DecodeError, ValidationError
+    try:
+        return PAGE_DECODERS[kind].decode(content).results
+    except ValidationError:
+        raise ValueError(f"Response did not contain results: {loads(content)}") from None
+    except DecodeError as e:
+        raise ValueError(f"Response was not valid JSON: {e}") from e
+
+
+def timestamps(values, default=OPEN_ENDED):
+    """
+    Converts the datetimes of decoded record structs to seconds since the epoch.
+
+    :param iterable values: Aware datetimes, or None.
+    :param int default: (optional, default OPEN_ENDED) Timestamp used in place of None values.
+    :returns: An array of 64-bit timestamps.
+    :rtype: array.array
+    """
+    return array("q", [int(value.timestamp()) if value is not None else default for value in values])
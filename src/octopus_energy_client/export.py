@@ -0,0 +1,408 @@
+import argparse
+import csv
+import datetime
+import gzip
+import json
+import logging
+import os
+import sys
+from .enums import ResourceType, ChargeType
+from .fleet import FleetClient, MeterConfig
+from .planner import MAX_CONSUMPTION_ROWS, MAX_TARIFF_ROWS, plan_ranges
+from .util import OPEN_ENDED, iso_format, to_timestamp, from_timestamp, parse_timestamps
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover
+    pa = None
+    pq = None
+
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("parquet", "csv")
+
+CONSUMPTION_COLUMNS = ("interval_start", "interval_end", "consumption")
+TARIFF_COLUMNS = ("valid_from", "valid_to", "value_exc_vat", "value_inc_vat")
+
+# Columns holding times, which are written to Parquet as UTC timestamps rather than strings.
+TIME_COLUMNS = ("interval_start", "interval_end", "valid_from", "valid_to")
+
+MANIFEST = "manifest.json"
+
+# Rows written to each part file before starting the next.
+DEFAULT_ROWS_PER_FILE = 1000000
+
+
+class _CsvPart:
+    """
+    A gzip compressed CSV file, written a batch of rows at a time.
+    """
+    extension = ".csv.gz"
+
+    def __init__(self, path, columns):
+        self.columns = columns
+        self._file = gzip.open(path, "wt", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(columns)
+
+    def write(self, rows):
+        self._writer.writerows([[row.get(column) for column in self.columns] for row in rows])
+
+    def close(self):
+        self._file.close()
+
+
+class _ParquetPart:
+    """
+    A Parquet file to which each batch of rows is written as a row group.
+    """
+    extension = ".parquet"
+
+    def __init__(self, path, columns):
+        if pa is None:
+            raise ImportError("Parquet export requires pyarrow. Install it with `pip install octopus-energy-client[parquet]`.")
+
+        self.columns = columns
+        self._schema = pa.schema([
+            (column, pa.timestamp("s", tz="UTC") if column in TIME_COLUMNS else pa.float64())
+            for column in columns
+        ])
+        self._writer = pq.ParquetWriter(path, self._schema)
+
+    def _array(self, column, rows):
+        values = [row.get(column) for row in rows]
+        if column in TIME_COLUMNS:
+            values = [None if ts == OPEN_ENDED else ts for ts in parse_timestamps(values)]
+        return pa.array(values, type=self._schema.field(column).type)
+
+    def write(self, rows):
+        self._writer.write_table(pa.Table.from_arrays([self._array(column, rows) for column in self.columns], schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+_PARTS = {"parquet": _ParquetPart, "csv": _CsvPart}
+
+
+class DatasetWriter:
+    """
+    Writes records to a directory of numbered part files, with a manifest recording what has been written.
+
+    Each batch of rows is written to the current part as it arrives, so memory is bounded by the batch size. A part
+    is written under a temporary name and only renamed, and added to the manifest along with the watermark of its
+    last batch, once it is complete. An export which is interrupted therefore leaves a consistent dataset, and can
+    be resumed from the manifest's watermark.
+
+    e.g.
+
+        with DatasetWriter("exports/electricity", CONSUMPTION_COLUMNS, format="csv") as writer:
+            writer.write(records, watermark=records[-1]["interval_end"])
+    """
+    def __init__(self, directory, columns, format="parquet", rows_per_file=DEFAULT_ROWS_PER_FILE):
+        """
+        Initialiser for the DatasetWriter class. The directory is created if it does not exist.
+
+        :param str directory: Directory holding the part files and manifest.
+        :param tuple columns: Names of the fields written from each record.
+        :param str format: (optional, default "parquet") Either "parquet", which requires pyarrow, or "csv" for gzip compressed CSV.
+        :param int rows_per_file: (optional, default 1,000,000) Rows written to each part before starting another.
+        :raises ValueError: If the directory holds a dataset of another format or columns.
+        """
+        if format not in _PARTS:
+            raise ValueError(f"Unknown export format {format!r}, expected one of {FORMATS}")
+
+        self.directory = directory
+        self.columns = tuple(columns)
+        self.format = format
+        self.rows_per_file = rows_per_file
+
+        os.makedirs(directory, exist_ok=True)
+        self.manifest = self._load_manifest()
+        self._part = None
+        self._part_rows = 0
+        self._watermark = None
+
+    @property
+    def watermark(self):
+        """
+        The watermark of the last batch in a completed part, i.e. where a resumed export should start, or None.
+        """
+        return self.manifest["watermark"]
+
+    @property
+    def rows(self):
+        """
+        The number of rows in completed parts.
+        """
+        return sum(part["rows"] for part in self.manifest["parts"])
+
+    def _load_manifest(self):
+        path = os.path.join(self.directory, MANIFEST)
+        if not os.path.exists(path):
+            return {"format": self.format, "columns": list(self.columns), "watermark": None, "parts": []}
+
+        with open(path) as f:
+            manifest = json.load(f)
+        if manifest["format"] != self.format or tuple(manifest["columns"]) != self.columns:
+            raise ValueError(f"{self.directory} holds a {manifest['format']} export of {manifest['columns']}, not {self.format} of {list(self.columns)}")
+        return manifest
+
+    def _save_manifest(self):
+        path = os.path.join(self.directory, MANIFEST)
+        with open(path + ".tmp", "w") as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(path + ".tmp", path)
+
+    def _part_path(self):
+        return os.path.join(self.directory, f"part-{len(self.manifest['parts']):05d}{_PARTS[self.format].extension}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, rows, watermark):
+        """
+        Writes a batch of rows to the current part.
+
+        :param list rows: Records holding at least the dataset's columns.
+        :param str watermark: Where an export resumed after this batch should start, e.g. the last interval_end.
+        """
+        if not rows:
+            if self._part is not None:
+                self._watermark = watermark
+            return
+
+        if self._part is None:
+            self._part = _PARTS[self.format](self._part_path() + ".partial", self.columns)
+
+        try:
+            self._part.write(rows)
+        except BaseException:
+            # A part which failed part way through a batch cannot be trusted, so the whole part is discarded.
+            self._discard()
+            raise
+
+        self._part_rows += len(rows)
+        self._watermark = watermark
+        if self._part_rows >= self.rows_per_file:
+            self._commit()
+
+    def _discard(self):
+        path = self._part_path() + ".partial"
+        try:
+            self._part.close()
+        finally:
+            self._part = None
+            self._part_rows = 0
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _commit(self):
+        path = self._part_path()
+        self._part.close()
+        os.replace(path + ".partial", path)
+
+        self.manifest["parts"].append({"file": os.path.basename(path), "rows": self._part_rows})
+        self.manifest["watermark"] = self._watermark
+        self._save_manifest()
+        logger.info(f"Wrote {self._part_rows} rows to {path}, up to {self._watermark}")
+
+        self._part = None
+        self._part_rows = 0
+
+    def close(self):
+        """
+        Completes the current part, if any.
+        """
+        if self._part is not None:
+            self._commit()
+
+
+def _batches(records, size):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def export_consumption(client, resource_type, period_from, period_to, directory, format="parquet", page_size=MAX_CONSUMPTION_ROWS, rows_per_file=DEFAULT_ROWS_PER_FILE):
+    """
+    Exports half-hourly consumption for a period to a directory of part files, resuming any previous export to it.
+
+    Pages are decoded incrementally and each page is written as soon as it has been read, so memory does not grow
+    with the length of the period. Intervals are written in ascending order, and those starting at or after
+    period_to are left for a later export.
+
+    e.g.
+
+        export_consumption(octopus_client, ResourceType.ELECTRICITY, period_from, period_to, "exports/electricity")
+
+    :param OctopusEnergy client: Client configured with the meter.
+    :param ResourceType resource_type: The Type of resource to export, e.g. ResourceType.ELECTRICITY.
+    :param datetime.datetime period_from: The start of the period.
+    :param datetime.datetime period_to: The end of the period.
+    :param str directory: Directory holding the part files and manifest.
+    :param str format: (optional, default "parquet") Either "parquet" or "csv".
+    :param int page_size: (optional, default 25000) Page size of each request, and the number of rows in each batch.
+    :param int rows_per_file: (optional, default 1,000,000) Rows written to each part before starting another.
+    :returns: The number of rows in the dataset.
+    :rtype: int
+    """
+    end = to_timestamp(period_to)
+    with DatasetWriter(directory, CONSUMPTION_COLUMNS, format, rows_per_file) as writer:
+        if writer.watermark is not None:
+            period_from = max(period_from, from_timestamp(to_timestamp(writer.watermark)))
+
+        if period_from < period_to:
+            records = client.iter_consumption(resource_type, period_from, period_to, page_size=page_size, stream=True)
+            for batch in _batches(records, page_size):
+                starts = parse_timestamps([record["interval_start"] for record in batch])
+                batch = [record for start, record in zip(starts, batch) if start < end]
+                if batch:
+                    writer.write(batch, watermark=batch[-1]["interval_end"])
+
+    return writer.rows
+
+
+def export_tariffs(client, resource_type, charge_type, period_from, period_to, directory, format="parquet", page_size=MAX_TARIFF_ROWS, rows_per_file=DEFAULT_ROWS_PER_FILE):
+    """
+    Exports tariff rates for a period to a directory of part files, resuming any previous export to it.
+
+    The API returns rates newest first, so the period is split by plan_ranges into sub-ranges of at most page_size
+    windows, which are requested oldest first and each written in ascending order. A window spanning a sub-range
+    boundary is written once, with the sub-range in which it starts. The windows in force at period_from are
+    included however long ago they started.
+
+    :param OctopusEnergy client: Client configured with the tariff.
+    :param ResourceType resource_type: The Type of resource to export, e.g. ResourceType.ELECTRICITY.
+    :param ChargeType charge_type: The charge type to export. e.g. ChargeType.STANDARD_UNIT_RATES
+    :param datetime.datetime period_from: The start of the period.
+    :param datetime.datetime period_to: The end of the period.
+    :param str directory: Directory holding the part files and manifest.
+    :param str format: (optional, default "parquet") Either "parquet" or "csv".
+    :param int page_size: (optional, default 1500) Page size of each request, and the maximum number of windows in each sub-range.
+    :param int rows_per_file: (optional, default 1,000,000) Rows written to each part before starting another.
+    :returns: The number of rows in the dataset.
+    :rtype: int
+    """
+    with DatasetWriter(directory, TARIFF_COLUMNS, format, rows_per_file) as writer:
+        earliest = -OPEN_ENDED
+        if writer.watermark is not None:
+            period_from = max(period_from, from_timestamp(to_timestamp(writer.watermark)))
+            earliest = to_timestamp(period_from)
+
+        for chunk_from, chunk_to in plan_ranges(period_from, period_to, page_size):
+            records = list(client.iter_tariff_rates(resource_type, charge_type, chunk_from, chunk_to, page_size=page_size, stream=True))
+            starts = parse_timestamps([record["valid_from"] for record in records], default=-OPEN_ENDED)
+            end = to_timestamp(chunk_to)
+            batch = [record for _, record in sorted(
+                ((start, record) for start, record in zip(starts, records) if earliest <= start < end),
+                key=lambda item: item[0]
+            )]
+            writer.write(batch, watermark=iso_format(chunk_to))
+            earliest = end
+
+    return writer.rows
+
+
+def _parse_time(value):
+    dt = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return dt if dt.tzinfo is not None else dt.replace(tzinfo=datetime.timezone.utc)
+
+
+def _parse_meter(value):
+    try:
+        resource, meter_point, serial = value.split(":")
+        return MeterConfig(ResourceType(resource), meter_point, serial)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected <electricity|gas>:<mpan or mprn>:<serial>, got {value!r}")
+
+
+def _parse_tariff(value):
+    try:
+        resource, product_code, region = value.split(":")
+        # Tariff URLs do not depend on the meter, so placeholder identifiers stand in for it.
+        return MeterConfig(ResourceType(resource), "-", "-", product_code=product_code, region=region, key=f"{resource}-{product_code}-{region}")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected <electricity|gas>:<product code>:<region>, got {value!r}")
+
+
+def _arguments(argv):
+    parser = argparse.ArgumentParser(
+        prog="octopus-export",
+        description="Exports Octopus Energy consumption or tariff rates to chunked Parquet or gzip CSV files. "
+                    "Re-running an export resumes from the last interval written."
+    )
+    parser.add_argument("--api-key", default=os.environ.get("OCTOPUS_API_KEY"), help="API key. Default: environ['OCTOPUS_API_KEY']")
+    parser.add_argument("--from", dest="period_from", type=_parse_time, required=True, help="Start of the period, e.g. 2021-01-01 or 2021-01-01T00:00:00Z")
+    parser.add_argument("--to", dest="period_to", type=_parse_time, help="End of the period. Default: now")
+    parser.add_argument("--output", "-o", required=True, help="Directory to which each dataset's directory is written.")
+    parser.add_argument("--format", choices=FORMATS, default="parquet")
+    parser.add_argument("--rows-per-file", type=int, default=DEFAULT_ROWS_PER_FILE)
+    parser.add_argument("--workers", type=int, default=4, help="Datasets exported concurrently.")
+
+    datasets = parser.add_subparsers(dest="dataset", required=True)
+    consumption = datasets.add_parser("consumption", help="Half-hourly consumption of one or more meters.")
+    consumption.add_argument("--meter", type=_parse_meter, action="append", required=True, help="<electricity|gas>:<mpan or mprn>:<serial>. May be repeated.")
+    tariffs = datasets.add_parser("tariffs", help="Rates of one or more tariffs.")
+    tariffs.add_argument("--tariff", type=_parse_tariff, action="append", required=True, help="<electricity|gas>:<product code>:<region>. May be repeated.")
+    tariffs.add_argument("--charge", type=ChargeType, action="append", help="Charge type, e.g. standard-unit-rates. May be repeated. Default: standard-unit-rates and standing-charges")
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """
+    Entry point of the octopus-export command.
+
+    e.g.
+
+        octopus-export --from 2020-01-01 --to 2023-01-01 -o exports consumption --meter electricity:1200000000001:21L0000001 --meter gas:3000000001:G4P00000001
+        octopus-export --from 2022-01-01 -o exports --format csv tariffs --tariff electricity:AGILE-18-02-21:C
+
+    :param list argv: (optional) Command line arguments. Default: sys.argv[1:]
+    :returns: The exit status, 1 if any dataset failed.
+    :rtype: int
+    """
+    args = _arguments(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    period_to = args.period_to or datetime.datetime.now(datetime.timezone.utc)
+
+    if args.dataset == "consumption":
+        fleet = FleetClient(args.meter, api_key=args.api_key, max_workers=args.workers)
+
+        def export(client, meter):
+            directory = os.path.join(args.output, "consumption", f"{meter.resource_type.value}-{meter.meter_point}-{meter.serial}")
+            return export_consumption(client, meter.resource_type, args.period_from, period_to, directory, args.format, rows_per_file=args.rows_per_file)
+    else:
+        fleet = FleetClient(args.tariff, api_key=args.api_key, max_workers=args.workers)
+        charges = args.charge or [ChargeType.STANDARD_UNIT_RATES, ChargeType.STANDING_CHARGES]
+
+        def export(client, tariff):
+            return {
+                charge: export_tariffs(client, tariff.resource_type, charge, args.period_from, period_to, os.path.join(args.output, "tariffs", f"{tariff.key}-{charge.value}"), args.format, rows_per_file=args.rows_per_file)
+                for charge in charges
+            }
+
+    failed = False
+    for key, result in fleet.map(export).items():
+        if result.ok:
+            logger.info(f"{key}: {result.data} rows")
+        else:
+            failed = True
+            logger.error(f"{key}: export failed: {result.error!r}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
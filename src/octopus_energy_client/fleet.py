@@ -0,0 +1,184 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait
+from .client import OctopusEnergy
+from .enums import Aggregate
+from .pagination import is_paginated
+from .session import create_session
+from .series import ConsumptionSeries
+
+
+logger = logging.getLogger(__name__)
+
+
+class MeterConfig:
+    """
+    Configuration of a single electricity or gas meter in a fleet.
+    """
+    def __init__(self, resource_type, meter_point, serial, product_code=None, region=None, tariff_prefix=None, key=None):
+        """
+        Initialiser for the MeterConfig class.
+
+        :param ResourceType resource_type: The Type of the meter, e.g. ResourceType.ELECTRICITY.
+        :param str meter_point: The MPAN (electricity) or MPRN (gas) of the meter point.
+        :param str serial: The serial number of the meter.
+        :param str product_code: (optional) The product code of the meter's tariff.
+        :param str region: (optional) The region of the meter's tariff.
+        :param str tariff_prefix: (optional) The tariff code prefix, e.g. "E-1R-". Default: the OctopusEnergy default for the resource.
+        :param key: (optional) Identifier used to key results. Default: "<resource>:<meter_point>:<serial>"
+        """
+        self.resource_type = resource_type
+        self.meter_point = meter_point
+        self.serial = serial
+        self.product_code = product_code
+        self.region = region
+        self.tariff_prefix = tariff_prefix
+        self.key = key if key is not None else f"{resource_type.value}:{meter_point}:{serial}"
+
+    def __repr__(self):
+        return f"MeterConfig({self.key!r})"
+
+    def client_kwargs(self):
+        """
+        Keyword arguments configuring an OctopusEnergy client for this meter.
+
+        OctopusEnergy requires both an electricity and a gas meter, so the identifiers of this meter are used for
+        both and only those matching its resource type are ever requested.
+
+        :rtype: dict
+        """
+        kwargs = {}
+        for resource in ("electricity", "gas"):
+            kwargs[f"{resource}_serial"] = self.serial
+            kwargs[f"{resource}_{'mpan' if resource == 'electricity' else 'mprn'}"] = self.meter_point
+            kwargs[f"{resource}_product_code"] = self.product_code
+            kwargs[f"{resource}_region"] = self.region
+            if self.tariff_prefix is not None:
+                kwargs[f"{resource}_tariff_prefix"] = self.tariff_prefix
+
+        return kwargs
+
+
+class MeterResult:
+    """
+    The outcome of a request for one meter of a fleet: either its data or the error which prevented it.
+    """
+    __slots__ = ("meter", "data", "error")
+
+    def __init__(self, meter, data=None, error=None):
+        self.meter = meter
+        self.data = data
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        return f"MeterResult({self.meter.key!r}, ok={self.ok})"
+
+
+class FleetClient:
+    """
+    Retrieves data for many meters concurrently.
+
+    Every meter shares one connection pool and requests run on a single pool of max_workers threads, which caps the
+    number of requests in flight across the whole fleet. Each meter's request is isolated: an error or timeout is
+    recorded in its MeterResult without affecting the others.
+
+    e.g.
+
+        fleet = FleetClient([
+            MeterConfig(ResourceType.ELECTRICITY, "1200000000001", "21L0000001"),
+            MeterConfig(ResourceType.GAS, "3000000001", "G4P00000001"),
+        ], max_workers=16)
+
+        for key, result in fleet.get_consumption(period_from, period_to).items():
+            if result.ok:
+                ...
+    """
+    def __init__(self, meters, api_key=None, session=None, max_workers=8, timeout=30, **client_kwargs):
+        """
+        Initialiser for the FleetClient class.
+
+        :param list meters: MeterConfig for each meter in the fleet.
+        :param str api_key: (optional) The customer API key. Default: environ['OCTOPUS_API_KEY']
+        :param requests.Session session: (optional) Session shared by every meter. Default: create_session(pool_maxsize=max_workers)
+        :param int max_workers: (optional, default 8) Maximum number of requests in flight across the fleet.
+        :param float timeout: (optional, default 30) Seconds to wait for the server before giving up on a request.
+        :param client_kwargs: (optional) Further arguments for each meter's OctopusEnergy client, e.g. cache or store.
+            The meter's own identifiers and tariff (see MeterConfig.client_kwargs) take precedence over these, as do
+            api_key, session, timeout and max_workers, which is always 1.
+        """
+        self.meters = list(meters)
+        self.max_workers = max_workers
+        self.session = session or create_session(pool_maxsize=max_workers)
+
+        # Each client fetches its own pages sequentially so that max_workers bounds the whole fleet.
+        fleet_kwargs = {"api_key": api_key, "session": self.session, "timeout": timeout, "max_workers": 1}
+        self.clients = {
+            meter.key: OctopusEnergy(**{**client_kwargs, **meter.client_kwargs(), **fleet_kwargs})
+            for meter in self.meters
+        }
+
+    def map(self, fn, deadline=None):
+        """
+        Calls a function for every meter concurrently.
+
+        :param callable fn: Function taking a meter's OctopusEnergy client and its MeterConfig and returning its data.
+        :param float deadline: (optional) Seconds to wait for the whole batch. Meters still running after this are reported with a TimeoutError.
+        :returns: A MeterResult for each meter, keyed by MeterConfig.key.
+        :rtype: dict
+        """
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            futures = {meter.key: executor.submit(fn, self.clients[meter.key], meter) for meter in self.meters}
+            wait(futures.values(), timeout=deadline)
+        finally:
+            executor.shutdown(wait=False)
+
+        results = {}
+        for meter in self.meters:
+            future = futures[meter.key]
+            if not future.done():
+                future.cancel()
+                results[meter.key] = MeterResult(meter, error=TimeoutError(f"{meter.key} did not complete within {deadline}s"))
+            elif future.exception() is not None:
+                logger.warning(f"Request for {meter.key} failed: {future.exception()!r}")
+                results[meter.key] = MeterResult(meter, error=future.exception())
+            else:
+                results[meter.key] = MeterResult(meter, data=future.result())
+
+        return results
+
+    def get_meter_points(self, deadline=None):
+        """
+        Retrieves information about every meter point. See OctopusEnergy.get_meter_point.
+
+        :param float deadline: (optional) Seconds to wait for the whole batch.
+        :returns: A MeterResult for each meter, keyed by MeterConfig.key.
+        :rtype: dict
+        """
+        return self.map(lambda client, meter: client.get_meter_point(meter.resource_type), deadline)
+
+    def get_consumption(self, period_from, period_to, page_size=25000, group_by=Aggregate.HALF_HOURLY, as_series=False, deadline=None):
+        """
+        Retrieves every page of consumption data for every meter. See OctopusEnergy.get_consumption_for_period.
+
+        Error responses from the API, such as an unknown meter, are reported as a ValueError in the meter's result.
+
+        :param datetime.datetime period_from: The earliest time period for which consumption data should be retrieved.
+        :param datetime.datetime period_to: The latest time period for which consumption data should be retrieved.
+        :param int page_size: (optional, default 25000) Page size of each request.
+        :param Aggregate group_by: (optional, default Aggregate.HALF_HOURLY) Aggregates consumption over a speficied time period.
+        :param bool as_series: (optional, default False) Return each meter's consumption as a ConsumptionSeries.
+        :param float deadline: (optional) Seconds to wait for the whole batch.
+        :returns: A MeterResult for each meter, keyed by MeterConfig.key.
+        :rtype: dict
+        """
+        def fetch(client, meter):
+            data = client.get_consumption_for_period(meter.resource_type, period_from, period_to, page_size=page_size, group_by=group_by, all_pages=True)
+            if not is_paginated(data):
+                raise ValueError(f"Consumption request for {meter.key} failed: {data}")
+            return ConsumptionSeries.from_response(data) if as_series else data
+
+        return self.map(fetch, deadline)
@@ -0,0 +1,111 @@
+import datetime
+import importlib
+import importlib.util
+import pytz
+
+
+class LazyModule:
+    """
+    Stands in for an optional module which is only imported when one of its attributes is first used, so that
+    importing the package does not pay for it. Attributes are cached on first use.
+    """
+    def __init__(self, name):
+        self.__name__ = name
+
+    def __getattr__(self, attr):
+        value = getattr(importlib.import_module(self.__name__), attr)
+        setattr(self, attr, value)
+        return value
+
+    def __repr__(self):
+        return f"LazyModule({self.__name__!r})"
+
+
+# numpy when it is installed, imported on first use, otherwise None.
+np = LazyModule("numpy") if importlib.util.find_spec("numpy") is not None else None
+
+
+# Octopus Energy bills and aggregates by UK local time.
+LONDON = pytz.timezone("Europe/London")
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+def require_numpy(feature):
+    """
+    Raises an ImportError naming the feature if numpy is not installed.
+
+    :param str feature: Description of the feature which needs numpy.
+    """
+    if np is None:
+        raise ImportError(f"{feature} requires numpy. Install it with `pip install octopus-energy-client[numpy]`.")
+
+
+def local_day_bounds(date, tz=LONDON):
+    """
+    The start and end of a local calendar day.
+
+    Days are 23 or 25 hours long when the clocks change. e.g. datetime.date(2022, 3, 27) =>
+        (datetime.datetime(2022, 3, 27, 0, 0, tzinfo=utc), datetime.datetime(2022, 3, 27, 23, 0, tzinfo=utc))
+
+    :param datetime.date date: The day.
+    :param datetime.tzinfo tz: (optional, default Europe/London) The timezone.
+    :returns: The local midnights starting and ending the day, in UTC.
+    :rtype: (datetime.datetime, datetime.datetime)
+    """
+    start = datetime.datetime.combine(date, datetime.time())
+    end = start + datetime.timedelta(days=1)
+    return tz.localize(start).astimezone(pytz.utc), tz.localize(end).astimezone(pytz.utc)
+
+
+def utc_offset(ts, tz=LONDON):
+    """
+    The UTC offset of a timezone at a point in time.
+
+    :param int ts: Seconds since the epoch.
+    :param datetime.tzinfo tz: (optional, default Europe/London) The timezone.
+    :returns: The offset in seconds, e.g. 3600 during British Summer Time.
+    :rtype: int
+    """
+    return int(datetime.datetime.fromtimestamp(int(ts), tz).utcoffset().total_seconds())
+
+
+def utc_offsets(epochs, tz=LONDON):
+    """
+    The UTC offset of a timezone at each of an array of times, in a single vectorized pass.
+
+    Offsets are looked up at the start and end of each distinct UTC day; only the times on days where those differ,
+    i.e. days with a daylight saving change, are looked up individually.
+
+    :param numpy.ndarray epochs: Times in seconds since the epoch (int64).
+    :param datetime.tzinfo tz: (optional, default Europe/London) The timezone.
+    :returns: The offset of each time in seconds.
+    :rtype: numpy.ndarray
+    """
+    require_numpy("utc_offsets")
+    epochs = np.asarray(epochs, dtype=np.int64)
+    if not len(epochs):
+        return np.zeros(0, dtype=np.int64)
+
+    days, inverse = np.unique(epochs // SECONDS_PER_DAY, return_inverse=True)
+    start = np.array([utc_offset(day * SECONDS_PER_DAY, tz) for day in days], dtype=np.int64)
+    end = np.array([utc_offset((day + 1) * SECONDS_PER_DAY - 1, tz) for day in days], dtype=np.int64)
+
+    offsets = start[inverse]
+    for i in np.flatnonzero(start[inverse] != end[inverse]):
+        offsets[i] = utc_offset(epochs[i], tz)
+
+    return offsets
+
+
+def local_days(epochs, tz=LONDON):
+    """
+    The local calendar day of each of an array of times, as days since 1970-01-01.
+
+    :param numpy.ndarray epochs: Times in seconds since the epoch (int64).
+    :param datetime.tzinfo tz: (optional, default Europe/London) The timezone.
+    :returns: Local days (int64), which can be viewed as dates with .astype("datetime64[D]").
+    :rtype: numpy.ndarray
+    """
+    epochs = np.asarray(epochs, dtype=np.int64)
+    return (epochs + utc_offsets(epochs, tz)) // SECONDS_PER_DAY
@@ -0,0 +1,263 @@
+import re
+import threading
+from urllib.parse import urlsplit
+
+
+# Upper bounds, in seconds, of the latency histogram buckets.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Request phases recorded in latency histograms.
+PHASES = ("dns", "connect", "ttfb", "total", "decode")
+
+_TEMPLATES = (
+    (re.compile(r"/electricity-meter-points/[^/]+"), "/electricity-meter-points/{mpan}"),
+    (re.compile(r"/gas-meter-points/[^/]+"), "/gas-meter-points/{mprn}"),
+    (re.compile(r"/meters/[^/]+"), "/meters/{serial}"),
+    (re.compile(r"/products/[^/]+"), "/products/{product_code}"),
+    (re.compile(r"-tariffs/[^/]+"), "-tariffs/{tariff_code}"),
+)
+
+_connection = threading.local()
+
+
+def url_template(url):
+    """
+    The path of a URL with meter and tariff identifiers replaced by placeholders, for grouping metrics by endpoint.
+
+    e.g. "https://api.octopus.energy/v1/electricity-meter-points/0123456789012/meters/abc1234/consumption?page=2" =>
+         "/v1/electricity-meter-points/{mpan}/meters/{serial}/consumption"
+
+    :param str url: The requested URL.
+    :rtype: str
+    """
+    path = urlsplit(url).path.rstrip("/")
+    for pattern, replacement in _TEMPLATES:
+        path = pattern.sub(replacement, path)
+    return path
+
+
+def start_connection_timing():
+    """
+    Clears the connection timings recorded on the current thread, before making a request.
+    """
+    _connection.dns = None
+    _connection.connect = None
+
+
+def record_connection(dns, connect):
+    """
+    Records the time taken to open a new connection on the current thread. Called by pooled connections.
+
+    :param float dns: Seconds spent resolving the host name.
+    :param float connect: Seconds spent establishing the connection, including any TLS handshake.
+    """
+    _connection.dns = (getattr(_connection, "dns", None) or 0.0) + dns
+    _connection.connect = (getattr(_connection, "connect", None) or 0.0) + connect
+
+
+def connection_timing():
+    """
+    :returns: The (dns, connect) seconds recorded on the current thread since start_connection_timing, or (None, None) if a pooled connection was reused.
+    :rtype: tuple
+    """
+    return getattr(_connection, "dns", None), getattr(_connection, "connect", None)
+
+
+class RequestEvent:
+    """
+    Measurements of a single API request, passed to each of a client's hooks once the request completes.
+
+    Times are in seconds. dns and connect are None when a pooled connection was reused, ttfb is the time from
+    starting the request until the response headers arrived (including connecting and any retries), total also
+    includes reading the body, and decode is the time spent parsing the json. error is set, and status is None,
+    when the request raised an exception.
+    """
+    __slots__ = ("url", "template", "status", "bytes", "dns", "connect", "ttfb", "total", "decode", "retries", "error")
+
+    def __init__(self, url, status=None, bytes=None, dns=None, connect=None, ttfb=None, total=None, decode=None, retries=0, error=None):
+        self.url = url
+        self.template = url_template(url)
+        self.status = status
+        self.bytes = bytes
+        self.dns = dns
+        self.connect = connect
+        self.ttfb = ttfb
+        self.total = total
+        self.decode = decode
+        self.retries = retries
+        self.error = error
+
+    def __repr__(self):
+        return f"RequestEvent({self.template!r}, status={self.status}, total={self.total})"
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class Histogram:
+    """
+    Cumulative histogram of observed values, as used by Prometheus.
+    """
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def percentile(self, fraction):
+        """
+        Estimates a percentile as the upper bound of the bucket containing it.
+
+        :param float fraction: e.g. 0.95 for the 95th percentile.
+        :returns: The estimate, infinity if it is above every bucket, or None if nothing has been observed.
+        :rtype: float
+        """
+        if not self.count:
+            return None
+        for bound, count in zip(self.buckets, self.counts):
+            if count >= fraction * self.count:
+                return bound
+        return float("inf")
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+class MetricsCollector:
+    """
+    Hook which aggregates RequestEvents into per-endpoint counters and latency histograms.
+
+    Metrics can be exported as a dictionary with snapshot(), or in the Prometheus text exposition format with
+    to_prometheus() for serving to a scraper.
+
+    e.g.
+
+        metrics = MetricsCollector()
+        octopus_client = OctopusEnergy(hooks=[metrics])
+        ...
+        metrics.snapshot()["/v1/electricity-meter-points/{mpan}/meters/{serial}/consumption"]["latency"]["total"]["p95"]
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        :param tuple buckets: (optional) Upper bounds of the latency histogram buckets, in seconds.
+        """
+        self.buckets = tuple(buckets)
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        with self._lock:
+            endpoint = self._endpoints.get(event.template)
+            if endpoint is None:
+                endpoint = self._endpoints[event.template] = {
+                    "requests": {},
+                    "errors": {},
+                    "bytes": 0,
+                    "retries": 0,
+                    "latency": {phase: Histogram(self.buckets) for phase in PHASES},
+                }
+
+            if event.error is not None:
+                endpoint["errors"][event.error] = endpoint["errors"].get(event.error, 0) + 1
+            else:
+                endpoint["requests"][event.status] = endpoint["requests"].get(event.status, 0) + 1
+
+            endpoint["bytes"] += event.bytes or 0
+            endpoint["retries"] += event.retries
+            for phase in PHASES:
+                value = getattr(event, phase)
+                if value is not None:
+                    endpoint["latency"][phase].observe(value)
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+    def snapshot(self):
+        """
+        Current metrics for each endpoint template.
+
+        e.g. {'/v1/industry/grid-supply-points': {'requests': {200: 3}, 'errors': {}, 'bytes': 171, 'retries': 0,
+              'latency': {'total': {'count': 3, 'sum': 0.061, 'mean': 0.020, 'p50': 0.025, 'p95': 0.025, 'p99': 0.025}, ...}}}
+
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                template: {
+                    "requests": dict(endpoint["requests"]),
+                    "errors": dict(endpoint["errors"]),
+                    "bytes": endpoint["bytes"],
+                    "retries": endpoint["retries"],
+                    "latency": {
+                        phase: {
+                            "count": histogram.count,
+                            "sum": histogram.sum,
+                            "mean": histogram.sum / histogram.count if histogram.count else None,
+                            "p50": histogram.percentile(0.5),
+                            "p95": histogram.percentile(0.95),
+                            "p99": histogram.percentile(0.99),
+                        }
+                        for phase, histogram in endpoint["latency"].items()
+                    },
+                }
+                for template, endpoint in self._endpoints.items()
+            }
+
+    def to_prometheus(self, prefix="octopus_energy"):
+        """
+        Current metrics in the Prometheus text exposition format.
+
+        :param str prefix: (optional, default "octopus_energy") Prefix of every metric name.
+        :rtype: str
+        """
+        lines = [
+            f"# HELP {prefix}_requests_total Completed requests to the Octopus Energy API.",
+            f"# TYPE {prefix}_requests_total counter",
+        ]
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+
+            for template, endpoint in endpoints:
+                for status, count in sorted(endpoint["requests"].items(), key=lambda item: str(item[0])):
+                    lines.append(f"{prefix}_requests_total{_labels(endpoint=template, status=status)} {count}")
+
+            lines += [f"# HELP {prefix}_request_errors_total Requests which raised an exception.", f"# TYPE {prefix}_request_errors_total counter"]
+            for template, endpoint in endpoints:
+                for error, count in sorted(endpoint["errors"].items()):
+                    lines.append(f"{prefix}_request_errors_total{_labels(endpoint=template, error=error)} {count}")
+
+            lines += [f"# HELP {prefix}_request_retries_total Retries of rate limited and failed requests.", f"# TYPE {prefix}_request_retries_total counter"]
+            for template, endpoint in endpoints:
+                lines.append(f"{prefix}_request_retries_total{_labels(endpoint=template)} {endpoint['retries']}")
+
+            lines += [f"# HELP {prefix}_response_bytes_total Bytes of response bodies received.", f"# TYPE {prefix}_response_bytes_total counter"]
+            for template, endpoint in endpoints:
+                lines.append(f"{prefix}_response_bytes_total{_labels(endpoint=template)} {endpoint['bytes']}")
+
+            lines += [f"# HELP {prefix}_request_duration_seconds Duration of each phase of a request.", f"# TYPE {prefix}_request_duration_seconds histogram"]
+            for template, endpoint in endpoints:
+                for phase, histogram in endpoint["latency"].items():
+                    if not histogram.count:
+                        continue
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        lines.append(f"{prefix}_request_duration_seconds_bucket{_labels(endpoint=template, phase=phase, le=bound)} {count}")
+                    lines.append(f"{prefix}_request_duration_seconds_bucket{_labels(endpoint=template, phase=phase, le='+Inf')} {histogram.count}")
+                    lines.append(f"{prefix}_request_duration_seconds_sum{_labels(endpoint=template, phase=phase)} {histogram.sum}")
+                    lines.append(f"{prefix}_request_duration_seconds_count{_labels(endpoint=template, phase=phase)} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,101 @@
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+
+def page_count(count, page_size):
+    """
+    Calculates the number of pages needed to return all results.
+
+    :param int count: The total number of results, as reported by the API's "count" field.
+    :param int page_size: The number of results per page.
+    :returns: The number of pages, at least 1.
+    :rtype: int
+    """
+    return max(1, math.ceil((count or 0) / page_size))
+
+
+def is_paginated(data):
+    """
+    Checks whether a parsed API response is a page of results, rather than a single object or an error.
+
+    :param dict data: A parsed API response.
+    :rtype: bool
+    """
+    return isinstance(data, dict) and "results" in data and "count" in data
+
+
+def merge_pages(pages):
+    """
+    Merges a sequence of pages, in page order, into a single response containing every result.
+
+    e.g. [{"count": 3, "next": "...?page=2", "previous": None, "results": [a, b]}, {"count": 3, ..., "results": [c]}] =>
+         {"count": 3, "next": None, "previous": None, "results": [a, b, c]}
+
+    :param list pages: Parsed API responses, ordered by page number.
+    :returns: A single response containing the results of all pages.
+    :rtype: dict
+    :raises ValueError: If any page is not a page of results, e.g. an error response.
+    """
+    results = []
+    for number, page in enumerate(pages, start=1):
+        if not is_paginated(page):
+            raise ValueError(f"Page {number} did not contain results: {page}")
+        results.extend(page["results"])
+
+    return {
+        "count": pages[0]["count"] if pages else len(results),
+        "next": None,
+        "previous": None,
+        "results": results
+    }
+
+
+def iter_pages(get_data, url, prefetch=True):
+    """
+    Yields each page of a paginated endpoint by following the "next" links.
+
+    When prefetch is enabled the next page is requested on a background thread while the current page is being
+    consumed, so at most two pages are held in memory at once.
+
+    :param callable get_data: Function which requests a URL and returns the parsed response, e.g. OctopusEnergy.get_data.
+    :param str url: The URL of the first page.
+    :param bool prefetch: (optional, default True) Request the next page in the background.
+    :returns: A generator of parsed pages.
+    :rtype: generator
+    :raises ValueError: If a page is not a page of results, e.g. an error response.
+    """
+    def checked(page):
+        if not is_paginated(page):
+            raise ValueError(f"Page did not contain results: {page}")
+        return page
+
+    if not prefetch:
+        while url:
+            page = checked(get_data(url))
+            url = page.get("next")
+            yield page
+        return
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    future = executor.submit(get_data, url)
+    try:
+        while future is not None:
+            page = checked(future.result())
+            future = executor.submit(get_data, page["next"]) if page.get("next") else None
+            yield page
+    finally:
+        if future is not None:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+def iter_results(pages):
+    """
+    Yields the individual results from a sequence of pages.
+
+    :param iterable pages: Parsed pages, e.g. from iter_pages.
+    :returns: A generator of result records.
+    :rtype: generator
+    """
+    for page in pages:
+        yield from page["results"]
@@ -0,0 +1,180 @@
+from .enums import Aggregate
+from .series import ConsumptionSeries
+from .util import HALF_HOUR, OPEN_ENDED, to_timestamp, from_timestamp, missing_ranges, parse_timestamps
+
+
+# Maximum page sizes accepted by the API.
+MAX_CONSUMPTION_ROWS = 25000
+MAX_TARIFF_ROWS = 1500
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+# Length of a consumption interval for the aggregations whose intervals do not depend on local time.
+AGGREGATE_INTERVALS = {
+    Aggregate.HALF_HOURLY: HALF_HOUR,
+    Aggregate.HOURLY: 2 * HALF_HOUR,
+}
+
+
+def plan_ranges(period_from, period_to, max_rows, interval=HALF_HOUR, align=SECONDS_PER_DAY):
+    """
+    Splits a period into consecutive sub-ranges which each contain at most max_rows intervals.
+
+    Sub-ranges are a whole number of align seconds long and, other than the first and last, start and end on a
+    multiple of align since the epoch, i.e. on UTC midnight by default. The number of sub-ranges is therefore the
+    minimum possible for whole-day chunks: a year of half-hourly consumption at 25,000 rows is one 520 day chunk,
+    and a year of half-hourly rates at 1,500 rows is 12 chunks of 31 days.
+
+    e.g. plan_ranges(2022-01-01T12:00Z, 2022-01-04T00:00Z, max_rows=48) =>
+        [(2022-01-01T12:00Z, 2022-01-02T00:00Z), (2022-01-02T00:00Z, 2022-01-03T00:00Z), (2022-01-03T00:00Z, 2022-01-04T00:00Z)]
+
+    :param datetime.datetime period_from: The start of the period.
+    :param datetime.datetime period_to: The end of the period.
+    :param int max_rows: The maximum number of intervals in each sub-range.
+    :param int interval: (optional, default HALF_HOUR) The length of each interval in seconds.
+    :param int align: (optional, default 1 day) Sub-range lengths are a multiple of this many seconds.
+    :returns: A list of (period_from, period_to) tuples of UTC datetimes, in order.
+    :rtype: list
+    :raises ValueError: If max_rows intervals do not fill a single align period.
+    """
+    step = (max_rows * interval) // align * align
+    if step <= 0:
+        raise ValueError(f"{max_rows} rows of {interval}s do not fill a {align}s chunk")
+
+    start, end = to_timestamp(period_from), to_timestamp(period_to)
+    ranges = []
+    while start < end:
+        # Boundaries are aligned so that overlapping requests produce identical, cacheable chunks.
+        chunk_end = min(end, start - start % align + step)
+        ranges.append((from_timestamp(start), from_timestamp(chunk_end)))
+        start = chunk_end
+
+    return ranges
+
+
+def date_runs(dates, merge_gap=7):
+    """
+    Groups dates into as few runs of consecutive days as possible.
+
+    Runs separated by at most merge_gap missing days are merged, as requesting the extra days costs less than
+    another request.
+
+    e.g. [2022-01-01, 2022-01-02, 2022-01-05, 2022-03-01] => [(2022-01-01, 2022-01-05), (2022-03-01, 2022-03-01)]
+
+    :param iterable dates: The dates, in any order and possibly repeated.
+    :param int merge_gap: (optional, default 7) Maximum number of missing days between merged runs.
+    :returns: A list of (first, last) tuples of dates, in order.
+    :rtype: list
+    """
+    runs = []
+    for date in sorted(set(dates)):
+        if runs and (date - runs[-1][1]).days <= merge_gap + 1:
+            runs[-1] = (runs[-1][0], date)
+        else:
+            runs.append((date, date))
+
+    return runs
+
+
+def repair_ranges(gaps, merge_gap=48, max_rows=MAX_CONSUMPTION_ROWS, interval=HALF_HOUR):
+    """
+    Plans the requests which fill a set of gaps in consumption data.
+
+    Gaps separated by at most merge_gap present intervals are merged into one request, as refetching a few
+    intervals costs less than another request, and ranges longer than max_rows intervals are split with
+    plan_ranges so that each is a single page. A year with a missing interval every few days is therefore
+    repaired with a handful of small requests.
+
+    e.g. with merge_gap=2, [(00:30, 01:00), (01:30, 02:00), (05:00, 06:00)] =>
+        [(00:30, 02:00), (05:00, 06:00)]
+
+    :param list gaps: (start, end) tuples of datetimes, in order, e.g. from consumption_gaps.
+    :param int merge_gap: (optional, default 48) Maximum number of present intervals between merged gaps.
+    :param int max_rows: (optional, default 25000) The maximum number of intervals in each range.
+    :param int interval: (optional, default HALF_HOUR) The length of each interval in seconds.
+    :returns: A list of (period_from, period_to) tuples of UTC datetimes, in order.
+    :rtype: list
+    """
+    merged = []
+    for start, end in gaps:
+        start, end = to_timestamp(start), to_timestamp(end)
+        if merged and start - merged[-1][1] <= merge_gap * interval:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+
+    return [
+        chunk
+        for start, end in merged
+        for chunk in plan_ranges(from_timestamp(start), from_timestamp(end), max_rows, interval)
+    ]
+
+
+def stitch(pages, key, reverse=False):
+    """
+    Combines the results of several pages, dropping records repeated on chunk boundaries and sorting by time.
+
+    :param list pages: Parsed pages of results.
+    :param str key: The field holding each record's start time, e.g. "interval_start" or "valid_from".
+    :param bool reverse: (optional, default False) Sort the newest record first.
+    :returns: The unique records, ordered by the key.
+    :rtype: list
+    """
+    records = [record for page in pages for record in page["results"]]
+    starts = parse_timestamps([record[key] for record in records], default=-OPEN_ENDED)
+
+    unique = {}
+    for start, record in zip(starts, records):
+        unique.setdefault(start, record)
+
+    return [unique[start] for start in sorted(unique, reverse=reverse)]
+
+
+def consumption_gaps(records, period_from, period_to, interval=HALF_HOUR):
+    """
+    Finds the intervals of a period which have no consumption record.
+
+    :param records: Consumption records, a parsed consumption response or a ConsumptionSeries.
+    :param datetime.datetime period_from: The start of the period.
+    :param datetime.datetime period_to: The end of the period.
+    :param int interval: (optional, default HALF_HOUR) The length of each interval in seconds.
+    :returns: A list of (start, end) tuples of UTC datetimes.
+    :rtype: list
+    """
+    if isinstance(records, ConsumptionSeries):
+        starts = records.interval_start
+    else:
+        starts = parse_timestamps([record["interval_start"] for record in (records["results"] if isinstance(records, dict) else records)])
+    return [
+        (from_timestamp(start), from_timestamp(end))
+        for start, end in missing_ranges(starts, to_timestamp(period_from), to_timestamp(period_to), interval)
+    ]
+
+
+def rate_gaps(records, period_from, period_to):
+    """
+    Finds the parts of a period which are not covered by any tariff window.
+
+    :param list records: Tariff records.
+    :param datetime.datetime period_from: The start of the period.
+    :param datetime.datetime period_to: The end of the period.
+    :returns: A list of (start, end) tuples of UTC datetimes.
+    :rtype: list
+    """
+    windows = sorted(zip(
+        parse_timestamps([record["valid_from"] for record in records], default=-OPEN_ENDED),
+        parse_timestamps([record["valid_to"] for record in records])
+    ))
+
+    start, end = to_timestamp(period_from), to_timestamp(period_to)
+    gaps = []
+    covered = start
+    for valid_from, valid_to in windows:
+        if valid_from > covered and covered < end:
+            gaps.append((covered, min(valid_from, end)))
+        covered = max(covered, valid_to)
+
+    if covered < end:
+        gaps.append((covered, end))
+
+    return [(from_timestamp(gap_start), from_timestamp(gap_end)) for gap_start, gap_end in gaps]
@@ -0,0 +1,206 @@
+import asyncio
+import threading
+import time
+from .transport import retry_delay
+
+
+# Status codes which signal that the API is being called too quickly.
+THROTTLE_STATUSES = (429, 503)
+
+
+class RateLimiter:
+    """
+    Adaptive token bucket limiting the rate of requests to the API.
+
+    Each request takes a token; tokens are replenished at the current rate, up to a burst of requests. When the API
+    throttles a request (429 or 503) the rate is cut by decrease_factor and no caller proceeds until any Retry-After
+    has passed, after which each successful request raises the rate by recovery until it reaches max_rate. Throttled
+    responses within cooldown seconds of the last cut count as one event, as they usually come from requests which
+    were already in flight.
+
+    A limiter is safe to share between threads, event loops and clients: callers reserve their slot under a lock
+    and then wait outside it, with time.sleep in acquire() or asyncio.sleep in acquire_async(). Waiters check
+    again when they wake, and wait longer if a Retry-After received meanwhile has not yet passed.
+
+    Only the first attempt of each request waits on the limiter. Retries made inside a transport, e.g. by the
+    urllib3 Retry of a create_session session or by UrllibTransport, are not delayed by it, although their
+    statuses are reported to it afterwards. AsyncOctopusEnergy retries through the limiter. With a transport
+    which does not retry, e.g. a create_session(max_retries=0) session, every request waits on the limiter and
+    throttled responses are returned to the caller.
+
+    e.g.
+
+        limiter = shared_rate_limiter()
+        octopus_client = OctopusEnergy(rate_limiter=limiter)
+        async_client = AsyncOctopusEnergy(rate_limiter=limiter)
+    """
+    def __init__(self, rate=10.0, burst=10, min_rate=0.5, max_rate=20.0, decrease_factor=0.5, recovery=0.1, cooldown=1.0, clock=time.monotonic):
+        """
+        Initialiser for the RateLimiter class.
+
+        :param float rate: (optional, default 10) Initial rate in requests per second.
+        :param int burst: (optional, default 10) Maximum number of requests which can be made at once after a quiet period.
+        :param float min_rate: (optional, default 0.5) The rate is never cut below this.
+        :param float max_rate: (optional, default 20) The rate never recovers above this.
+        :param float decrease_factor: (optional, default 0.5) Multiplier applied to the rate when a request is throttled.
+        :param float recovery: (optional, default 0.1) Requests per second added to the rate after each successful request.
+        :param float cooldown: (optional, default 1) Seconds after a cut in which further throttled responses do not cut the rate again.
+        :param callable clock: (optional, default time.monotonic) Function returning the current time in seconds.
+        """
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.decrease_factor = decrease_factor
+        self.recovery = recovery
+        self.cooldown = cooldown
+        self.clock = clock
+        self.throttled = 0
+        self._rate = min(max(rate, min_rate), max_rate)
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._last_decrease = None
+        self._blocked_until = None
+        self._waiting = 0
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self):
+        """
+        The current rate in requests per second.
+        """
+        with self._lock:
+            return self._rate
+
+    @property
+    def waiting(self):
+        """
+        The number of callers currently waiting for a token.
+        """
+        with self._lock:
+            return self._waiting
+
+    def _blocked_for(self, now):
+        return 0.0 if self._blocked_until is None else max(0.0, self._blocked_until - now)
+
+    def _refill(self, now):
+        self._tokens = min(float(self.burst), self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def reserve(self):
+        """
+        Takes a token, without waiting for it.
+
+        :returns: Seconds the caller must wait before making its request.
+        :rtype: float
+        """
+        with self._lock:
+            now = self.clock()
+            self._refill(now)
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self._rate, self._blocked_for(now))
+
+    def blocked_for(self):
+        """
+        :returns: Seconds until the latest Retry-After received has passed, or 0.
+        :rtype: float
+        """
+        with self._lock:
+            return self._blocked_for(self.clock())
+
+    def acquire(self):
+        """
+        Waits for a token, blocking the current thread.
+        """
+        delay = self.reserve()
+        if delay <= 0:
+            return
+
+        with self._lock:
+            self._waiting += 1
+        try:
+            while delay > 0:
+                time.sleep(delay)
+                delay = self.blocked_for()
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+    async def acquire_async(self):
+        """
+        Waits for a token without blocking the event loop.
+        """
+        delay = self.reserve()
+        if delay <= 0:
+            return
+
+        with self._lock:
+            self._waiting += 1
+        try:
+            while delay > 0:
+                await asyncio.sleep(delay)
+                delay = self.blocked_for()
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+    def update(self, status, retry_after=None):
+        """
+        Adapts the rate to the response to a request.
+
+        :param int status: The HTTP status of the response, or None if no response was received.
+        :param str retry_after: (optional) The value of the response's Retry-After header.
+        """
+        if status is None:
+            return
+
+        with self._lock:
+            now = self.clock()
+            self._refill(now)
+
+            if status not in THROTTLE_STATUSES:
+                if status < 500:
+                    self._rate = min(self.max_rate, self._rate + self.recovery)
+                return
+
+            self.throttled += 1
+            if self._last_decrease is None or now - self._last_decrease >= self.cooldown:
+                self._rate = max(self.min_rate, self._rate * self.decrease_factor)
+                self._last_decrease = now
+
+            # Stop any burst immediately, and make every caller wait out the Retry-After. The Retry-After is a floor
+            # rather than added to any wait already owed, so throttled responses to concurrent requests, which
+            # usually carry the same Retry-After, do not stack their delays.
+            self._tokens = min(self._tokens, 0.0)
+            if retry_after is not None:
+                delay = retry_delay(retry_after, 1, 0)
+                self._tokens = min(self._tokens, -delay * self._rate)
+                self._blocked_until = max(self._blocked_until or now, now + delay)
+
+    def stats(self):
+        """
+        Limiter state.
+
+        :returns: A dictionary of rate, waiting and throttled.
+        :rtype: dict
+        """
+        with self._lock:
+            return {"rate": self._rate, "waiting": self._waiting, "throttled": self.throttled}
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_rate_limiter(**kwargs):
+    """
+    The process-wide RateLimiter, for sharing between every client in the process.
+
+    :param kwargs: (optional) Arguments for RateLimiter, used only when the shared limiter is first created.
+    :rtype: RateLimiter
+    """
+    global _shared
+
+    with _shared_lock:
+        if _shared is None:
+            _shared = RateLimiter(**kwargs)
+        return _shared
@@ -0,0 +1,192 @@
+import datetime
+from array import array
+from bisect import bisect_left, bisect_right
+from .series import RateSeries
+from .localtime import np, require_numpy
+from .util import to_timestamp
+
+
+def lookup_rates(valid_from, valid_to, values, times):
+    """
+    Finds the value of the rate window covering each time, in a single vectorized pass.
+
+    Where windows overlap, the one which started most recently applies.
+
+    :param numpy.ndarray valid_from: Window start times in seconds since the epoch, ascending.
+    :param numpy.ndarray valid_to: Window end times in seconds since the epoch.
+    :param numpy.ndarray values: The value of each window.
+    :param numpy.ndarray times: The times to look up, in seconds since the epoch.
+    :returns: The value at each time, or NaN where no window covers it.
+    :rtype: numpy.ndarray
+    """
+    result = np.full(len(times), np.nan)
+    if not len(valid_from):
+        return result
+
+    index = np.searchsorted(valid_from, times, side="right") - 1
+    clipped = np.clip(index, 0, None)
+    covered = (index >= 0) & (times < valid_to[clipped])
+    result[covered] = values[clipped[covered]]
+    return result
+
+
+class RateIndex:
+    """
+    Index answering "what was the rate at time t" with a binary search, however many windows it holds.
+
+    Tariff windows are flattened into disjoint segments, each holding the value of the window which started most
+    recently among those covering it. An open-ended window (valid_to of null) therefore applies up to the start of
+    the next window, and resumes after any shorter window which started later. A point lookup bisects the segment
+    starts, and a batch lookup does the same for every time at once with NumPy.
+
+    Windows can be added at any time. Those starting after every window already held, such as newly published
+    Agile prices, only touch the last few segments, so the index never needs rebuilding.
+
+    e.g.
+
+        index = RateIndex(octopus_client.get_tariff_data(ResourceType.ELECTRICITY, ChargeType.STANDARD_UNIT_RATES, period_from, period_to, page_size=1500))
+        index.rate_at("2022-01-01T17:30:00Z")
+        index.lookup(consumption.to_numpy()["interval_start"])
+        index.extend(octopus_client.get_tariff_data(ResourceType.ELECTRICITY, ChargeType.STANDARD_UNIT_RATES, period_to, tomorrow))
+    """
+    def __init__(self, rates=None):
+        """
+        Initialiser for the RateIndex class.
+
+        :param rates: (optional) Windows to index, as a RateSeries, a parsed tariff response or a list of tariff records.
+        """
+        self.starts = array("q")
+        self.ends = array("q")
+        self.value_exc_vat = array("d")
+        self.value_inc_vat = array("d")
+        # The valid_from of the window each segment came from, which decides between overlapping windows.
+        self._origins = array("q")
+        self._numpy = None
+
+        if rates is not None:
+            self.extend(rates)
+
+    @classmethod
+    def from_pages(cls, pages):
+        """
+        Builds an index from several pages of tariff data, e.g. from iter_pages.
+
+        :param iterable pages: Parsed tariff responses.
+        :rtype: RateIndex
+        """
+        index = cls()
+        for page in pages:
+            index.extend(page)
+        return index
+
+    def __len__(self):
+        return len(self.starts)
+
+    def extend(self, rates):
+        """
+        Adds windows to the index.
+
+        :param rates: Windows to add, as a RateSeries, a parsed tariff response or a list of tariff records.
+        """
+        if not isinstance(rates, RateSeries):
+            rates = RateSeries.from_response(rates)
+
+        for window in zip(rates.valid_from, rates.valid_to, rates.value_exc_vat, rates.value_inc_vat):
+            self.add(*window)
+
+    def add(self, valid_from, valid_to, value_exc_vat, value_inc_vat):
+        """
+        Adds a single window to the index. Within the window, it replaces any window which started no later.
+
+        :param int valid_from: The start of the window in seconds since the epoch, or -OPEN_ENDED.
+        :param int valid_to: The end of the window in seconds since the epoch, or OPEN_ENDED.
+        :param float value_exc_vat: The value excluding VAT.
+        :param float value_inc_vat: The value including VAT.
+        """
+        if valid_to <= valid_from:
+            return
+
+        # Segments i to j - 1 overlap the window.
+        i = bisect_right(self.ends, valid_from)
+        j = bisect_left(self.starts, valid_to)
+        window = (valid_from, value_exc_vat, value_inc_vat)
+
+        pieces = []
+        covered = valid_from
+        for k in range(i, j):
+            start, end = self.starts[k], self.ends[k]
+            segment = (self._origins[k], self.value_exc_vat[k], self.value_inc_vat[k])
+
+            if start < valid_from:
+                pieces.append((start, valid_from, segment))
+            if start > covered:
+                pieces.append((covered, start, window))
+            overlap_start, overlap_end = max(start, valid_from), min(end, valid_to)
+            pieces.append((overlap_start, overlap_end, window if segment[0] <= valid_from else segment))
+            if end > valid_to:
+                pieces.append((valid_to, end, segment))
+            covered = overlap_end
+
+        if covered < valid_to:
+            pieces.append((covered, valid_to, window))
+
+        merged = []
+        for start, end, source in pieces:
+            if merged and merged[-1][1] == start and merged[-1][2] == source:
+                merged[-1] = (merged[-1][0], end, source)
+            else:
+                merged.append((start, end, source))
+
+        self.starts[i:j] = array("q", [start for start, _, _ in merged])
+        self.ends[i:j] = array("q", [end for _, end, _ in merged])
+        self._origins[i:j] = array("q", [source[0] for _, _, source in merged])
+        self.value_exc_vat[i:j] = array("d", [source[1] for _, _, source in merged])
+        self.value_inc_vat[i:j] = array("d", [source[2] for _, _, source in merged])
+        self._numpy = None
+
+    def rate_at(self, time, include_vat=True):
+        """
+        The rate in force at a point in time.
+
+        :param time: The time, as seconds since the epoch, a datetime or an ISO-8601 string.
+        :param bool include_vat: (optional, default True) Return the value including VAT.
+        :returns: The value of the window covering the time, or None if no window covers it.
+        :rtype: float
+        """
+        time = to_timestamp(time) if isinstance(time, (str, datetime.datetime)) else int(time)
+
+        k = bisect_right(self.starts, time) - 1
+        if k < 0 or time >= self.ends[k]:
+            return None
+        return self.value_inc_vat[k] if include_vat else self.value_exc_vat[k]
+
+    def to_numpy(self):
+        """
+        The segments as NumPy arrays. Requires numpy.
+
+        The arrays are copies, cached until windows are next added, so the index can keep growing while they are in use.
+
+        :returns: A dictionary of start (int64), end (int64), value_exc_vat (float64) and value_inc_vat (float64) arrays.
+        :rtype: dict
+        """
+        require_numpy("RateIndex.to_numpy")
+        if self._numpy is None:
+            self._numpy = {
+                "start": np.array(self.starts, dtype=np.int64),
+                "end": np.array(self.ends, dtype=np.int64),
+                "value_exc_vat": np.array(self.value_exc_vat, dtype=np.float64),
+                "value_inc_vat": np.array(self.value_inc_vat, dtype=np.float64),
+            }
+        return self._numpy
+
+    def lookup(self, times, include_vat=True):
+        """
+        The rate in force at each of many times, in a single vectorized pass. Requires numpy.
+
+        :param numpy.ndarray times: The times in seconds since the epoch.
+        :param bool include_vat: (optional, default True) Return values including VAT.
+        :returns: The value at each time, or NaN where no window covers it.
+        :rtype: numpy.ndarray
+        """
+        arrays = self.to_numpy()
+        return lookup_rates(arrays["start"], arrays["end"], arrays["value_inc_vat" if include_vat else "value_exc_vat"], np.asarray(times, dtype=np.int64))
@@ -0,0 +1,38 @@
+import datetime
+from typing import List, Optional
+import msgspec
+from msgspec import DecodeError, ValidationError
+
+
+class ConsumptionStruct(msgspec.Struct):
+    """
+    A consumption record, as decoded by decoding.decode_results. Requires msgspec.
+    """
+    consumption: float
+    interval_start: datetime.datetime
+    interval_end: datetime.datetime
+
+
+class RateStruct(msgspec.Struct):
+    """
+    A tariff window, as decoded by decoding.decode_results. Requires msgspec.
+    """
+    value_exc_vat: float
+    value_inc_vat: float
+    valid_from: Optional[datetime.datetime] = None
+    valid_to: Optional[datetime.datetime] = None
+
+
+class _ConsumptionPage(msgspec.Struct):
+    results: List[ConsumptionStruct]
+
+
+class _RatePage(msgspec.Struct):
+    results: List[RateStruct]
+
+
+# Decoders of a page of each kind of record, which skip the fields of the page other than its results.
+PAGE_DECODERS = {
+    "consumption": msgspec.json.Decoder(_ConsumptionPage),
+    "rate": msgspec.json.Decoder(_RatePage),
+}
@@ -0,0 +1,197 @@
+from .localtime import np, require_numpy
+from .rates import RateIndex
+from .util import HALF_HOUR, OPEN_ENDED, to_timestamp, from_timestamp
+
+
+def _as_times(values, default, count):
+    if values is None:
+        return np.full(count, default, dtype=np.int64)
+    if not isinstance(values, np.ndarray):
+        values = [to_timestamp(value) if not isinstance(value, (int, np.integer)) else value for value in np.atleast_1d(np.asarray(values, dtype=object))]
+    return np.broadcast_to(np.asarray(values, dtype=np.int64), (count,))
+
+
+class SlotOptimizer:
+    """
+    Finds the cheapest times to run devices against a shared array of half-hourly unit rates, such as the next
+    day's Agile prices.
+
+    Each query asks for a number of half-hour slots between an earliest start and a deadline, either as one
+    contiguous block (cheapest_blocks) or as any set of slots (cheapest_slot_sets). Queries are answered in
+    batches with NumPy: block costs come from prefix sums of the prices, and the cheapest block in each query's
+    range from a sparse table of range minima, built once per block length and reused by later batches. Slots
+    with no rate are never chosen.
+
+    e.g.
+
+        optimizer = SlotOptimizer(octopus_client.get_tariff_data(ResourceType.ELECTRICITY, ChargeType.STANDARD_UNIT_RATES, period_from, period_to, page_size=1500))
+        optimizer.cheapest_block(6, earliest=now, deadline=tomorrow_7am)
+        # (datetime.datetime(2022, 1, 2, 1, 0, tzinfo=datetime.timezone.utc), datetime.datetime(2022, 1, 2, 4, 0, tzinfo=datetime.timezone.utc), 8.4)
+
+        optimizer.cheapest_blocks(slots=np.array([6, 4, 8]), earliest=starts, deadline=deadlines)["start"]
+    """
+    def __init__(self, unit_rates, include_vat=True, period_to=None, interval=HALF_HOUR):
+        """
+        Initialiser for the SlotOptimizer class. Requires numpy.
+
+        :param unit_rates: Unit rates, as a RateIndex, a RateSeries or a parsed tariff response.
+        :param bool include_vat: (optional, default True) Use rates including VAT.
+        :param datetime.datetime period_to: (optional) End of the slots considered. Required if the last rate is open-ended.
+        :param int interval: (optional, default HALF_HOUR) Length of each slot in seconds.
+        :raises ValueError: If there are no rates, or the last rate is open-ended and period_to is not given.
+        """
+        require_numpy("SlotOptimizer")
+        index = unit_rates if isinstance(unit_rates, RateIndex) else RateIndex(unit_rates)
+        if not len(index):
+            raise ValueError("No unit rates to schedule against")
+
+        end = to_timestamp(period_to) if period_to is not None else index.ends[-1]
+        if end == OPEN_ENDED:
+            raise ValueError("The last unit rate is open-ended, so period_to is required")
+
+        self.interval = interval
+        self.start = index.starts[0] - index.starts[0] % interval
+        self.slot_starts = np.arange(self.start, end, interval, dtype=np.int64)
+        self.prices = index.lookup(self.slot_starts, include_vat)
+
+        available = ~np.isnan(self.prices)
+        self._prefix = np.concatenate([[0.0], np.cumsum(np.where(available, self.prices, 0.0))])
+        self._missing = np.concatenate([[0], np.cumsum(~available)])
+        # Slot indices from cheapest to dearest, earliest first between equal prices, with missing slots last.
+        self._order = np.argsort(np.where(available, self.prices, np.inf), kind="stable")
+        self._order_available = available[self._order]
+        self._tables = {}
+
+    def __len__(self):
+        return len(self.slot_starts)
+
+    def _bounds(self, earliest, deadline, count):
+        # Slot i runs from slot_starts[i] to slot_starts[i] + interval, so usable slots are lo <= i < hi.
+        earliest = _as_times(earliest, self.start, count)
+        deadline = _as_times(deadline, self.start + len(self) * self.interval, count)
+        lo = np.clip(-((self.start - earliest) // self.interval), 0, len(self))
+        hi = np.clip((deadline - self.start) // self.interval, 0, len(self))
+        return lo, hi
+
+    def _block_table(self, slots):
+        """
+        Costs of every block of a number of slots, and a sparse table whose level k holds the index of the cheapest
+        block starting in each range [i, i + 2 ** k).
+        """
+        table = self._tables.get(slots)
+        if table is None:
+            costs = self._prefix[slots:] - self._prefix[:-slots]
+            costs[(self._missing[slots:] - self._missing[:-slots]) > 0] = np.inf
+
+            levels = [np.arange(len(costs))]
+            span = 1
+            while span * 2 <= len(costs):
+                previous = levels[-1]
+                left, right = previous[:-span], previous[span:]
+                levels.append(np.where(costs[right] < costs[left], right, left))
+                span *= 2
+
+            sparse = np.zeros((len(levels), len(costs)), dtype=np.int64)
+            for k, level in enumerate(levels):
+                sparse[k, :len(level)] = level
+            table = self._tables[slots] = (costs, sparse)
+        return table
+
+    def cheapest_blocks(self, slots, earliest=None, deadline=None):
+        """
+        Finds the cheapest contiguous block of slots for each of many queries at once.
+
+        :param numpy.ndarray slots: Number of slots each query needs, e.g. 6 for three hours.
+        :param earliest: (optional) Earliest start of each query, in seconds since the epoch, or one time for every query. Default: the first rate.
+        :param deadline: (optional) Time by which each query's block must end, or one time for every query. Default: the end of the last rate.
+        :returns: A dictionary of arrays, with an element per query: start (int64 seconds since the epoch, or -1
+                  where no block fits), mean_price (float64, NaN where no block fits) and found (bool).
+        :rtype: dict
+        """
+        slots = np.atleast_1d(np.asarray(slots, dtype=np.int64))
+        count = len(slots)
+        lo, hi = self._bounds(earliest, deadline, count)
+
+        best = np.full(count, -1, dtype=np.int64)
+        mean_price = np.full(count, np.nan)
+        for n in np.unique(slots):
+            if n <= 0 or n > len(self):
+                continue
+            queries = np.nonzero(slots == n)[0]
+            # Blocks starting from first to last (inclusive) fit within each query's range.
+            first, last = lo[queries], hi[queries] - n
+            fits = last >= first
+            queries, first, last = queries[fits], first[fits], last[fits]
+            if not len(queries):
+                continue
+
+            costs, sparse = self._block_table(int(n))
+            k = np.floor(np.log2(last - first + 1)).astype(np.int64)
+            left, right = sparse[k, first], sparse[k, last - (1 << k) + 1]
+            chosen = np.where(costs[right] < costs[left], right, left)
+
+            priced = np.isfinite(costs[chosen])
+            best[queries[priced]] = chosen[priced]
+            mean_price[queries[priced]] = costs[chosen[priced]] / n
+
+        found = best >= 0
+        return {"start": np.where(found, self.start + best * self.interval, -1), "mean_price": mean_price, "found": found}
+
+    def cheapest_slot_sets(self, slots, earliest=None, deadline=None):
+        """
+        Finds the cheapest slots, not necessarily contiguous, for each of many queries at once.
+
+        :param numpy.ndarray slots: Number of slots each query needs.
+        :param earliest: (optional) Earliest start of each query, in seconds since the epoch, or one time for every query. Default: the first rate.
+        :param deadline: (optional) Time by which each query's slots must end, or one time for every query. Default: the end of the last rate.
+        :returns: A dictionary of arrays: chosen (bool, one row per query and one column per slot in slot_starts),
+                  mean_price (float64, NaN where too few slots are available) and found (bool). Rows of queries
+                  which were not found are all False.
+        :rtype: dict
+        """
+        slots = np.atleast_1d(np.asarray(slots, dtype=np.int64))
+        lo, hi = self._bounds(earliest, deadline, len(slots))
+
+        # Walk the slots from cheapest to dearest, taking those in each query's range until it has enough.
+        order = self._order[None, :]
+        eligible = (order >= lo[:, None]) & (order < hi[:, None]) & self._order_available[None, :]
+        taken = eligible & (np.cumsum(eligible, axis=1) <= slots[:, None])
+        found = (taken.sum(axis=1) == slots) & (slots > 0)
+        taken &= found[:, None]
+
+        chosen = np.zeros_like(taken)
+        chosen[:, self._order] = taken
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean_price = np.where(found, (chosen * np.nan_to_num(self.prices)).sum(axis=1) / slots, np.nan)
+        return {"chosen": chosen, "mean_price": mean_price, "found": found}
+
+    def cheapest_block(self, slots, earliest=None, deadline=None):
+        """
+        Finds the cheapest contiguous block of slots for a single device.
+
+        :param int slots: Number of slots needed.
+        :param earliest: (optional) Earliest start, as a datetime, an ISO-8601 string or seconds since the epoch.
+        :param deadline: (optional) Time by which the block must end.
+        :returns: A tuple of the block's start and end as UTC datetimes, and its mean price, or None if no block fits.
+        :rtype: tuple
+        """
+        result = self.cheapest_blocks([slots], earliest, deadline)
+        if not result["found"][0]:
+            return None
+        start = int(result["start"][0])
+        return from_timestamp(start), from_timestamp(start + slots * self.interval), float(result["mean_price"][0])
+
+    def cheapest_slots(self, slots, earliest=None, deadline=None):
+        """
+        Finds the cheapest slots, not necessarily contiguous, for a single device.
+
+        :param int slots: Number of slots needed.
+        :param earliest: (optional) Earliest start, as a datetime, an ISO-8601 string or seconds since the epoch.
+        :param deadline: (optional) Time by which the slots must end.
+        :returns: A tuple of the start of each slot as a UTC datetime, in order, and their mean price, or None if too few slots are available.
+        :rtype: tuple
+        """
+        result = self.cheapest_slot_sets([slots], earliest, deadline)
+        if not result["found"][0]:
+            return None
+        return [from_timestamp(int(start)) for start in self.slot_starts[result["chosen"][0]]], float(result["mean_price"][0])
@@ -0,0 +1,272 @@
+from array import array
+from .pagination import is_paginated
+from .util import OPEN_ENDED, parse_timestamps, iso_format, from_timestamp
+from .decoding import loads, decode_results, timestamps
+from .localtime import np, require_numpy
+
+
+def _numpy_view(values, dtype):
+    require_numpy("NumPy views")
+
+    # frombuffer shares memory with the array rather than copying it.
+    return np.frombuffer(values, dtype=dtype) if len(values) else np.empty(0, dtype=dtype)
+
+
+def _results(data):
+    if isinstance(data, dict):
+        if not is_paginated(data):
+            raise ValueError(f"Response did not contain results: {data}")
+        return data["results"]
+
+    return data
+
+
+class ConsumptionRecord:
+    """
+    A single consumption interval of a ConsumptionSeries, with times in seconds since the epoch.
+    """
+    __slots__ = ("interval_start", "interval_end", "consumption")
+
+    def __init__(self, interval_start, interval_end, consumption):
+        self.interval_start = interval_start
+        self.interval_end = interval_end
+        self.consumption = consumption
+
+    def __repr__(self):
+        return f"ConsumptionRecord(interval_start={self.interval_start}, interval_end={self.interval_end}, consumption={self.consumption})"
+
+
+class RateRecord:
+    """
+    A single tariff window of a RateSeries, with times in seconds since the epoch.
+
+    Open-ended windows have a valid_to of OPEN_ENDED.
+    """
+    __slots__ = ("valid_from", "valid_to", "value_exc_vat", "value_inc_vat")
+
+    def __init__(self, valid_from, valid_to, value_exc_vat, value_inc_vat):
+        self.valid_from = valid_from
+        self.valid_to = valid_to
+        self.value_exc_vat = value_exc_vat
+        self.value_inc_vat = value_inc_vat
+
+    def __repr__(self):
+        return f"RateRecord(valid_from={self.valid_from}, valid_to={self.valid_to}, value_exc_vat={self.value_exc_vat}, value_inc_vat={self.value_inc_vat})"
+
+
+class ConsumptionSeries:
+    """
+    Columnar consumption data, held as 64-bit arrays rather than a list of dictionaries.
+
+    Interval starts and ends are int64 seconds since the epoch and consumption values are float64. Intervals keep
+    the order in which they were returned by the API. Indexing returns a ConsumptionRecord, and to_numpy() returns
+    NumPy views which share memory with the series.
+
+    e.g.
+
+        series = ConsumptionSeries.from_response(octopus_client.get_consumption_for_period(...))
+        series.to_numpy()["consumption"].sum()
+    """
+    __slots__ = ("interval_start", "interval_end", "consumption")
+
+    def __init__(self, interval_start=None, interval_end=None, consumption=None):
+        """
+        :param array.array interval_start: (optional) Interval start times as int64 ('q') seconds since the epoch.
+        :param array.array interval_end: (optional) Interval end times as int64 ('q') seconds since the epoch.
+        :param array.array consumption: (optional) Consumption values as float64 ('d').
+        """
+        self.interval_start = interval_start if interval_start is not None else array("q")
+        self.interval_end = interval_end if interval_end is not None else array("q")
+        self.consumption = consumption if consumption is not None else array("d")
+
+    @classmethod
+    def from_response(cls, data):
+        """
+        Builds a series from an API response or a list of consumption records.
+
+        :param data: A parsed consumption response, e.g. from get_consumption_for_period, or its list of results.
+        :returns: A series containing every interval.
+        :rtype: ConsumptionSeries
+        :raises ValueError: If the response is not a page of results, e.g. an error response.
+        """
+        results = _results(data)
+        return cls(
+            parse_timestamps([r["interval_start"] for r in results]),
+            parse_timestamps([r["interval_end"] for r in results]),
+            array("d", [r["consumption"] for r in results])
+        )
+
+    @classmethod
+    def from_json(cls, content):
+        """
+        Builds a series straight from the raw body of a consumption response.
+
+        With msgspec installed, records are decoded into typed structs rather than dictionaries.
+
+        :param bytes content: The raw json body, e.g. as returned by the API.
+        :rtype: ConsumptionSeries
+        :raises ValueError: If the response is not a page of results, e.g. an error response.
+        """
+        results = decode_results(content, "consumption")
+        if results is None:
+            return cls.from_response(loads(content))
+
+        return cls(
+            timestamps([r.interval_start for r in results]),
+            timestamps([r.interval_end for r in results]),
+            array("d", [r.consumption for r in results])
+        )
+
+    def to_records(self):
+        """
+        Converts the series back into consumption records as returned by the API, with times in UTC.
+
+        :returns: A dictionary of consumption, interval_start and interval_end for each interval.
+        :rtype: list
+        """
+        return [
+            {"consumption": value, "interval_start": iso_format(from_timestamp(start)), "interval_end": iso_format(from_timestamp(end))}
+            for start, end, value in zip(self.interval_start, self.interval_end, self.consumption)
+        ]
+
+    def __len__(self):
+        return len(self.interval_start)
+
+    def __getitem__(self, index):
+        return ConsumptionRecord(self.interval_start[index], self.interval_end[index], self.consumption[index])
+
+    def __iter__(self):
+        for values in zip(self.interval_start, self.interval_end, self.consumption):
+            yield ConsumptionRecord(*values)
+
+    def extend(self, other):
+        """
+        Appends the intervals of another series.
+
+        The series cannot be extended while NumPy views of it exist.
+
+        :param ConsumptionSeries other: The series to append.
+        """
+        self.interval_start.extend(other.interval_start)
+        self.interval_end.extend(other.interval_end)
+        self.consumption.extend(other.consumption)
+
+    def to_numpy(self):
+        """
+        NumPy views of each column, sharing memory with the series. Requires numpy.
+
+        :returns: A dictionary of interval_start (int64), interval_end (int64) and consumption (float64) arrays.
+        :rtype: dict
+        """
+        return {
+            "interval_start": _numpy_view(self.interval_start, "int64"),
+            "interval_end": _numpy_view(self.interval_end, "int64"),
+            "consumption": _numpy_view(self.consumption, "float64"),
+        }
+
+
+def as_consumption_series(consumption):
+    """
+    Returns consumption as a ConsumptionSeries, building one if it is a parsed response or a list of records.
+
+    :param consumption: A ConsumptionSeries, a parsed consumption response or a list of consumption records.
+    :rtype: ConsumptionSeries
+    :raises ValueError: If the response is not a page of results, e.g. an error response.
+    """
+    return consumption if isinstance(consumption, ConsumptionSeries) else ConsumptionSeries.from_response(consumption)
+
+
+class RateSeries:
+    """
+    Columnar tariff data, held as 64-bit arrays rather than a list of dictionaries.
+
+    Window boundaries are int64 seconds since the epoch, with OPEN_ENDED for windows with no valid_to, and values
+    are float64 in pence. The API returns the newest window first; a RateSeries holds windows in ascending order of
+    valid_from. Indexing returns a RateRecord, and to_numpy() returns NumPy views which share memory with the series.
+    """
+    __slots__ = ("valid_from", "valid_to", "value_exc_vat", "value_inc_vat")
+
+    def __init__(self, valid_from=None, valid_to=None, value_exc_vat=None, value_inc_vat=None):
+        """
+        :param array.array valid_from: (optional) Window start times as int64 ('q') seconds since the epoch, ascending.
+        :param array.array valid_to: (optional) Window end times as int64 ('q') seconds since the epoch.
+        :param array.array value_exc_vat: (optional) Values excluding VAT as float64 ('d').
+        :param array.array value_inc_vat: (optional) Values including VAT as float64 ('d').
+        """
+        self.valid_from = valid_from if valid_from is not None else array("q")
+        self.valid_to = valid_to if valid_to is not None else array("q")
+        self.value_exc_vat = value_exc_vat if value_exc_vat is not None else array("d")
+        self.value_inc_vat = value_inc_vat if value_inc_vat is not None else array("d")
+
+    @classmethod
+    def from_response(cls, data):
+        """
+        Builds a series from an API response or a list of tariff records.
+
+        :param data: A parsed tariff response, e.g. from get_tariff_data, or its list of results.
+        :returns: A series containing every window, in ascending order of valid_from.
+        :rtype: RateSeries
+        :raises ValueError: If the response is not a page of results, e.g. an error response.
+        """
+        results = _results(data)
+        valid_from = parse_timestamps([r["valid_from"] for r in results], default=-OPEN_ENDED)
+        order = sorted(range(len(results)), key=valid_from.__getitem__)
+        results = [results[i] for i in order]
+
+        return cls(
+            array("q", [valid_from[i] for i in order]),
+            parse_timestamps([r["valid_to"] for r in results]),
+            array("d", [r["value_exc_vat"] for r in results]),
+            array("d", [r["value_inc_vat"] for r in results])
+        )
+
+    @classmethod
+    def from_json(cls, content):
+        """
+        Builds a series straight from the raw body of a tariff response.
+
+        With msgspec installed, records are decoded into typed structs rather than dictionaries.
+
+        :param bytes content: The raw json body, e.g. as returned by the API.
+        :returns: A series containing every window, in ascending order of valid_from.
+        :rtype: RateSeries
+        :raises ValueError: If the response is not a page of results, e.g. an error response.
+        """
+        results = decode_results(content, "rate")
+        if results is None:
+            return cls.from_response(loads(content))
+
+        valid_from = timestamps([r.valid_from for r in results], default=-OPEN_ENDED)
+        order = sorted(range(len(results)), key=valid_from.__getitem__)
+        results = [results[i] for i in order]
+
+        return cls(
+            array("q", [valid_from[i] for i in order]),
+            timestamps([r.valid_to for r in results]),
+            array("d", [r.value_exc_vat for r in results]),
+            array("d", [r.value_inc_vat for r in results])
+        )
+
+    def __len__(self):
+        return len(self.valid_from)
+
+    def __getitem__(self, index):
+        return RateRecord(self.valid_from[index], self.valid_to[index], self.value_exc_vat[index], self.value_inc_vat[index])
+
+    def __iter__(self):
+        for values in zip(self.valid_from, self.valid_to, self.value_exc_vat, self.value_inc_vat):
+            yield RateRecord(*values)
+
+    def to_numpy(self):
+        """
+        NumPy views of each column, sharing memory with the series. Requires numpy.
+
+        :returns: A dictionary of valid_from (int64), valid_to (int64), value_exc_vat (float64) and value_inc_vat (float64) arrays.
+        :rtype: dict
+        """
+        return {
+            "valid_from": _numpy_view(self.valid_from, "int64"),
+            "valid_to": _numpy_view(self.valid_to, "int64"),
+            "value_exc_vat": _numpy_view(self.value_exc_vat, "float64"),
+            "value_inc_vat": _numpy_view(self.value_inc_vat, "float64"),
+        }
@@ -0,0 +1,164 @@
+import socket
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+from .metrics import record_connection
+# Retry helpers live in transport, which does not import requests, and are imported here for compatibility.
+from .transport import RETRY_STATUSES, retry_delay
+
+
+def keep_alive_socket_options(idle=60, interval=10, count=6):
+    """
+    Socket options enabling TCP keep-alive probes on pooled connections.
+
+    Options which are not supported by the current platform are skipped.
+
+    :param int idle: Seconds a connection must be idle before keep-alive probes are sent.
+    :param int interval: Seconds between keep-alive probes.
+    :param int count: Number of unanswered probes before the connection is dropped.
+    :returns: A list of socket options to be applied to new connections.
+    :rtype: list
+    """
+    options = [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+
+    for name, value in (("TCP_KEEPIDLE", idle), ("TCP_KEEPINTVL", interval), ("TCP_KEEPCNT", count)):
+        if hasattr(socket, name):
+            options.append((socket.IPPROTO_TCP, getattr(socket, name), value))
+
+    return options
+
+
+class _TimedConnectionMixin:
+    # Resolves the host name itself so that DNS and connection times can be recorded separately, then connects to
+    # each resolved address in turn as urllib3 would. TLS still verifies against the host name, not the address.
+    _dns_time = 0.0
+
+    def _new_conn(self):
+        host = self._dns_host
+        start = time.perf_counter()
+        try:
+            addresses = list(dict.fromkeys(info[4][0] for info in socket.getaddrinfo(host, self.port, 0, socket.SOCK_STREAM)))
+        except socket.gaierror:
+            # Let urllib3 resolve again and raise its own error.
+            addresses = [host]
+        self._dns_time = time.perf_counter() - start
+
+        try:
+            for i, address in enumerate(addresses):
+                self._dns_host = address
+                try:
+                    return super()._new_conn()
+                except Exception:
+                    if i == len(addresses) - 1:
+                        raise
+        finally:
+            self._dns_host = host
+
+    def connect(self):
+        # Includes the TLS handshake for https connections.
+        start = time.perf_counter()
+        super().connect()
+        record_connection(self._dns_time, time.perf_counter() - start - self._dns_time)
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class KeepAliveAdapter(HTTPAdapter):
+    """
+    HTTPAdapter which applies TCP keep-alive socket options to every pooled connection.
+
+    New connections record their DNS and connection times for request instrumentation.
+    """
+    def __init__(self, socket_options=None, **kwargs):
+        """
+        :param list socket_options: (optional) Extra socket options. Default: keep_alive_socket_options()
+        :param kwargs: Passed through to requests.adapters.HTTPAdapter, e.g. pool_maxsize, max_retries.
+        """
+        self.socket_options = socket_options if socket_options is not None else keep_alive_socket_options()
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["socket_options"] = HTTPConnection.default_socket_options + self.socket_options
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": TimedHTTPConnectionPool, "https": TimedHTTPSConnectionPool}
+
+
+def create_retry(max_retries=3, backoff_factor=0.5, status_forcelist=RETRY_STATUSES):
+    """
+    Builds the retry policy used by pooled sessions.
+
+    Retries use exponential backoff (backoff_factor * 2 ** (retry - 1) seconds) and honour the Retry-After
+    header returned with 429 and 503 responses. Once retries are exhausted the last response is returned
+    rather than raised, so callers still receive the API's error body.
+
+    :param int max_retries: (optional, default 3) Maximum number of retries per request.
+    :param float backoff_factor: (optional, default 0.5) Multiplier for the exponential backoff.
+    :param tuple status_forcelist: (optional) HTTP status codes which should be retried.
+    :returns: A retry policy.
+    :rtype: urllib3.util.retry.Retry
+    """
+    return Retry(
+        total=max_retries,
+        connect=max_retries,
+        read=max_retries,
+        status=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=status_forcelist,
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+
+
+def create_session(
+    pool_connections=10,
+    pool_maxsize=10,
+    pool_block=False,
+    max_retries=3,
+    backoff_factor=0.5,
+    status_forcelist=RETRY_STATUSES,
+    keep_alive=True
+):
+    """
+    Creates a requests Session backed by a persistent, keep-alive connection pool with retries.
+
+    A single session can be shared between several OctopusEnergy clients so that they reuse connections.
+
+    :param int pool_connections: (optional, default 10) Number of host pools to cache.
+    :param int pool_maxsize: (optional, default 10) Maximum number of connections kept open per host.
+    :param bool pool_block: (optional, default False) Block when no free connections are available rather than opening a new one.
+    :param int max_retries: (optional, default 3) Maximum number of retries per request.
+    :param float backoff_factor: (optional, default 0.5) Multiplier for the exponential backoff between retries.
+    :param tuple status_forcelist: (optional) HTTP status codes which should be retried.
+    :param bool keep_alive: (optional, default True) Enable TCP keep-alive probes on pooled connections.
+    :returns: A configured session.
+    :rtype: requests.Session
+    """
+    adapter = KeepAliveAdapter(
+        socket_options=None if keep_alive else [],
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        pool_block=pool_block,
+        max_retries=create_retry(max_retries, backoff_factor, status_forcelist)
+    )
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
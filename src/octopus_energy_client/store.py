@@ -0,0 +1,145 @@
+import sqlite3
+import threading
+from .util import HALF_HOUR, to_timestamp, from_timestamp, missing_ranges
+
+
+class ConsumptionStore:
+    """
+    Local SQLite store of half-hourly consumption readings.
+
+    Readings are keyed by meter point (MPAN or MPRN), meter serial and interval start, so the same store can hold
+    data for any number of electricity and gas meters. When passed to OctopusEnergy, half-hourly consumption
+    requests are answered from the store and only the missing intervals are requested from the API.
+
+    e.g.
+
+        octopus_client = OctopusEnergy(store=ConsumptionStore("consumption.db"))
+    """
+    def __init__(self, path=":memory:"):
+        """
+        Initialiser for the ConsumptionStore class.
+
+        :param str path: (optional, default ":memory:") Path of the SQLite database file, created if it does not exist.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+
+        with self._connection:
+            if path != ":memory:":
+                self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS consumption (
+                    meter_point TEXT NOT NULL,
+                    serial TEXT NOT NULL,
+                    start INTEGER NOT NULL,
+                    interval_start TEXT NOT NULL,
+                    interval_end TEXT NOT NULL,
+                    consumption REAL NOT NULL,
+                    PRIMARY KEY (meter_point, serial, start)
+                ) WITHOUT ROWID
+                """
+            )
+
+    def close(self):
+        """
+        Closes the underlying database connection.
+        """
+        self._connection.close()
+
+    def upsert(self, meter_point, serial, records):
+        """
+        Inserts or replaces consumption records in a single transaction.
+
+        :param str meter_point: The MPAN or MPRN of the meter point.
+        :param str serial: The serial number of the meter.
+        :param iterable records: Consumption records as returned by the API, e.g. {'consumption': 0.113, 'interval_start': '...', 'interval_end': '...'}
+        :returns: The number of records written.
+        :rtype: int
+        """
+        rows = [
+            (meter_point, serial, to_timestamp(r["interval_start"]), r["interval_start"], r["interval_end"], r["consumption"])
+            for r in records
+        ]
+
+        with self._lock, self._connection:
+            self._connection.executemany("INSERT OR REPLACE INTO consumption VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+        return len(rows)
+
+    def get_range(self, meter_point, serial, period_from, period_to, reverse_order=False):
+        """
+        Retrieves the stored consumption records whose interval starts between period_from (inclusive) and period_to (exclusive).
+
+        :param str meter_point: The MPAN or MPRN of the meter point.
+        :param str serial: The serial number of the meter.
+        :param datetime.datetime period_from: The start of the period.
+        :param datetime.datetime period_to: The end of the period.
+        :param bool reverse_order: (optional, default False) Should the results be returned in reverse date order.
+        :returns: A list of consumption records in the same form as the API.
+        :rtype: list
+        """
+        order = "DESC" if reverse_order else "ASC"
+        with self._lock:
+            rows = self._connection.execute(
+                f"""
+                SELECT consumption, interval_start, interval_end FROM consumption
+                WHERE meter_point = ? AND serial = ? AND start >= ? AND start < ?
+                ORDER BY start {order}
+                """,
+                (meter_point, serial, to_timestamp(period_from), to_timestamp(period_to))
+            ).fetchall()
+
+        return [{"consumption": c, "interval_start": s, "interval_end": e} for c, s, e in rows]
+
+    def interval_starts(self, meter_point, serial, period_from, period_to):
+        """
+        Retrieves the start times of the stored intervals between period_from (inclusive) and period_to (exclusive).
+
+        :returns: A list of interval start times in seconds since the epoch, in ascending order.
+        :rtype: list
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT start FROM consumption WHERE meter_point = ? AND serial = ? AND start >= ? AND start < ? ORDER BY start",
+                (meter_point, serial, to_timestamp(period_from), to_timestamp(period_to))
+            ).fetchall()
+
+        return [start for (start,) in rows]
+
+    def watermark(self, meter_point, serial):
+        """
+        The end of the latest stored interval for a meter.
+
+        :param str meter_point: The MPAN or MPRN of the meter point.
+        :param str serial: The serial number of the meter.
+        :returns: The end of the latest stored interval, or None if nothing is stored.
+        :rtype: datetime.datetime
+        """
+        with self._lock:
+            (latest,) = self._connection.execute(
+                "SELECT MAX(start) FROM consumption WHERE meter_point = ? AND serial = ?",
+                (meter_point, serial)
+            ).fetchone()
+
+        return from_timestamp(latest + HALF_HOUR) if latest is not None else None
+
+    def missing_ranges(self, meter_point, serial, period_from, period_to):
+        """
+        Finds the half-hourly intervals in a period which are not stored, merged into contiguous ranges.
+
+        This includes everything after the stored watermark as well as any holes before it.
+
+        :param str meter_point: The MPAN or MPRN of the meter point.
+        :param str serial: The serial number of the meter.
+        :param datetime.datetime period_from: The start of the period.
+        :param datetime.datetime period_to: The end of the period.
+        :returns: A list of (period_from, period_to) tuples of UTC datetimes.
+        :rtype: list
+        """
+        starts = self.interval_starts(meter_point, serial, period_from, period_to)
+        return [
+            (from_timestamp(start), from_timestamp(end))
+            for start, end in missing_ranges(starts, to_timestamp(period_from), to_timestamp(period_to))
+        ]
@@ -0,0 +1,242 @@
+import codecs
+import json
+
+
+_WHITESPACE = " \t\n\r"
+
+# Consumed text is discarded from the buffer once this many characters have been decoded.
+_COMPACT_AT = 64 * 1024
+
+
+class _Parser:
+    """
+    Pull parser for a top-level JSON object whose "results" array is decoded one element at a time.
+
+    Each event is either ("field", key, value) for a member other than "results", or ("result", value) for an
+    element of the "results" array. Only the element being decoded is held in memory, plus one chunk of input.
+    """
+    def __init__(self, chunks, encoding="utf-8"):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+        self._json = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+        self._state = "start"
+
+    def _read(self):
+        if self._eof:
+            return False
+
+        if self._pos >= _COMPACT_AT:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+
+        for chunk in self._chunks:
+            text = self._decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+            if text:
+                self._buffer += text
+                return True
+
+        self._buffer += self._decoder.decode(b"", final=True)
+        self._eof = True
+        return True
+
+    def _peek(self):
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._read():
+                raise ValueError("Unexpected end of JSON response")
+
+    def _expect(self, characters):
+        character = self._peek()
+        if character not in characters:
+            raise ValueError(f"Expected one of {characters!r} at position {self._pos} of JSON response, found {character!r}")
+        self._pos += 1
+        return character
+
+    def _value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._read():
+                    raise
+                continue
+
+            # A number at the end of the buffer may continue in the next chunk.
+            if end == len(self._buffer) and not self._eof:
+                self._read()
+                continue
+
+            self._pos = end
+            return value
+
+    def next_event(self):
+        """
+        :returns: The next event, or None at the end of the document.
+        :rtype: tuple
+        """
+        while True:
+            if self._state == "start":
+                self._expect("{")
+                if self._peek() == "}":
+                    self._pos += 1
+                    self._state = "end"
+                else:
+                    self._state = "member"
+
+            elif self._state == "member":
+                key = self._value()
+                self._expect(":")
+                if key == "results" and self._peek() == "[":
+                    self._pos += 1
+                    self._state = "results"
+                    if self._peek() == "]":
+                        self._pos += 1
+                        self._state = "after_member"
+                    return ("field", key, None)
+
+                value = self._value()
+                self._state = "after_member"
+                return ("field", key, value)
+
+            elif self._state == "results":
+                value = self._value()
+                if self._expect(",]") == "]":
+                    self._state = "after_member"
+                return ("result", value)
+
+            elif self._state == "after_member":
+                self._state = "member" if self._expect(",}") == "," else "end"
+
+            else:
+                return None
+
+
+class StreamedPage:
+    """
+    A page of results decoded incrementally as it is read, so that memory does not grow with the page size.
+
+    Iterating over the page yields each record of its "results" array as it is decoded. The other fields, such as
+    count, next and previous, are available as soon as they have been read; the API sends them before the results.
+    A page can only be iterated once.
+
+    e.g.
+
+        with octopus_client.get_data_stream(url) as page:
+            print(page.count)
+            for record in page:
+                ...
+    """
+    def __init__(self, chunks, close=None):
+        """
+        :param iterable chunks: The response body, as bytes or str chunks.
+        :param callable close: (optional) Function releasing the underlying response.
+        """
+        self.fields = {}
+        self._parser = _Parser(chunks)
+        self._close = close
+        self._pending = None
+        self._iterated = False
+        self._done = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """
+        Releases the underlying response.
+        """
+        if self._close is not None:
+            self._close()
+            self._close = None
+
+    def _advance(self):
+        event = self._parser.next_event()
+        if event is None:
+            self._done = True
+            self.close()
+        elif event[0] == "field":
+            self.fields[event[1]] = event[2]
+        return event
+
+    def _read_header(self, key):
+        while key not in self.fields and self._pending is None and not self._done:
+            event = self._advance()
+            if event is not None and event[0] == "result":
+                self._pending = event
+
+    @property
+    def count(self):
+        self._read_header("count")
+        return self.fields.get("count")
+
+    @property
+    def next(self):
+        self._read_header("next")
+        return self.fields.get("next")
+
+    @property
+    def previous(self):
+        self._read_header("previous")
+        return self.fields.get("previous")
+
+    @property
+    def is_paginated(self):
+        """
+        Whether the page contains results, rather than being a single object or an error. Reads up to the results.
+        """
+        self._read_header("results")
+        return "results" in self.fields
+
+    def __iter__(self):
+        if self._iterated:
+            raise RuntimeError("A StreamedPage can only be iterated once")
+        self._iterated = True
+
+        if self._pending is not None:
+            yield self._pending[1]
+            self._pending = None
+
+        while not self._done:
+            event = self._advance()
+            if event is not None and event[0] == "result":
+                yield event[1]
+
+    def read(self):
+        """
+        Reads the rest of the page into memory.
+
+        :returns: The parsed response, as would be returned by get_data.
+        :rtype: dict
+        """
+        results = list(self)
+        if "results" in self.fields:
+            self.fields["results"] = results
+        return self.fields
+
+
+def iter_streamed_results(get_data_stream, url):
+    """
+    Yields each result of a paginated endpoint by following the "next" links, decoding each page incrementally.
+
+    :param callable get_data_stream: Function which requests a URL and returns a StreamedPage, e.g. OctopusEnergy.get_data_stream.
+    :param str url: The URL of the first page.
+    :returns: A generator of result records.
+    :rtype: generator
+    :raises ValueError: If a page is not a page of results, e.g. an error response.
+    """
+    while url:
+        with get_data_stream(url) as page:
+            if not page.is_paginated:
+                raise ValueError(f"Page did not contain results: {page.read()}")
+            yield from page
+            url = page.next
@@ -0,0 +1,292 @@
+import datetime
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from .localtime import LONDON
+from .planner import MAX_CONSUMPTION_ROWS, MAX_TARIFF_ROWS
+from .util import to_timestamp, from_timestamp, parse_timestamps
+
+
+logger = logging.getLogger(__name__)
+
+
+class SyncJob:
+    """
+    A source of records polled by a SyncScheduler, such as one meter's consumption or one tariff's rates.
+
+    Each job keeps a watermark marking the newest data already delivered, and only requests data after it. When a
+    poll finds nothing new, the time until the next poll grows by backoff, up to max_interval, and returns to
+    interval as soon as new records arrive.
+
+    Subclasses implement fetch, and may override next_run to poll at the time new data is expected.
+    """
+    def __init__(self, key, client, on_data, start=None, interval=30 * 60, max_interval=6 * 60 * 60, backoff=2.0):
+        """
+        Initialiser for the SyncJob class.
+
+        :param str key: Identifier of the job, under which its state is persisted.
+        :param OctopusEnergy client: Client used to request the job's data.
+        :param callable on_data: Function called with the job's key and each non-empty list of new records.
+        :param datetime.datetime start: (optional) Where the first poll starts. Default: one day before the first poll.
+        :param float interval: (optional, default 30 minutes) Seconds between polls while new data is arriving.
+        :param float max_interval: (optional, default 6 hours) Maximum seconds between polls when no new data arrives.
+        :param float backoff: (optional, default 2) Factor by which the interval grows after each empty poll.
+        """
+        self.key = key
+        self.client = client
+        self.on_data = on_data
+        self.start = start
+        self.interval = interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.key!r})"
+
+    def fetch(self, watermark, now):
+        """
+        Requests the records newer than the watermark.
+
+        :param str watermark: The watermark returned by the previous poll, or None before the first.
+        :param datetime.datetime now: The current time.
+        :returns: A tuple of the new records, oldest first, and the new watermark.
+        :rtype: (list, str)
+        """
+        raise NotImplementedError
+
+    def next_run(self, watermark, now, interval):
+        """
+        When the job should next be polled.
+
+        :param str watermark: The job's watermark.
+        :param float now: The current time, in seconds since the epoch.
+        :param float interval: The current backoff interval in seconds.
+        :returns: The time of the next poll, in seconds since the epoch.
+        :rtype: float
+        """
+        return now + interval
+
+    def _period_from(self, watermark, now):
+        if watermark is not None:
+            return from_timestamp(to_timestamp(watermark))
+        return self.start or now - datetime.timedelta(days=1)
+
+
+class ConsumptionJob(SyncJob):
+    """
+    Polls a meter's half-hourly consumption. The watermark is the end of the last interval delivered.
+
+    e.g.
+
+        ConsumptionJob(octopus_client, ResourceType.ELECTRICITY, on_data=store_readings)
+    """
+    def __init__(self, client, resource_type, on_data, key=None, **kwargs):
+        """
+        :param OctopusEnergy client: Client configured with the meter.
+        :param ResourceType resource_type: The Type of the meter, e.g. ResourceType.ELECTRICITY.
+        :param callable on_data: Function called with the job's key and each non-empty list of new consumption records.
+        :param str key: (optional) Identifier of the job. Default: "<resource>:<meter_point>:<serial>:consumption"
+        :param kwargs: (optional) Scheduling arguments, as for SyncJob.
+        """
+        self.resource_type = resource_type
+        if key is None:
+            meter_point, serial = client.meter_ids(resource_type)
+            key = f"{resource_type.value}:{meter_point}:{serial}:consumption"
+        super().__init__(key, client, on_data, **kwargs)
+
+    def fetch(self, watermark, now):
+        period_from = self._period_from(watermark, now)
+        records = list(self.client.iter_consumption(self.resource_type, period_from, now, page_size=MAX_CONSUMPTION_ROWS))
+
+        # Intervals which started before the watermark have already been delivered, and any starting now are incomplete.
+        since, until = to_timestamp(period_from), to_timestamp(now)
+        starts = parse_timestamps([record["interval_start"] for record in records])
+        records = [record for start, record in zip(starts, records) if since <= start < until]
+        return records, records[-1]["interval_end"] if records else watermark
+
+
+class TariffJob(SyncJob):
+    """
+    Polls a tariff's rates, including those published in advance such as next-day Agile prices. The watermark is
+    the start of the latest window delivered.
+
+    When publish_time is given, rates for each day are expected at that local time on the day before. Once the
+    rates of the watermark's day are held, the job sleeps until the next publication rather than polling, and only
+    then backs off from interval until the new rates appear.
+
+    e.g.
+
+        TariffJob(octopus_client, ResourceType.ELECTRICITY, ChargeType.STANDARD_UNIT_RATES, on_data=store_rates, publish_time=datetime.time(16))
+    """
+    def __init__(self, client, resource_type, charge_type, on_data, key=None, publish_time=None, tz=LONDON, **kwargs):
+        """
+        :param OctopusEnergy client: Client configured with the tariff.
+        :param ResourceType resource_type: The Type of resource, e.g. ResourceType.ELECTRICITY.
+        :param ChargeType charge_type: The charge type to poll. e.g. ChargeType.STANDARD_UNIT_RATES
+        :param callable on_data: Function called with the job's key and each non-empty list of new rate records.
+        :param str key: (optional) Identifier of the job. Default: the tariff's URL path.
+        :param datetime.time publish_time: (optional) Local time at which the next day's rates are published.
+        :param datetime.tzinfo tz: (optional, default Europe/London) Timezone of publish_time.
+        :param kwargs: (optional) Scheduling arguments, as for SyncJob.
+        """
+        self.resource_type = resource_type
+        self.charge_type = charge_type
+        self.publish_time = publish_time
+        self.tz = tz
+        if key is None:
+            key = f"{client.tariff_url(resource_type)[len(client.base_url):]}/{charge_type.value}"
+        super().__init__(key, client, on_data, **kwargs)
+
+    def fetch(self, watermark, now):
+        period_from = self._period_from(watermark, now)
+        # Rates are published up to a day ahead.
+        records = list(self.client.iter_tariff_rates(self.resource_type, self.charge_type, period_from, now + datetime.timedelta(days=2), page_size=MAX_TARIFF_ROWS))
+
+        starts = parse_timestamps([record["valid_from"] for record in records], default=0)
+        since = to_timestamp(watermark) if watermark is not None else None
+        new = sorted(
+            ((start, record) for start, record in zip(starts, records) if since is None or start > since),
+            key=lambda item: item[0]
+        )
+        records = [record for _, record in new]
+        return records, records[-1]["valid_from"] if records else watermark
+
+    def next_run(self, watermark, now, interval):
+        if self.publish_time is None or watermark is None:
+            return now + interval
+
+        # The rates for the day after the watermark's day are published on the watermark's day.
+        day = from_timestamp(to_timestamp(watermark)).astimezone(self.tz).date()
+        published = self.tz.localize(datetime.datetime.combine(day, self.publish_time)).timestamp()
+        return published if published > now else now + interval
+
+
+class SyncScheduler:
+    """
+    Long-running scheduler which polls SyncJobs for new data when each is due, with the fewest API calls.
+
+    Jobs which are due together are run concurrently on one shared pool of threads. Each job's watermark, interval
+    and next poll are saved to state_path after every run, so a restarted scheduler carries on where it stopped.
+
+    e.g.
+
+        scheduler = SyncScheduler([
+            ConsumptionJob(octopus_client, ResourceType.ELECTRICITY, on_data=store_readings),
+            TariffJob(octopus_client, ResourceType.ELECTRICITY, ChargeType.STANDARD_UNIT_RATES, on_data=store_rates, publish_time=datetime.time(16)),
+        ], state_path="sync.json")
+
+        scheduler.run_forever()
+    """
+    def __init__(self, jobs, state_path=None, max_workers=4, clock=time.time):
+        """
+        Initialiser for the SyncScheduler class.
+
+        :param list jobs: The SyncJobs to run.
+        :param str state_path: (optional) JSON file in which job state is persisted. Default: state is not persisted.
+        :param int max_workers: (optional, default 4) Maximum number of jobs run at once.
+        :param callable clock: (optional, default time.time) Function returning the current time in seconds since the epoch.
+        :raises ValueError: If two jobs have the same key.
+        """
+        self.jobs = {}
+        for job in jobs:
+            if job.key in self.jobs:
+                raise ValueError(f"Duplicate sync job {job.key!r}")
+            self.jobs[job.key] = job
+
+        self.state_path = state_path
+        self.clock = clock
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="octopus-sync")
+        self._stop = threading.Event()
+        self.state = self._load_state()
+
+    def _load_state(self):
+        state = {}
+        if self.state_path is not None and os.path.exists(self.state_path):
+            with open(self.state_path) as f:
+                state = json.load(f)
+
+        return {
+            key: state.get(key, {"watermark": None, "interval": job.interval, "next_run": 0, "failures": 0})
+            for key, job in self.jobs.items()
+        }
+
+    def _save_state(self):
+        if self.state_path is None:
+            return
+        with open(self.state_path + ".tmp", "w") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(self.state_path + ".tmp", self.state_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """
+        Stops run_forever and shuts down the pool once running jobs complete.
+        """
+        self._stop.set()
+        self._executor.shutdown(wait=True)
+
+    def _run(self, job, state, now):
+        records, watermark = job.fetch(state["watermark"], from_timestamp(now))
+        if records:
+            job.on_data(job.key, records)
+        return records, watermark
+
+    def run_pending(self):
+        """
+        Runs every job which is due and schedules its next poll.
+
+        :returns: The number of new records delivered by each job which ran, or the exception it raised, keyed by job key.
+        :rtype: dict
+        """
+        now = self.clock()
+        due = [job for key, job in self.jobs.items() if self.state[key]["next_run"] <= now]
+        futures = {job.key: self._executor.submit(self._run, job, self.state[job.key], now) for job in due}
+
+        results = {}
+        for job in due:
+            state = self.state[job.key]
+            try:
+                records, watermark = futures[job.key].result()
+            except Exception as e:
+                logger.warning(f"Sync job {job.key} failed: {e!r}")
+                results[job.key] = e
+                state["failures"] += 1
+                records = None
+            else:
+                results[job.key] = len(records)
+                state["watermark"] = watermark
+                state["failures"] = 0
+
+            if records:
+                state["interval"] = job.interval
+            else:
+                state["interval"] = min(state["interval"] * job.backoff, job.max_interval)
+            state["next_run"] = job.next_run(state["watermark"], self.clock(), state["interval"])
+
+        if due:
+            self._save_state()
+        return results
+
+    def seconds_until_due(self):
+        """
+        :returns: Seconds until the next job is due, zero if any job is already due.
+        :rtype: float
+        """
+        now = self.clock()
+        return max(0.0, min((state["next_run"] for state in self.state.values()), default=now + 60) - now)
+
+    def run_forever(self):
+        """
+        Runs jobs as they become due until close is called.
+        """
+        while not self._stop.is_set():
+            self.run_pending()
+            self._stop.wait(self.seconds_until_due())
@@ -0,0 +1,360 @@
+import base64
+import gzip
+import http.client
+import json
+import socket
+import threading
+import time
+from urllib.parse import urlsplit
+from .metrics import record_connection
+
+
+# Status codes which are worth retrying: rate limiting and transient server errors.
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def retry_delay(retry_after, attempt, backoff_factor):
+    """
+    Calculates how long to wait before retrying a request.
+
+    A Retry-After header given in seconds takes precedence, otherwise exponential backoff is used.
+
+    :param str retry_after: The value of the Retry-After header, or None.
+    :param int attempt: The number of attempts made so far, starting from 1.
+    :param float backoff_factor: Multiplier for the exponential backoff.
+    :returns: The delay in seconds.
+    :rtype: float
+    """
+    if retry_after is not None:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+
+    return backoff_factor * (2 ** (attempt - 1))
+
+
+def basic_auth(api_key):
+    """
+    The Authorization header for an API key, which is sent as the username with an empty password.
+
+    :param str api_key: The customer API key.
+    :rtype: str
+    """
+    return "Basic " + base64.b64encode(f"{api_key}:".encode("utf-8")).decode("ascii")
+
+
+class TransportResponse:
+    """
+    A response returned by a transport.
+
+    headers has lower-case names. content is the whole body, or None for a streamed response, whose body is read
+    with iter_content and which must be closed. elapsed is the time in seconds until the response headers
+    arrived, and retries lists the status of each earlier attempt which was retried (None for a connection error).
+    """
+    __slots__ = ("status_code", "headers", "content", "elapsed", "retries", "_iter_content", "_close")
+
+    def __init__(self, status_code, headers, content=None, elapsed=0.0, retries=(), iter_content=None, close=None):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.elapsed = elapsed
+        self.retries = list(retries)
+        self._iter_content = iter_content
+        self._close = close
+
+    def __repr__(self):
+        return f"TransportResponse(status_code={self.status_code})"
+
+    def iter_content(self, chunk_size):
+        """
+        Iterates over the body in chunks of up to chunk_size bytes.
+
+        :param int chunk_size: Number of bytes to read at a time.
+        """
+        if self._iter_content is None:
+            for start in range(0, len(self.content), chunk_size):
+                yield self.content[start:start + chunk_size]
+        else:
+            yield from self._iter_content(chunk_size)
+
+    def close(self):
+        if self._close is not None:
+            self._close()
+
+
+class Transport:
+    """
+    Interface of the HTTP backends used by OctopusEnergy to make requests.
+
+    A transport makes authenticated GET requests, retries them as it sees fit and returns a TransportResponse.
+    It may be shared between clients and threads.
+    """
+    def get(self, url, api_key, timeout=None, stream=False):
+        """
+        Makes an authenticated GET request.
+
+        :param str url: The URL to request.
+        :param str api_key: The customer API key, sent with HTTP basic authentication.
+        :param float timeout: (optional) Seconds to wait for the server before giving up.
+        :param bool stream: (optional, default False) Return before reading the body, which is then read with iter_content.
+        :rtype: TransportResponse
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """
+        Closes any connections held by the transport.
+        """
+
+
+class RequestsTransport(Transport):
+    """
+    Transport making requests with a requests Session, by default a pooled keep-alive session with retries from
+    create_session. requests is only imported when the transport is created.
+    """
+    def __init__(self, session=None):
+        """
+        :param requests.Session session: (optional) Session used for all requests. Default: create_session()
+        """
+        if session is None:
+            from .session import create_session
+            session = create_session()
+        self.session = session
+
+    def get(self, url, api_key, timeout=None, stream=False):
+        r = self.session.get(url, auth=(api_key + ':', ''), timeout=timeout, stream=stream)
+
+        retries = getattr(r.raw, "retries", None)
+        history = retries.history if retries is not None else ()
+
+        return TransportResponse(
+            r.status_code,
+            {name.lower(): value for name, value in r.headers.items()},
+            None if stream else r.content,
+            r.elapsed.total_seconds(),
+            [attempt.status for attempt in history],
+            r.iter_content if stream else None,
+            r.close
+        )
+
+    def close(self):
+        self.session.close()
+
+
+class UrllibTransport(Transport):
+    """
+    Transport using only the standard library's http.client, for jobs which should not import requests.
+
+    Connections are kept alive in a pool per host and reused between requests. Requests which fail to connect or
+    return one of status_forcelist are retried with exponential backoff, honouring Retry-After, and once retries
+    are exhausted the last response is returned. A request on a pooled connection which the server has since
+    closed is retried at once on a new connection. Connection times are recorded for request instrumentation,
+    with name resolution included in the connect time.
+
+    e.g.
+
+        octopus_client = OctopusEnergy(transport=UrllibTransport())
+    """
+    def __init__(self, pool_maxsize=10, max_retries=3, backoff_factor=0.5, status_forcelist=RETRY_STATUSES, compress=True):
+        """
+        :param int pool_maxsize: (optional, default 10) Maximum number of idle connections kept open per host.
+        :param int max_retries: (optional, default 3) Maximum number of retries per request.
+        :param float backoff_factor: (optional, default 0.5) Multiplier for the exponential backoff between retries.
+        :param tuple status_forcelist: (optional) HTTP status codes which should be retried.
+        :param bool compress: (optional, default True) Ask for gzip compressed responses, other than streamed ones.
+        """
+        self.pool_maxsize = pool_maxsize
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.status_forcelist = tuple(status_forcelist)
+        self.compress = compress
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def _connection(self, scheme, netloc, timeout):
+        # Returns an idle pooled connection, or a new connection, and whether it was pooled.
+        with self._lock:
+            idle = self._pools.get((scheme, netloc))
+            if idle:
+                connection = idle.pop()
+                connection.timeout = timeout
+                if connection.sock is not None:
+                    connection.sock.settimeout(timeout)
+                return connection, True
+
+        connection_class = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        connection = connection_class(netloc, timeout=timeout)
+        start = time.perf_counter()
+        connection.connect()
+        connection.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        record_connection(0.0, time.perf_counter() - start)
+        return connection, False
+
+    def _release(self, scheme, netloc, connection, response):
+        if response.will_close or not response.isclosed():
+            connection.close()
+            return
+
+        with self._lock:
+            idle = self._pools.setdefault((scheme, netloc), [])
+            if len(idle) < self.pool_maxsize:
+                idle.append(connection)
+                return
+        connection.close()
+
+    def _attempt(self, scheme, netloc, target, headers, timeout):
+        # Sends one request, retrying once on a new connection if a pooled connection turns out to be closed.
+        while True:
+            connection, pooled = self._connection(scheme, netloc, timeout)
+            try:
+                connection.request("GET", target, headers=headers)
+                return connection, connection.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                connection.close()
+                if not pooled:
+                    raise
+            except Exception:
+                connection.close()
+                raise
+
+    def get(self, url, api_key, timeout=None, stream=False):
+        parts = urlsplit(url)
+        scheme, netloc = parts.scheme, parts.netloc
+        target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        headers = {"Authorization": basic_auth(api_key), "Accept": "application/json"}
+        if self.compress and not stream:
+            headers["Accept-Encoding"] = "gzip"
+
+        start = time.perf_counter()
+        retries = []
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                connection, response = self._attempt(scheme, netloc, target, headers, timeout)
+            except (OSError, http.client.HTTPException):
+                if attempt > self.max_retries:
+                    raise
+                retries.append(None)
+                time.sleep(retry_delay(None, attempt, self.backoff_factor))
+                continue
+
+            response_headers = {name.lower(): value for name, value in response.getheaders()}
+            elapsed = time.perf_counter() - start
+
+            if response.status in self.status_forcelist and attempt <= self.max_retries:
+                response.read()
+                self._release(scheme, netloc, connection, response)
+                retries.append(response.status)
+                time.sleep(retry_delay(response_headers.get("retry-after"), attempt, self.backoff_factor))
+                continue
+
+            if stream:
+                def close(connection=connection, response=response):
+                    # Connections are only reused once the body has been read to the end.
+                    self._release(scheme, netloc, connection, response)
+
+                def iter_content(chunk_size, response=response):
+                    while True:
+                        chunk = response.read(chunk_size)
+                        if not chunk:
+                            return
+                        yield chunk
+
+                return TransportResponse(response.status, response_headers, None, elapsed, retries, iter_content, close)
+
+            content = response.read()
+            self._release(scheme, netloc, connection, response)
+            if response_headers.get("content-encoding") == "gzip":
+                content = gzip.decompress(content)
+            return TransportResponse(response.status, response_headers, content, elapsed, retries)
+
+    def close(self):
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for idle in pools.values():
+            for connection in idle:
+                connection.close()
+
+
+class ReplayTransport(Transport):
+    """
+    Transport answering requests from recorded responses, for tests and benchmarks which run offline.
+
+    Responses are matched by URL. A URL which has not been recorded is passed to the wrapped transport, if there
+    is one, and its response recorded; otherwise a 404 response is returned. Recordings can be saved to and loaded
+    from a JSON file. Every requested URL is appended to requests.
+
+    e.g.
+
+        recorder = ReplayTransport(transport=UrllibTransport())
+        OctopusEnergy(transport=recorder).get_meter_point(ResourceType.ELECTRICITY)
+        recorder.save("recordings.json")
+
+        OctopusEnergy(transport=ReplayTransport.load("recordings.json")).get_meter_point(ResourceType.ELECTRICITY)
+    """
+    def __init__(self, recordings=None, transport=None):
+        """
+        :param dict recordings: (optional) Responses keyed by URL, each a dictionary of status, headers and body (text).
+        :param Transport transport: (optional) Transport which answers, and records, URLs which have not been recorded.
+        """
+        self.recordings = dict(recordings or {})
+        self.transport = transport
+        self.requests = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path, transport=None):
+        """
+        Loads recordings saved with save.
+
+        :param str path: The file to load.
+        :param Transport transport: (optional) Transport which answers, and records, URLs which have not been recorded.
+        :rtype: ReplayTransport
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f), transport)
+
+    def save(self, path):
+        """
+        Saves the recordings to a JSON file.
+
+        :param str path: The file to write.
+        """
+        with self._lock:
+            recordings = dict(self.recordings)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(recordings, f, indent=1, sort_keys=True)
+
+    def add(self, url, body, status=200, headers=None):
+        """
+        Records a response.
+
+        :param str url: The URL the response is for.
+        :param body: The body, as a json-serializable object, text or bytes.
+        :param int status: (optional, default 200) The status code.
+        :param dict headers: (optional) The response headers.
+        """
+        if isinstance(body, bytes):
+            body = body.decode("utf-8")
+        elif not isinstance(body, str):
+            body = json.dumps(body)
+
+        with self._lock:
+            self.recordings[url] = {"status": status, "headers": {name.lower(): value for name, value in (headers or {}).items()}, "body": body}
+
+    def get(self, url, api_key, timeout=None, stream=False):
+        with self._lock:
+            self.requests.append(url)
+            recording = self.recordings.get(url)
+
+        if recording is None:
+            if self.transport is None:
+                return TransportResponse(404, {"content-type": "application/json"}, b'{"detail": "Not found."}')
+
+            r = self.transport.get(url, api_key, timeout)
+            self.add(url, r.content, r.status_code, r.headers)
+            return r
+
+        return TransportResponse(recording["status"], dict(recording["headers"]), recording["body"].encode("utf-8"))
@@ -1,3 +1,15 @@
+import calendar
+import datetime
+from array import array
+
+
+# Length of a half-hourly consumption interval or unit rate window, in seconds.
+HALF_HOUR = 30 * 60
+
+# Timestamp used for open-ended tariff windows, i.e. those with a valid_to of null.
+OPEN_ENDED = 2 ** 63 - 1
+
+
 def iso_format(dt):
     """
     Converts a python datetime to an ISO-8601 standard string.
@@ -11,3 +23,119 @@ def iso_format(dt):
     :rtype: str
     """
     return dt.isoformat().replace('+00:00', 'Z')
+
+
+def to_timestamp(value):
+    """
+    Converts a datetime or an ISO-8601 string, as returned by the API, to seconds since the epoch.
+
+    Naive datetimes are assumed to be UTC. e.g:
+        "2022-01-01T00:30:00Z" => 1640997000
+        "2022-06-01T00:30:00+01:00" => 1654039800
+
+    :param value: The time to convert, either a datetime.datetime or an ISO-8601 string.
+    :returns: Seconds since the epoch.
+    :rtype: int
+    """
+    if isinstance(value, str):
+        value = datetime.datetime.strptime(value.replace("Z", "+00:00"), "%Y-%m-%dT%H:%M:%S%z")
+
+    return calendar.timegm(value.utctimetuple())
+
+
+def from_timestamp(ts):
+    """
+    Converts seconds since the epoch to a UTC datetime.
+
+    :param int ts: Seconds since the epoch.
+    :returns: A timezone-aware datetime in UTC.
+    :rtype: datetime.datetime
+    """
+    return datetime.datetime.fromtimestamp(ts, tz=datetime.timezone.utc)
+
+
+def missing_ranges(starts, period_from, period_to, interval=HALF_HOUR):
+    """
+    Finds the interval slots between period_from (inclusive) and period_to (exclusive) which are absent from starts,
+    merged into contiguous ranges.
+
+    e.g. with half-hourly starts for 00:00 and 01:30, between 00:00 and 03:00 =>
+        [(00:30, 01:30), (02:00, 03:00)]
+
+    :param iterable starts: The interval start times which are present, in seconds since the epoch.
+    :param int period_from: The start of the period to check, in seconds since the epoch.
+    :param int period_to: The end of the period to check, in seconds since the epoch.
+    :param int interval: (optional, default HALF_HOUR) The length of each interval in seconds.
+    :returns: A list of (start, end) tuples in seconds since the epoch.
+    :rtype: list
+    """
+    present = set(starts)
+    ranges = []
+    gap_start = None
+
+    for slot in range(period_from + (-period_from % interval), period_to, interval):
+        if slot in present:
+            if gap_start is not None:
+                ranges.append((gap_start, slot))
+                gap_start = None
+        elif gap_start is None:
+            gap_start = slot
+
+    if gap_start is not None:
+        ranges.append((gap_start, period_to))
+
+    return ranges
+
+
+def _utc_offset(suffix):
+    # Parses the part of an ISO-8601 string after the seconds, e.g. "Z", "+01:00" or ".000+01:00", into seconds.
+    suffix = suffix.lstrip(".0123456789")
+    if suffix in ("", "Z"):
+        return 0
+
+    sign = -1 if suffix[0] == "-" else 1
+    return sign * (int(suffix[1:3]) * 3600 + int(suffix[4:6]) * 60)
+
+
+def parse_timestamps(values, default=OPEN_ENDED):
+    """
+    Converts a sequence of ISO-8601 strings, as returned by the API, to seconds since the epoch in bulk.
+
+    Dates, times of day and UTC offsets repeat heavily across a series of intervals, so each distinct part is
+    parsed once and cached rather than building a datetime for every value.
+
+    e.g. ["2022-01-01T00:00:00Z", "2022-06-01T00:30:00+01:00", None] => array('q', [1640995200, 1654039800, OPEN_ENDED])
+
+    :param iterable values: ISO-8601 strings, or None.
+    :param int default: (optional, default OPEN_ENDED) Timestamp used in place of None values.
+    :returns: An array of 64-bit timestamps.
+    :rtype: array.array
+    """
+    dates = {}
+    times = {}
+    offsets = {}
+    result = array("q")
+    append = result.append
+
+    for value in values:
+        if value is None:
+            append(default)
+            continue
+
+        date, time, suffix = value[:10], value[11:19], value[19:]
+
+        day = dates.get(date)
+        if day is None:
+            day = dates[date] = calendar.timegm((int(date[:4]), int(date[5:7]), int(date[8:10]), 0, 0, 0))
+
+        seconds = times.get(time)
+        if seconds is None:
+            seconds = times[time] = int(time[:2]) * 3600 + int(time[3:5]) * 60 + int(time[6:8])
+
+        offset = offsets.get(suffix)
+        if offset is None:
+            offset = offsets[suffix] = _utc_offset(suffix)
+
+        append(day + seconds - offset)
+
+    return result
@@ -0,0 +1,144 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+from octopus_energy_client.util import to_timestamp
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.stub.connection_opened()
+
+    def do_GET(self):
+        status, headers, body = self.server.stub.next_response(self.path)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer:
+    """
+    A local HTTP/1.1 server which replays queued JSON responses and counts the connections opened to it.
+
+    Responses are queued per path (ignoring the query string) and returned in order, with the last queued
+    response repeated once the queue is exhausted. Paths may also be mapped to a callable taking the request
+    path and returning a (status, headers, json_body) tuple.
+    """
+    def __init__(self):
+        self.connections = 0
+        self.requests = []
+        self._routes = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def url(self, path):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}{path}"
+
+    def add(self, path, json_body=None, status=200, headers=None):
+        with self._lock:
+            self._routes.setdefault(path, []).append((status, headers or {}, json_body))
+
+    def route(self, path, handler):
+        with self._lock:
+            self._routes[path] = handler
+
+    def connection_opened(self):
+        with self._lock:
+            self.connections += 1
+
+    def next_response(self, request_path):
+        path = urlsplit(request_path).path
+        with self._lock:
+            self.requests.append(request_path)
+            route = self._routes.get(path)
+            if route is None:
+                status, headers, body = 404, {}, {"detail": "Not found."}
+            elif not callable(route):
+                status, headers, body = route.pop(0) if len(route) > 1 else route[0]
+
+        if callable(route):
+            status, headers, body = route(request_path)
+
+        return status, headers, json.dumps(body).encode("utf-8")
+
+
+def paginated(server, results, delay=0):
+    """
+    Route handler which serves the given results in pages, following the API's page and page_size parameters.
+
+    :param StubServer server: The server the route is added to, used to build next and previous links.
+    :param list results: All results available from the endpoint.
+    :param float delay: (optional) Seconds to wait before responding.
+    """
+    def handler(request_path):
+        if delay:
+            time.sleep(delay)
+
+        query = parse_qs(urlsplit(request_path).query)
+        page_size = int(query.get("page_size", ["100"])[0])
+        page = int(query.get("page", ["1"])[0])
+        start = (page - 1) * page_size
+        if start >= len(results) and page != 1:
+            return 404, {}, {"detail": "Invalid page."}
+
+        path = urlsplit(request_path).path
+        has_next = start + page_size < len(results)
+        return 200, {}, {
+            "count": len(results),
+            "next": server.url(f"{path}?page={page + 1}&page_size={page_size}") if has_next else None,
+            "previous": server.url(f"{path}?page={page - 1}&page_size={page_size}") if page > 1 else None,
+            "results": results[start:start + page_size]
+        }
+
+    return handler
+
+
+def period_handler(server, records, key_from, key_to):
+    """
+    Route handler serving the records which overlap the requested period, including any which start exactly at
+    period_to, as the API does.
+    """
+    def handler(request_path):
+        query = parse_qs(urlsplit(request_path).query)
+        period_from = to_timestamp(query["period_from"][0])
+        period_to = to_timestamp(query["period_to"][0])
+        page_size = int(query["page_size"][0])
+        page = int(query.get("page", ["1"])[0])
+
+        matching = [
+            r for r in records
+            if (r[key_to] is None or to_timestamp(r[key_to]) > period_from) and to_timestamp(r[key_from]) <= period_to
+        ]
+        start = (page - 1) * page_size
+        has_next = start + page_size < len(matching)
+        return 200, {}, {
+            "count": len(matching),
+            "next": server.url(f"{request_path.split('&page=')[0]}&page={page + 1}") if has_next else None,
+            "previous": None,
+            "results": matching[start:start + page_size]
+        }
+
+    return handler
@@ -0,0 +1,113 @@
+from octopus_energy_client import Aggregate, ConsumptionSeries, ConsumptionAggregator, aggregate
+from octopus_energy_client.localtime import np
+from octopus_energy_client.util import to_timestamp
+from octopus_energy_client import aggregation
+from unittest import mock
+import unittest
+import datetime
+import pytz
+
+
+def half_hours(start, count, value=1.0):
+    return [
+        {
+            "consumption": value,
+            "interval_start": (start + datetime.timedelta(minutes=30 * i)).isoformat(),
+            "interval_end": (start + datetime.timedelta(minutes=30 * (i + 1))).isoformat(),
+        }
+        for i in range(count)
+    ]
+
+
+def utc(*args):
+    return to_timestamp(datetime.datetime(*args, tzinfo=pytz.utc))
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestAggregate(unittest.TestCase):
+    def test_dst_days(self):
+        # 2022-03-27 is 23 hours long and 2022-10-30 is 25 hours long in Europe/London.
+        for start, days, lengths in (
+            (datetime.datetime(2022, 3, 26, tzinfo=pytz.utc), 3, [48, 46, 48]),
+            (datetime.datetime(2022, 10, 28, 23, tzinfo=pytz.utc), 3, [48, 50, 48]),
+        ):
+            with self.subTest(start=start):
+                count = sum(lengths)
+                daily = aggregate(half_hours(start, count), [Aggregate.DAILY])[Aggregate.DAILY]
+                self.assertEqual(list(daily.consumption), lengths)
+                self.assertEqual([end - start for start, end in zip(daily.interval_start, daily.interval_end)], [n * 1800 for n in lengths])
+
+    def test_every_level(self):
+        start = datetime.datetime(2021, 12, 31, 0, tzinfo=pytz.utc)
+        levels = aggregate(half_hours(start, 48 * 100))
+
+        self.assertEqual(len(levels[Aggregate.HOURLY]), 24 * 100)
+        self.assertEqual(set(levels[Aggregate.HOURLY].consumption), {2.0})
+
+        weekly = levels[Aggregate.WEEKLY]
+        self.assertEqual(weekly.interval_start[0], utc(2021, 12, 27))
+        self.assertEqual(weekly.interval_start[1], utc(2022, 1, 3))
+        self.assertEqual(weekly.consumption[0], 48 * 3)
+
+        monthly = levels[Aggregate.MONTHLY]
+        self.assertEqual(list(monthly.interval_start), [utc(2021, 12, 1), utc(2022, 1, 1), utc(2022, 2, 1), utc(2022, 3, 1), utc(2022, 3, 31, 23)])
+        self.assertEqual(list(monthly.consumption), [48, 48 * 31, 48 * 28, 48 * 31 - 2, 48 * 9 + 2])
+
+        quarterly = levels[Aggregate.QUARTERLY]
+        self.assertEqual(list(quarterly.interval_start), [utc(2021, 9, 30, 23), utc(2022, 1, 1), utc(2022, 3, 31, 23)])
+        self.assertEqual(list(quarterly.interval_end), [utc(2022, 1, 1), utc(2022, 3, 31, 23), utc(2022, 6, 30, 23)])
+
+        for series in levels.values():
+            self.assertAlmostEqual(sum(series.consumption), 48 * 100)
+
+    def test_empty(self):
+        levels = aggregate(ConsumptionSeries())
+        self.assertTrue(all(len(series) == 0 for series in levels.values()))
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestConsumptionAggregator(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.start = datetime.datetime(2022, 1, 1, tzinfo=pytz.utc)
+        self.aggregator = ConsumptionAggregator(half_hours(self.start, 48 * 10), clock=lambda: utc(2023, 1, 1))
+
+    def test_matches_aggregate(self):
+        expected = aggregate(half_hours(self.start, 48 * 10))
+        for level, series in self.aggregator.get_all().items():
+            self.assertEqual(list(series.interval_start), list(expected[level].interval_start))
+            self.assertEqual(list(series.consumption), list(expected[level].consumption))
+
+        self.assertEqual(len(self.aggregator.get(Aggregate.HALF_HOURLY)), 48 * 10)
+
+    def test_completed_periods_are_cached(self):
+        self.aggregator.get(Aggregate.DAILY)
+
+        with mock.patch.object(aggregation, "local_days", wraps=aggregation.local_days) as local_days:
+            self.aggregator.get(Aggregate.DAILY)
+            self.assertEqual(len(local_days.call_args[0][0]), 0)
+
+            self.aggregator.extend(half_hours(self.start + datetime.timedelta(days=10), 24, value=2.0))
+            daily = self.aggregator.get(Aggregate.DAILY)
+            self.assertEqual(len(local_days.call_args[0][0]), 24)
+
+        self.assertEqual(len(daily), 11)
+        self.assertEqual(daily.consumption[10], 48)
+
+    def test_incomplete_periods_are_not_cached(self):
+        aggregator = ConsumptionAggregator(half_hours(self.start, 36), clock=lambda: utc(2022, 1, 1, 18))
+        self.assertEqual(list(aggregator.get(Aggregate.DAILY).consumption), [36])
+
+        aggregator.extend(half_hours(self.start + datetime.timedelta(hours=18), 12))
+        self.assertEqual(list(aggregator.get(Aggregate.DAILY).consumption), [48])
+
+    def test_backfill_invalidates_cache(self):
+        self.aggregator.get(Aggregate.DAILY)
+        self.aggregator.extend(half_hours(self.start, 1, value=10.0))
+
+        self.assertEqual(self.aggregator.get(Aggregate.DAILY).consumption[0], 57)
+        self.assertEqual(len(self.aggregator), 48 * 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,191 @@
+from octopus_energy_client import AsyncOctopusEnergy, ResourceType, ChargeType, RateLimiter, MetricsCollector, AsyncSingleFlight
+from octopus_energy_client.async_client import aiohttp
+from stub_server import StubServer, paginated
+import unittest
+import asyncio
+import datetime
+import time
+import pytz
+
+
+@unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+class TestAsyncClient(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.server = StubServer().__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+
+        self.client = AsyncOctopusEnergy(
+            api_key="123456",
+            electricity_serial="abc1234",
+            electricity_mpan="1234567890",
+            electricity_product_code="21JBLAH",
+            electricity_region="Z",
+            gas_serial="cba4321",
+            gas_mprn="0987654321",
+            max_concurrency=4,
+            backoff_factor=0
+        )
+        self.client.base_url = self.server.url("/v1")
+
+    async def asyncTearDown(self):
+        await self.client.close()
+
+    def consumption(self, count):
+        start = datetime.datetime(2022, 1, 1, tzinfo=pytz.utc)
+        return [
+            {
+                "consumption": float(i),
+                "interval_start": (start + datetime.timedelta(minutes=30 * i)).isoformat(),
+                "interval_end": (start + datetime.timedelta(minutes=30 * (i + 1))).isoformat(),
+            }
+            for i in range(count)
+        ]
+
+    async def test_get_meter_point(self):
+        expected = {'gsp': '_C', 'mpan': '1234567890', 'profile_class': 1}
+        self.server.add("/v1/electricity-meter-points/1234567890", expected)
+
+        response = await self.client.get_meter_point(ResourceType.ELECTRICITY)
+        self.assertDictEqual(response, expected)
+
+    async def test_get_grid_supply_points_with_postcode(self):
+        expected = {"count": 1, "next": None, "previous": None, "results": [{"group_id": "_A"}]}
+        self.server.add("/v1/industry/grid-supply-points", expected)
+
+        response = await self.client.get_grid_supply_points("SW1A1AA")
+        self.assertDictEqual(response, expected)
+        self.assertEqual(self.server.requests, ["/v1/industry/grid-supply-points?postcode=SW1A1AA"])
+
+    async def test_get_consumption_single_page(self):
+        results = self.consumption(250)
+        self.server.route("/v1/electricity-meter-points/1234567890/meters/abc1234/consumption", paginated(self.server, results))
+
+        response = await self.client.get_consumption_for_period(
+            ResourceType.ELECTRICITY,
+            datetime.datetime(2022, 1, 1, tzinfo=pytz.utc),
+            datetime.datetime(2022, 1, 7, tzinfo=pytz.utc),
+            page=2
+        )
+        self.assertEqual(response["count"], 250)
+        self.assertEqual(response["results"], results[100:200])
+        self.assertEqual(len(self.server.requests), 1)
+
+    async def test_get_consumption_all_pages(self):
+        results = self.consumption(950)
+        self.server.route("/v1/electricity-meter-points/1234567890/meters/abc1234/consumption", paginated(self.server, results, delay=0.1))
+
+        start = time.perf_counter()
+        response = await self.client.get_consumption_for_period(
+            ResourceType.ELECTRICITY,
+            datetime.datetime(2022, 1, 1, tzinfo=pytz.utc),
+            datetime.datetime(2022, 1, 31, tzinfo=pytz.utc),
+            all_pages=True
+        )
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(response["count"], 950)
+        self.assertIsNone(response["next"])
+        self.assertEqual(response["results"], results)
+        self.assertEqual(len(self.server.requests), 10)
+        # One request for the first page, then three rounds of four concurrent requests.
+        self.assertLess(elapsed, 0.9)
+
+    async def test_get_tariff_data_all_pages(self):
+        results = [{"value_exc_vat": float(i), "value_inc_vat": float(i), "valid_from": None, "valid_to": None} for i in range(120)]
+        self.server.route("/v1/products/21JBLAH/electricity-tariffs/E-1R-21JBLAH-Z/standard-unit-rates", paginated(self.server, results))
+
+        response = await self.client.get_tariff_data(ResourceType.ELECTRICITY, ChargeType.STANDARD_UNIT_RATES, page_size=50, all_pages=True)
+        self.assertEqual(response["results"], results)
+        self.assertEqual(len(self.server.requests), 3)
+
+    async def test_retry_after_rate_limit(self):
+        expected = {'gsp': '_C', 'mpan': '1234567890', 'profile_class': 1}
+        self.server.add("/v1/electricity-meter-points/1234567890", {"detail": "Request was throttled."}, status=429, headers={"Retry-After": "0"})
+        self.server.add("/v1/electricity-meter-points/1234567890", expected)
+
+        response = await self.client.get_meter_point(ResourceType.ELECTRICITY)
+        self.assertDictEqual(response, expected)
+        self.assertEqual(len(self.server.requests), 2)
+
+    async def test_rate_limiter(self):
+        self.client.rate_limiter = RateLimiter(rate=10, burst=10, recovery=1)
+        expected = {'gsp': '_C', 'mpan': '1234567890', 'profile_class': 1}
+        self.server.add("/v1/electricity-meter-points/1234567890", {"detail": "Request was throttled."}, status=429, headers={"Retry-After": "0"})
+        self.server.add("/v1/electricity-meter-points/1234567890", expected)
+
+        response = await self.client.get_meter_point(ResourceType.ELECTRICITY)
+        self.assertDictEqual(response, expected)
+        self.assertEqual(self.client.rate_limiter.stats(), {"rate": 6, "waiting": 0, "throttled": 1})
+
+    async def test_hooks(self):
+        events = []
+        metrics = MetricsCollector()
+        self.client.hooks = [events.append, metrics]
+        self.server.add("/v1/electricity-meter-points/1234567890", {"detail": "Request was throttled."}, status=429, headers={"Retry-After": "0"})
+        self.server.add("/v1/electricity-meter-points/1234567890", {'gsp': '_C', 'mpan': '1234567890', 'profile_class': 1})
+
+        await self.client.get_meter_point(ResourceType.ELECTRICITY)
+
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0].status, 200)
+        self.assertEqual(events[0].retries, 1)
+        self.assertGreater(events[0].bytes, 0)
+        self.assertLessEqual(events[0].ttfb, events[0].total)
+        self.assertEqual(metrics.snapshot()["/v1/electricity-meter-points/{mpan}"]["requests"], {200: 1})
+
+
+    async def test_timeout_retried(self):
+        expected = {'gsp': '_C', 'mpan': '1234567890', 'profile_class': 1}
+        calls = []
+
+        def slow_first(request_path):
+            calls.append(request_path)
+            if len(calls) == 1:
+                time.sleep(0.5)
+            return 200, {}, expected
+
+        self.server.route("/v1/electricity-meter-points/1234567890", slow_first)
+        self.client.timeout = 0.2
+
+        response = await self.client.get_meter_point(ResourceType.ELECTRICITY)
+        self.assertDictEqual(response, expected)
+        self.assertEqual(len(calls), 2)
+
+    async def test_errors_reported_to_hooks(self):
+        events = []
+        self.client.hooks = [events.append]
+        self.client.max_retries = 0
+        self.client.timeout = 0.2
+
+        def slow(request_path):
+            time.sleep(0.5)
+            return 200, {}, {}
+
+        self.server.route("/v1/electricity-meter-points/1234567890", slow)
+        with self.assertRaises(asyncio.TimeoutError):
+            await self.client.get_meter_point(ResourceType.ELECTRICITY)
+
+        # Errors other than connection failures and timeouts are reported too.
+        with self.assertRaises(aiohttp.InvalidURL):
+            await self.client.get_data("not a url")
+
+        self.assertEqual(len(events), 2)
+        self.assertIsNone(events[0].status)
+        self.assertIn("Timeout", events[0].error)
+        self.assertIsNotNone(events[1].error)
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+    async def test_single_flight(self):
+        self.client.single_flight = AsyncSingleFlight()
+        self.server.route("/v1/products/21JBLAH/electricity-tariffs/E-1R-21JBLAH-Z/standard-unit-rates", paginated(self.server, [{"value_inc_vat": 21.0}], delay=0.2))
+        url = self.client.tariff_data_url(ResourceType.ELECTRICITY, ChargeType.STANDARD_UNIT_RATES)
+
+        responses = await asyncio.gather(*[self.client.get_data(url) for _ in range(5)])
+
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertTrue(all(response is responses[0] for response in responses))
+        self.assertEqual(self.client.single_flight.stats(), {"calls": 1, "coalesced": 4, "in_flight": 0})
@@ -0,0 +1,178 @@
+from octopus_energy_client import OctopusEnergy, ResourceType, ChargeType, ResponseCache, MemoryCache, DiskCache
+from octopus_energy_client.cache import endpoint_kind
+import unittest
+import responses
+import datetime
+import os
+import tempfile
+import pytz
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestCache(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.clock = Clock(datetime.datetime(2022, 6, 1, tzinfo=pytz.utc).timestamp())
+        self.cache = ResponseCache(clock=self.clock)
+        self.client = OctopusEnergy(
+            api_key="123456",
+            electricity_serial="abc1234",
+            electricity_mpan="1234567890",
+            electricity_product_code="21JBLAH",
+            electricity_region="Z",
+            gas_serial="cba4321",
+            gas_mprn="0987654321",
+            cache=self.cache
+        )
+
+    def test_endpoint_kind(self):
+        self.assertEqual(endpoint_kind(self.client.meter_url(ResourceType.GAS)), "meter_point")
+        self.assertEqual(endpoint_kind(self.client.grid_supply_points_url("SW1A1AA")), "grid_supply_points")
+        self.assertEqual(endpoint_kind(self.client.tariff_data_url(ResourceType.ELECTRICITY, ChargeType.STANDING_CHARGES)), "tariff")
+        self.assertEqual(endpoint_kind(self.client.consumption_url(ResourceType.ELECTRICITY)), "consumption")
+        self.assertEqual(endpoint_kind("https://api.octopus.energy/v1/products/"), "other")
+
+    def test_ttl_for(self):
+        historical = self.client.tariff_data_url(
+            ResourceType.ELECTRICITY, ChargeType.STANDARD_UNIT_RATES,
+            datetime.datetime(2022, 1, 1, tzinfo=pytz.utc), datetime.datetime(2022, 2, 1, tzinfo=pytz.utc)
+        )
+        current = self.client.tariff_data_url(
+            ResourceType.ELECTRICITY, ChargeType.STANDARD_UNIT_RATES,
+            datetime.datetime(2022, 5, 1, tzinfo=pytz.utc), datetime.datetime(2022, 7, 1, tzinfo=pytz.utc)
+        )
+
+        self.assertIsNone(self.cache.ttl_for(historical))
+        self.assertEqual(self.cache.ttl_for(current), 30 * 60)
+        self.assertEqual(self.cache.ttl_for(self.client.meter_url(ResourceType.GAS)), 24 * 60 * 60)
+        self.assertEqual(self.cache.ttl_for(self.client.consumption_url(ResourceType.GAS)), 0)
+
+    def test_ttl_for_offsets(self):
+        url = "https://api.octopus.energy/v1/products/AGILE-18-02-21/electricity-tariffs/E-1R-AGILE-18-02-21-C/standard-unit-rates/"
+        # A literal + in a UTC offset is not decoded as a space.
+        self.assertIsNone(self.cache.ttl_for(url + "?period_from=2022-01-01T00:00:00+00:00&period_to=2022-02-01T00:00:00+01:00"))
+        self.assertIsNone(self.cache.ttl_for(url + "?period_to=2022-02-01T00:00:00%2B01:00"))
+        self.assertEqual(self.cache.ttl_for(url + "?period_to=2022-07-01T00:00:00+01:00"), 30 * 60)
+        # A period_to which cannot be parsed gets the default time to live, rather than raising.
+        self.assertEqual(self.cache.ttl_for(url + "?period_to=yesterday"), 30 * 60)
+
+        self.cache.set(url + "?period_to=2022-02-01T00:00:00+00:00", b'{"count": 0}')
+        self.assertEqual(self.cache.get(url + "?period_to=2022-02-01T00:00:00+00:00"), {"count": 0})
+
+    @responses.activate
+    def test_get_meter_point_cached(self):
+        url = self.client.meter_url(ResourceType.ELECTRICITY)
+        expected = {'gsp': '_C', 'mpan': '1234567890', 'profile_class': 1}
+        responses.add(responses.GET, url, json=expected, status=200)
+
+        for _ in range(3):
+            self.assertDictEqual(self.client.get_meter_point(ResourceType.ELECTRICITY), expected)
+
+        responses.assert_call_count(url, 1)
+        self.assertEqual(self.cache.stats()["hits"], 2)
+        self.assertEqual(self.cache.stats()["misses"], 1)
+
+        # Expires after a day.
+        self.clock.now += 24 * 60 * 60
+        self.client.get_meter_point(ResourceType.ELECTRICITY)
+        responses.assert_call_count(url, 2)
+
+    @responses.activate
+    def test_cache_shared_between_accounts(self):
+        url = self.client.meter_url(ResourceType.ELECTRICITY)
+        responses.add(responses.GET, url, json={'gsp': '_C', 'mpan': '1234567890', 'profile_class': 1}, status=200)
+
+        other = OctopusEnergy(
+            api_key="654321",
+            electricity_serial="abc1234",
+            electricity_mpan="1234567890",
+            gas_serial="cba4321",
+            gas_mprn="0987654321",
+            cache=self.cache
+        )
+
+        # A response cached for one API key is never returned for another.
+        self.client.get_meter_point(ResourceType.ELECTRICITY)
+        other.get_meter_point(ResourceType.ELECTRICITY)
+        responses.assert_call_count(url, 2)
+
+        other.get_meter_point(ResourceType.ELECTRICITY)
+        responses.assert_call_count(url, 2)
+        self.assertEqual(self.cache.stats()["entries"], 2)
+
+    @responses.activate
+    def test_errors_not_cached(self):
+        url = self.client.meter_url(ResourceType.ELECTRICITY)
+        responses.add(responses.GET, url, json={"detail": "Not found."}, status=404)
+
+        self.client.get_meter_point(ResourceType.ELECTRICITY)
+        self.client.get_meter_point(ResourceType.ELECTRICITY)
+        responses.assert_call_count(url, 2)
+
+    @responses.activate
+    def test_consumption_not_cached(self):
+        period_from = datetime.datetime(2022, 1, 1, tzinfo=pytz.utc)
+        period_to = datetime.datetime(2022, 1, 2, tzinfo=pytz.utc)
+        url = self.client.consumption_data_url(ResourceType.ELECTRICITY, period_from, period_to)
+        responses.add(responses.GET, url, json={"count": 0, "next": None, "previous": None, "results": []}, status=200)
+
+        self.client.get_consumption_for_period(ResourceType.ELECTRICITY, period_from, period_to)
+        self.client.get_consumption_for_period(ResourceType.ELECTRICITY, period_from, period_to)
+        responses.assert_call_count(url, 2)
+
+    def test_memory_cache_lru_by_entries(self):
+        backend = MemoryCache(max_entries=2)
+        backend.set("a", b"1", None)
+        backend.set("b", b"2", None)
+        backend.get("a", 0)
+        backend.set("c", b"3", None)
+
+        self.assertEqual(backend.get("a", 0), b"1")
+        self.assertIsNone(backend.get("b", 0))
+        self.assertEqual(backend.get("c", 0), b"3")
+        self.assertEqual(backend.evictions, 1)
+
+    def test_memory_cache_lru_by_bytes(self):
+        backend = MemoryCache(max_entries=None, max_bytes=10)
+        backend.set("a", b"12345", None)
+        backend.set("b", b"12345", None)
+        backend.set("c", b"123", None)
+
+        self.assertIsNone(backend.get("a", 0))
+        self.assertEqual(len(backend), 2)
+        self.assertEqual(backend.size_bytes, 8)
+
+    def test_memory_cache_expiry(self):
+        backend = MemoryCache()
+        backend.set("a", b"1", 100)
+        self.assertEqual(backend.get("a", 99), b"1")
+        self.assertIsNone(backend.get("a", 100))
+        self.assertEqual(len(backend), 0)
+
+    def test_disk_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "cache.db")
+            backend = DiskCache(path, max_entries=2)
+            backend.set("a", b"1", None)
+            backend.set("b", b"2", 100)
+            backend.set("c", b"3", None)
+            self.assertIsNone(backend.get("a", 0))
+            self.assertEqual(backend.evictions, 1)
+            backend.close()
+
+            backend = DiskCache(path)
+            self.assertEqual(backend.get("c", 0), b"3")
+            self.assertIsNone(backend.get("b", 100))
+            self.assertEqual(len(backend), 1)
+            backend.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
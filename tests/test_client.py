@@ -1,4 +1,4 @@
-from octopus_energy_client import OctopusEnergy, ResourceType
+from octopus_energy_client import OctopusEnergy, ResourceType, ChargeType
 import unittest
 import mock
 import responses
@@ -129,6 +129,89 @@ class TestClient(unittest.TestCase):
         self.assertDictEqual(response, expected)
         responses.assert_call_count(url, 1)
 
+    def consumption_pages(self, url, page_size, count):
+        start = datetime.datetime(2022, 1, 1, tzinfo=pytz.utc)
+        records = [
+            {
+                "consumption": float(i),
+                "interval_start": (start + datetime.timedelta(minutes=30 * i)).isoformat(),
+                "interval_end": (start + datetime.timedelta(minutes=30 * (i + 1))).isoformat(),
+            }
+            for i in range(count)
+        ]
+        pages = [records[i:i + page_size] for i in range(0, count, page_size)]
+        for number, results in enumerate(pages, start=1):
+            responses.add(responses.GET, url if number == 1 else f"{url}&page={number}", json={
+                "count": count,
+                "next": f"{url}&page={number + 1}" if number < len(pages) else None,
+                "previous": f"{url}&page={number - 1}" if number > 1 else None,
+                "results": results
+            }, status=200)
+
+        return records
+
+    @responses.activate
+    def test_iter_consumption(self):
+        period_from = datetime.datetime(2022, 1, 1, tzinfo=pytz.utc)
+        period_to = datetime.datetime(2022, 1, 3, tzinfo=pytz.utc)
+        url = self.client.consumption_data_url(ResourceType.ELECTRICITY, period_from, period_to, page_size=40)
+        expected = self.consumption_pages(url, 40, 96)
+
+        for prefetch in (True, False):
+            records = self.client.iter_consumption(ResourceType.ELECTRICITY, period_from, period_to, page_size=40, prefetch=prefetch)
+            self.assertEqual(list(records), expected)
+
+        self.assertEqual(len(responses.calls), 6)
+
+    @responses.activate
+    def test_iter_consumption_is_lazy(self):
+        period_from = datetime.datetime(2022, 1, 1, tzinfo=pytz.utc)
+        period_to = datetime.datetime(2022, 1, 3, tzinfo=pytz.utc)
+        url = self.client.consumption_data_url(ResourceType.ELECTRICITY, period_from, period_to, page_size=40)
+        expected = self.consumption_pages(url, 40, 96)
+
+        records = self.client.iter_consumption(ResourceType.ELECTRICITY, period_from, period_to, page_size=40, prefetch=False)
+        self.assertEqual(len(responses.calls), 0)
+        self.assertEqual(next(records), expected[0])
+        self.assertEqual(len(responses.calls), 1)
+
+    @responses.activate
+    def test_get_consumption_for_period_all_pages(self):
+        period_from = datetime.datetime(2022, 1, 1, tzinfo=pytz.utc)
+        period_to = datetime.datetime(2022, 1, 3, tzinfo=pytz.utc)
+        url = self.client.consumption_data_url(ResourceType.ELECTRICITY, period_from, period_to, page_size=40)
+        expected = self.consumption_pages(url, 40, 96)
+
+        response = self.client.get_consumption_for_period(ResourceType.ELECTRICITY, period_from, period_to, page_size=40, all_pages=True)
+        self.assertDictEqual(response, {"count": 96, "next": None, "previous": None, "results": expected})
+        self.assertEqual(len(responses.calls), 3)
+
+    @responses.activate
+    def test_get_tariff_data_all_pages_single_page(self):
+        url = self.client.tariff_data_url(ResourceType.ELECTRICITY, ChargeType.STANDING_CHARGES)
+        expected = {"count": 1, "next": None, "previous": None, "results": [{"value_exc_vat": 20.0, "value_inc_vat": 21.0, "valid_from": "2017-01-01T00:00:00Z", "valid_to": None}]}
+        responses.add(responses.GET, url, json=expected, status=200)
+
+        response = self.client.get_tariff_data(ResourceType.ELECTRICITY, ChargeType.STANDING_CHARGES, all_pages=True)
+        self.assertDictEqual(response, expected)
+        self.assertEqual(len(responses.calls), 1)
+
+    @responses.activate
+    def test_iter_tariff_rates(self):
+        url = self.client.tariff_data_url(ResourceType.ELECTRICITY, ChargeType.STANDING_CHARGES)
+        expected = [{"value_exc_vat": 20.0, "value_inc_vat": 21.0, "valid_from": "2017-01-01T00:00:00Z", "valid_to": None}]
+        responses.add(responses.GET, url, json={"count": 1, "next": None, "previous": None, "results": expected}, status=200)
+
+        self.assertEqual(list(self.client.iter_tariff_rates(ResourceType.ELECTRICITY, ChargeType.STANDING_CHARGES)), expected)
+
+    @responses.activate
+    def test_iter_tariff_rates_error(self):
+        url = self.client.tariff_data_url(ResourceType.ELECTRICITY, ChargeType.DAY_UNIT_RATES)
+        responses.add(responses.GET, url, json={"detail": "This tariff has standard rates, not day and night."}, status=400)
+
+        with self.assertRaises(ValueError):
+            list(self.client.iter_tariff_rates(ResourceType.ELECTRICITY, ChargeType.DAY_UNIT_RATES))
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
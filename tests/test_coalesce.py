@@ -0,0 +1,120 @@
+from octopus_energy_client import OctopusEnergy, ResourceType, ChargeType, SingleFlight, AsyncSingleFlight, create_session
+from stub_server import StubServer, paginated
+from concurrent.futures import ThreadPoolExecutor
+import unittest
+import threading
+import asyncio
+import time
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_concurrent_calls_share_one_result(self):
+        single_flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            release.wait(5)
+            return {"results": []}
+
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            futures = [executor.submit(single_flight.do, "url", fetch) for _ in range(5)]
+            while single_flight.stats()["coalesced"] < 4:
+                time.sleep(0.001)
+            release.set()
+            results = [future.result() for future in futures]
+
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(single_flight.stats(), {"calls": 1, "coalesced": 4, "in_flight": 0})
+
+        # Completed calls are not reused.
+        single_flight.do("url", fetch)
+        self.assertEqual(len(calls), 2)
+
+    def test_errors_are_shared(self):
+        single_flight = SingleFlight()
+        release = threading.Event()
+
+        def fail():
+            release.wait(5)
+            raise ConnectionError("reset")
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            futures = [executor.submit(single_flight.do, "url", fail) for _ in range(3)]
+            while single_flight.stats()["coalesced"] < 2:
+                time.sleep(0.001)
+            release.set()
+            for future in futures:
+                with self.assertRaises(ConnectionError):
+                    future.result()
+
+        self.assertEqual(single_flight.stats()["in_flight"], 0)
+
+
+class TestAsyncSingleFlight(unittest.IsolatedAsyncioTestCase):
+    async def test_cancelled_caller_does_not_cancel_call(self):
+        single_flight = AsyncSingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {"results": []}
+
+        first = asyncio.ensure_future(single_flight.do("url", fetch))
+        others = [asyncio.ensure_future(single_flight.do("url", fetch)) for _ in range(3)]
+        await asyncio.sleep(0)
+        first.cancel()
+
+        results = await asyncio.gather(*others)
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(single_flight.stats(), {"calls": 1, "coalesced": 3, "in_flight": 0})
+
+
+class TestClientSingleFlight(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.server = StubServer().__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        self.server.route("/v1/products/21JBLAH/electricity-tariffs/E-1R-21JBLAH-Z/standard-unit-rates", paginated(self.server, [{"value_inc_vat": 21.0}], delay=0.2))
+        self.single_flight = SingleFlight()
+        self.session = create_session(pool_maxsize=8)
+
+    def client(self, api_key="123456"):
+        client = OctopusEnergy(
+            api_key=api_key,
+            electricity_serial="abc1234",
+            electricity_mpan="1234567890",
+            electricity_product_code="21JBLAH",
+            electricity_region="Z",
+            gas_serial="cba4321",
+            gas_mprn="0987654321",
+            session=self.session,
+            single_flight=self.single_flight
+        )
+        client.base_url = self.server.url("/v1")
+        return client
+
+    def test_shared_client_makes_one_request(self):
+        client = self.client()
+        url = client.tariff_data_url(ResourceType.ELECTRICITY, ChargeType.STANDARD_UNIT_RATES)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            responses = list(executor.map(lambda _: client.get_data(url), range(8)))
+
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertTrue(all(response is responses[0] for response in responses))
+        self.assertEqual(self.single_flight.stats()["coalesced"], 7)
+
+    def test_accounts_are_not_coalesced(self):
+        clients = [self.client("123456"), self.client("654321")]
+        url = clients[0].tariff_data_url(ResourceType.ELECTRICITY, ChargeType.STANDARD_UNIT_RATES)
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            list(executor.map(lambda client: client.get_data(url), clients))
+
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(self.single_flight.stats()["coalesced"], 0)
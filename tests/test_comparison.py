@@ -0,0 +1,170 @@
+from octopus_energy_client import OctopusEnergy, ResourceType, TariffCandidate, ConsumptionSeries, create_session
+from octopus_energy_client.localtime import np
+from octopus_energy_client.util import iso_format
+from stub_server import StubServer, period_handler
+import unittest
+import datetime
+import random
+import pytz
+
+if np is not None:
+    from octopus_energy_client import TariffComparison, CostEngine
+
+
+START = datetime.datetime(2022, 1, 1, tzinfo=pytz.utc)
+DAYS = 3
+
+
+def half_hourly(prices):
+    """
+    Unit rate windows for each half hour from START, newest first as returned by the API.
+    """
+    return [
+        {
+            "value_exc_vat": price,
+            "value_inc_vat": price * 1.05,
+            "valid_from": iso_format(START + datetime.timedelta(minutes=30 * i)),
+            "valid_to": iso_format(START + datetime.timedelta(minutes=30 * (i + 1))),
+        }
+        for i, price in reversed(list(enumerate(prices)))
+    ]
+
+
+def fixed(price):
+    return [{"value_exc_vat": price, "value_inc_vat": price * 1.05, "valid_from": "2021-01-01T00:00:00Z", "valid_to": None}]
+
+
+def consumption(values):
+    return [
+        {
+            "consumption": value,
+            "interval_start": iso_format(START + datetime.timedelta(minutes=30 * i)),
+            "interval_end": iso_format(START + datetime.timedelta(minutes=30 * (i + 1))),
+        }
+        for i, value in enumerate(values)
+    ]
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestTariffComparison(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.server = StubServer().__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+
+        self.client = OctopusEnergy(
+            api_key="123456",
+            electricity_serial="abc1234",
+            electricity_mpan="1234567890",
+            electricity_product_code="VAR-22-11-01",
+            electricity_region="C",
+            gas_serial="cba4321",
+            gas_mprn="0987654321",
+            session=create_session(backoff_factor=0, max_retries=0)
+        )
+        self.client.base_url = self.server.url("/v1")
+
+        generator = random.Random(5)
+        self.agile = [float(generator.randrange(0, 20)) for _ in range(48 * DAYS)]
+        self.tariffs = {
+            ("AGILE-18-02-21", "C"): (half_hourly(self.agile), fixed(40.0)),
+            ("VAR-22-11-01", "C"): (fixed(30.0), fixed(45.0)),
+            ("VAR-22-11-01", "A"): (fixed(25.0), fixed(50.0)),
+        }
+        for (product, region), (unit_rates, standing_charges) in self.tariffs.items():
+            path = f"/v1/products/{product}/electricity-tariffs/E-1R-{product}-{region}"
+            self.server.route(f"{path}/standard-unit-rates", period_handler(self.server, unit_rates, "valid_from", "valid_to"))
+            self.server.route(f"{path}/standing-charges", period_handler(self.server, standing_charges, "valid_from", "valid_to"))
+
+        self.comparison = TariffComparison(
+            self.client,
+            [TariffCandidate(ResourceType.ELECTRICITY, product, region) for product, region in self.tariffs],
+            START,
+            START + datetime.timedelta(days=DAYS)
+        )
+
+    def test_for_tariff(self):
+        client = self.client.for_tariff(ResourceType.ELECTRICITY, "AGILE-18-02-21", "A", tariff_prefix="E-2R-")
+        self.assertEqual(client.tariff_url(ResourceType.ELECTRICITY), self.server.url("/v1/products/AGILE-18-02-21/electricity-tariffs/E-2R-AGILE-18-02-21-A"))
+        self.assertIs(client.session, self.client.session)
+        # The original client is unchanged.
+        self.assertEqual(self.client.tariff_url(ResourceType.ELECTRICITY), self.server.url("/v1/products/VAR-22-11-01/electricity-tariffs/E-1R-VAR-22-11-01-C"))
+
+    def test_compare(self):
+        # One kWh every half hour, so the fixed tariffs cost 48 kWh a day.
+        ranked = self.comparison.compare(consumption([1.0] * 48 * DAYS))
+
+        self.assertEqual([row["candidate"] for row in ranked], [
+            "electricity:AGILE-18-02-21:C",
+            "electricity:VAR-22-11-01:A",
+            "electricity:VAR-22-11-01:C",
+        ])
+        self.assertAlmostEqual(ranked[1]["energy"], 25.0 * 1.05 * 48 * DAYS)
+        self.assertAlmostEqual(ranked[1]["standing_charge"], 50.0 * 1.05 * DAYS)
+        self.assertAlmostEqual(ranked[1]["total"], ranked[1]["energy"] + ranked[1]["standing_charge"])
+        self.assertEqual(ranked[0]["unpriced_intervals"], 0)
+
+        # Rates are fetched once, two requests for each candidate.
+        self.assertEqual(len(self.server.requests), 6)
+        self.comparison.compare(ConsumptionSeries.from_response(consumption([2.0] * 48)))
+        self.assertEqual(len(self.server.requests), 6)
+
+    def test_costs_match_cost_engine(self):
+        generator = random.Random(7)
+        customers = {
+            f"customer-{n}": consumption([generator.random() for _ in range(generator.randrange(0, 48 * DAYS + 10))])
+            for n in range(50)
+        }
+
+        costs = self.comparison.costs(customers)
+        self.assertEqual(costs["total"].shape, (50, 3))
+        # Batches are costed independently.
+        batched = self.comparison.costs(customers, batch_size=7)
+        for field in ("energy", "standing_charge", "unpriced_intervals"):
+            self.assertTrue(np.allclose(batched[field], costs[field]), field)
+
+        for column, (product, region) in enumerate(self.tariffs):
+            engine = CostEngine(*self.tariffs[(product, region)])
+            for row, customer in enumerate(costs["customers"]):
+                breakdown = engine.calculate(customers[customer])
+                self.assertAlmostEqual(costs["energy"][row, column], breakdown.energy_total)
+                self.assertAlmostEqual(costs["standing_charge"][row, column], breakdown.standing_total)
+                self.assertEqual(costs["unpriced_intervals"][row, column], breakdown.unpriced_intervals)
+
+    def test_requests_in_flight_bounded(self):
+        clients = []
+        for_tariff = self.client.for_tariff
+
+        def recording_for_tariff(*args):
+            clients.append(for_tariff(*args))
+            return clients[-1]
+
+        self.client.for_tariff = recording_for_tariff
+        self.comparison.fetch()
+
+        # Each candidate's chunks and pages are fetched one at a time, within the comparison's pool of workers.
+        self.assertEqual([client.max_workers for client in clients], [1, 1, 1])
+        self.assertEqual(self.client.max_workers, 4)
+
+    def test_failed_candidate_is_excluded(self):
+        comparison = TariffComparison(self.client, [
+            TariffCandidate(ResourceType.ELECTRICITY, "VAR-22-11-01", "C"),
+            TariffCandidate(ResourceType.ELECTRICITY, "MISSING-01", "C"),
+        ], START, START + datetime.timedelta(days=1))
+
+        ranked = comparison.compare(consumption([1.0] * 48))
+        self.assertEqual([row["candidate"] for row in ranked], ["electricity:VAR-22-11-01:C"])
+        self.assertEqual(comparison.errors, {"electricity:MISSING-01:C": {"detail": "Not found."}})
+
+        # Only the failed candidate is retried.
+        requests = len(self.server.requests)
+        comparison.fetch()
+        self.assertEqual(len(self.server.requests), requests + 1)
+
+    def test_duplicate_candidates(self):
+        with self.assertRaises(ValueError):
+            TariffComparison(self.client, [TariffCandidate(ResourceType.GAS, "VAR-22-11-01", "C")] * 2, START, START)
+
+
+if __name__ == '__main__':
+    unittest.main()
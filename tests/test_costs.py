@@ -0,0 +1,118 @@
+from octopus_energy_client import ConsumptionSeries, RateSeries
+from octopus_energy_client.costs import CostEngine, calculate_costs
+from octopus_energy_client.localtime import np, utc_offsets, local_days
+from octopus_energy_client.util import to_timestamp
+import unittest
+import datetime
+import time
+import pytz
+
+
+def half_hours(start, count, value=1.0):
+    return [
+        {
+            "consumption": value,
+            "interval_start": (start + datetime.timedelta(minutes=30 * i)).isoformat(),
+            "interval_end": (start + datetime.timedelta(minutes=30 * (i + 1))).isoformat(),
+        }
+        for i in range(count)
+    ]
+
+
+def agile_rates(start, count):
+    # Newest first, as returned by the API. Rates cycle 0..47p through each day.
+    return [
+        {
+            "value_exc_vat": float(i % 48),
+            "value_inc_vat": float(i % 48) * 1.05,
+            "valid_from": (start + datetime.timedelta(minutes=30 * i)).isoformat(),
+            "valid_to": (start + datetime.timedelta(minutes=30 * (i + 1))).isoformat(),
+        }
+        for i in reversed(range(count))
+    ]
+
+
+STANDING_CHARGES = [
+    {"value_exc_vat": 20.0, "value_inc_vat": 21.0, "valid_from": "2022-01-02T00:00:00Z", "valid_to": None},
+    {"value_exc_vat": 10.0, "value_inc_vat": 10.5, "valid_from": "2021-01-01T00:00:00Z", "valid_to": "2022-01-02T00:00:00Z"},
+]
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestCosts(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.start = datetime.datetime(2022, 1, 1, tzinfo=pytz.utc)
+
+    def test_utc_offsets(self):
+        # Clocks go forward at 01:00 UTC on 27 March 2022.
+        epochs = np.array([to_timestamp("2022-03-26T12:00:00Z"), to_timestamp("2022-03-27T00:30:00Z"), to_timestamp("2022-03-27T01:00:00Z"), to_timestamp("2022-06-01T23:30:00Z")])
+        self.assertEqual(utc_offsets(epochs).tolist(), [0, 0, 3600, 3600])
+        # 23:30 UTC on 1 June is 00:30 on 2 June in London.
+        self.assertEqual(local_days(epochs[-1:]).astype("datetime64[D]").tolist(), [datetime.date(2022, 6, 2)])
+
+    def test_interval_costs(self):
+        breakdown = calculate_costs({"count": 96, "next": None, "previous": None, "results": half_hours(self.start, 96, 2.0)}, agile_rates(self.start, 96))
+
+        expected = np.array([2.0 * (i % 48) * 1.05 for i in range(96)])
+        np.testing.assert_allclose(breakdown.interval_cost, expected)
+        self.assertEqual(breakdown.unpriced_intervals, 0)
+        self.assertAlmostEqual(breakdown.total, expected.sum())
+
+    def test_exc_vat_and_consumption_factor(self):
+        breakdown = calculate_costs(half_hours(self.start, 48), agile_rates(self.start, 48), include_vat=False, consumption_factor=10.0)
+        self.assertAlmostEqual(breakdown.total, 10.0 * sum(range(48)))
+
+    def test_daily_costs_with_standing_charges(self):
+        breakdown = calculate_costs(half_hours(self.start, 96), agile_rates(self.start, 96), STANDING_CHARGES)
+
+        daily = breakdown.daily()
+        self.assertEqual([d["date"] for d in daily], [datetime.date(2022, 1, 1), datetime.date(2022, 1, 2)])
+        self.assertEqual([d["standing_charge"] for d in daily], [10.5, 21.0])
+        self.assertAlmostEqual(daily[0]["energy"], sum(range(48)) * 1.05)
+        self.assertAlmostEqual(breakdown.standing_total, 31.5)
+        self.assertAlmostEqual(breakdown.total, 2 * sum(range(48)) * 1.05 + 31.5)
+
+    def test_standing_charge_change_within_day(self):
+        charges = [
+            {"value_exc_vat": 20.0, "value_inc_vat": 21.0, "valid_from": "2022-01-01T12:00:00Z", "valid_to": None},
+            {"value_exc_vat": 10.0, "value_inc_vat": 10.5, "valid_from": "2021-01-01T00:00:00Z", "valid_to": "2022-01-01T12:00:00Z"},
+        ]
+        ascending = calculate_costs(half_hours(self.start, 96), agile_rates(self.start, 96), charges)
+        # Newest first, as returned by the API.
+        descending = calculate_costs(list(reversed(half_hours(self.start, 96))), agile_rates(self.start, 96), charges)
+
+        for breakdown in (ascending, descending):
+            self.assertEqual([d["standing_charge"] for d in breakdown.daily()], [10.5, 21.0])
+        self.assertAlmostEqual(descending.total, ascending.total)
+
+    def test_unpriced_intervals(self):
+        breakdown = calculate_costs(half_hours(self.start, 50), agile_rates(self.start, 48))
+        self.assertEqual(breakdown.unpriced_intervals, 2)
+        self.assertTrue(np.isnan(breakdown.interval_cost[-1]))
+        self.assertAlmostEqual(breakdown.total, sum(range(48)) * 1.05)
+
+    def test_open_ended_rate(self):
+        rates = [{"value_exc_vat": 30.0, "value_inc_vat": 31.5, "valid_from": "2021-01-01T00:00:00Z", "valid_to": None}]
+        breakdown = calculate_costs(half_hours(self.start, 10), rates)
+        self.assertAlmostEqual(breakdown.total, 315.0)
+
+    def test_calculate_many(self):
+        engine = CostEngine(agile_rates(self.start, 48), STANDING_CHARGES)
+        breakdowns = engine.calculate_many({"a": half_hours(self.start, 48, 1.0), "b": half_hours(self.start, 48, 2.0)})
+        self.assertAlmostEqual(breakdowns["b"].energy_total, 2 * breakdowns["a"].energy_total)
+
+    def test_year_of_half_hours_is_fast(self):
+        consumption = ConsumptionSeries.from_response(half_hours(self.start, 17520, 0.5))
+        engine = CostEngine(RateSeries.from_response(agile_rates(self.start, 17520)), STANDING_CHARGES)
+
+        began = time.perf_counter()
+        breakdown = engine.calculate(consumption)
+        elapsed = time.perf_counter() - began
+
+        self.assertEqual(len(breakdown.days), 365)
+        self.assertLess(elapsed, 0.25)
+
+
+if __name__ == '__main__':
+    unittest.main()
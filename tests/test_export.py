@@ -0,0 +1,172 @@
+from octopus_energy_client import OctopusEnergy, ResourceType, ChargeType, create_session
+from octopus_energy_client.export import DatasetWriter, CONSUMPTION_COLUMNS, export_consumption, export_tariffs, main
+from octopus_energy_client.util import iso_format
+from stub_server import StubServer, period_handler
+from unittest import mock
+import unittest
+import datetime
+import tempfile
+import gzip
+import json
+import csv
+import os
+import pytz
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover
+    pq = None
+
+
+CONSUMPTION_PATH = "/v1/electricity-meter-points/1234567890/meters/abc1234/consumption"
+RATES_PATH = "/v1/products/21JBLAH/electricity-tariffs/E-1R-21JBLAH-Z/standard-unit-rates"
+
+
+def utc(*args):
+    return datetime.datetime(*args, tzinfo=pytz.utc)
+
+
+def consumption(start, count):
+    return [
+        {
+            "consumption": float(i),
+            "interval_start": iso_format(start + datetime.timedelta(minutes=30 * i)),
+            "interval_end": iso_format(start + datetime.timedelta(minutes=30 * (i + 1))),
+        }
+        for i in range(count)
+    ]
+
+
+def read_csv(directory):
+    with open(os.path.join(directory, "manifest.json")) as f:
+        manifest = json.load(f)
+
+    rows = []
+    for part in manifest["parts"]:
+        with gzip.open(os.path.join(directory, part["file"]), "rt", newline="") as f:
+            rows += list(csv.DictReader(f))
+    return manifest, rows
+
+
+class TestExport(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.server = StubServer().__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        temporary = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary.cleanup)
+        self.directory = temporary.name
+
+        self.client = OctopusEnergy(
+            api_key="123456",
+            electricity_serial="abc1234",
+            electricity_mpan="1234567890",
+            electricity_product_code="21JBLAH",
+            electricity_region="Z",
+            gas_serial="cba4321",
+            gas_mprn="0987654321",
+            session=create_session(backoff_factor=0)
+        )
+        self.client.base_url = self.server.url("/v1")
+
+        self.records = consumption(utc(2022, 1, 1), 48 * 3)
+        self.server.route(CONSUMPTION_PATH, period_handler(self.server, self.records, "interval_start", "interval_end"))
+
+    def test_consumption_csv(self):
+        rows = export_consumption(self.client, ResourceType.ELECTRICITY, utc(2022, 1, 1), utc(2022, 1, 3), self.directory, format="csv", page_size=30, rows_per_file=60)
+        manifest, written = read_csv(self.directory)
+
+        self.assertEqual(rows, 96)
+        self.assertEqual([part["rows"] for part in manifest["parts"]], [60, 36])
+        self.assertEqual(manifest["watermark"], "2022-01-03T00:00:00Z")
+        self.assertEqual([row["interval_start"] for row in written], [r["interval_start"] for r in self.records[:96]])
+        self.assertEqual(float(written[-1]["consumption"]), 95.0)
+        self.assertEqual(sorted(os.listdir(self.directory)), ["manifest.json", "part-00000.csv.gz", "part-00001.csv.gz"])
+
+    def test_resume(self):
+        export_consumption(self.client, ResourceType.ELECTRICITY, utc(2022, 1, 1), utc(2022, 1, 2), self.directory, format="csv", page_size=48)
+        self.server.requests.clear()
+        rows = export_consumption(self.client, ResourceType.ELECTRICITY, utc(2022, 1, 1), utc(2022, 1, 4), self.directory, format="csv", page_size=48)
+        manifest, written = read_csv(self.directory)
+
+        self.assertEqual(rows, 144)
+        self.assertEqual([row["interval_start"] for row in written], [r["interval_start"] for r in self.records])
+        self.assertIn("period_from=2022-01-02T00:00:00Z", self.server.requests[0])
+
+        # An export which is already complete makes no requests.
+        self.server.requests.clear()
+        export_consumption(self.client, ResourceType.ELECTRICITY, utc(2022, 1, 1), utc(2022, 1, 4), self.directory, format="csv")
+        self.assertEqual(self.server.requests, [])
+
+    def test_interrupted_export_keeps_written_batches(self):
+        with self.assertRaises(RuntimeError):
+            with DatasetWriter(self.directory, CONSUMPTION_COLUMNS, format="csv") as writer:
+                writer.write(self.records[:48], watermark=self.records[47]["interval_end"])
+                raise RuntimeError("connection lost")
+
+        manifest, written = read_csv(self.directory)
+        self.assertEqual(len(written), 48)
+        self.assertEqual(manifest["watermark"], "2022-01-02T00:00:00Z")
+        self.assertFalse([name for name in os.listdir(self.directory) if name.endswith(".partial")])
+
+    def test_format_mismatch(self):
+        export_consumption(self.client, ResourceType.ELECTRICITY, utc(2022, 1, 1), utc(2022, 1, 2), self.directory, format="csv")
+        with self.assertRaises(ValueError):
+            DatasetWriter(self.directory, CONSUMPTION_COLUMNS, format="parquet")
+
+    def tariff_records(self):
+        start = utc(2022, 1, 1)
+        windows = [
+            {
+                "value_exc_vat": float(i),
+                "value_inc_vat": float(i) * 1.05,
+                "valid_from": iso_format(start + datetime.timedelta(hours=12 * i)),
+                "valid_to": iso_format(start + datetime.timedelta(hours=12 * (i + 1))) if i < 5 else None,
+            }
+            for i in range(1, 6)
+        ]
+        # A window starting long before the period, and the API's newest first order.
+        windows.insert(0, {"value_exc_vat": 9.0, "value_inc_vat": 9.45, "valid_from": "2021-06-01T00:00:00Z", "valid_to": iso_format(start + datetime.timedelta(hours=12))})
+        return windows[::-1]
+
+    def test_tariffs_csv(self):
+        self.server.route(RATES_PATH, period_handler(self.server, self.tariff_records(), "valid_from", "valid_to"))
+
+        rows = export_tariffs(self.client, ResourceType.ELECTRICITY, ChargeType.STANDARD_UNIT_RATES, utc(2022, 1, 1), utc(2022, 1, 4), self.directory, format="csv", page_size=48)
+        manifest, written = read_csv(self.directory)
+
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual(rows, 6)
+        self.assertEqual([row["valid_from"] for row in written], ["2021-06-01T00:00:00Z"] + [iso_format(utc(2022, 1, 1) + datetime.timedelta(hours=12 * i)) for i in range(1, 6)])
+        self.assertEqual(written[-1]["valid_to"], "")
+        self.assertEqual(manifest["watermark"], "2022-01-04T00:00:00Z")
+
+    @unittest.skipIf(pq is None, "pyarrow is not installed")
+    def test_parquet_row_groups(self):
+        self.server.route(RATES_PATH, period_handler(self.server, self.tariff_records(), "valid_from", "valid_to"))
+        export_tariffs(self.client, ResourceType.ELECTRICITY, ChargeType.STANDARD_UNIT_RATES, utc(2022, 1, 1), utc(2022, 1, 4), self.directory, page_size=48)
+        export_consumption(self.client, ResourceType.ELECTRICITY, utc(2022, 1, 1), utc(2022, 1, 4), os.path.join(self.directory, "consumption"), page_size=48)
+
+        rates = pq.ParquetFile(os.path.join(self.directory, "part-00000.parquet"))
+        self.assertEqual(rates.metadata.num_row_groups, 3)
+        table = rates.read()
+        self.assertEqual(table.column("valid_from")[0].as_py(), utc(2021, 6, 1))
+        self.assertIsNone(table.column("valid_to")[5].as_py())
+        self.assertEqual(table.column("value_inc_vat")[0].as_py(), 9.45)
+
+        usage = pq.ParquetFile(os.path.join(self.directory, "consumption", "part-00000.parquet"))
+        self.assertEqual(usage.metadata.num_row_groups, 3)
+        self.assertEqual(usage.read().column("consumption").to_pylist(), [float(i) for i in range(144)])
+
+    def test_main(self):
+        self.server.route("/v1/gas-meter-points/0987654321/meters/cba4321/consumption", period_handler(self.server, self.records[:48], "interval_start", "interval_end"))
+
+        with mock.patch.object(OctopusEnergy, "base_url", self.server.url("/v1")):
+            status = main([
+                "--api-key", "123456", "--from", "2022-01-01", "--to", "2022-01-03T00:00:00Z", "-o", self.directory, "--format", "csv",
+                "consumption", "--meter", "electricity:1234567890:abc1234", "--meter", "gas:0987654321:cba4321"
+            ])
+
+        self.assertEqual(status, 0)
+        self.assertEqual(len(read_csv(os.path.join(self.directory, "consumption", "electricity-1234567890-abc1234"))[1]), 96)
+        self.assertEqual(len(read_csv(os.path.join(self.directory, "consumption", "gas-0987654321-cba4321"))[1]), 48)
@@ -0,0 +1,113 @@
+from octopus_energy_client import ResourceType, ConsumptionSeries, FleetClient, MeterConfig, create_session
+from stub_server import StubServer, paginated
+import unittest
+import datetime
+import time
+import pytz
+
+
+def consumption(count):
+    start = datetime.datetime(2022, 1, 1, tzinfo=pytz.utc)
+    return [
+        {
+            "consumption": float(i),
+            "interval_start": (start + datetime.timedelta(minutes=30 * i)).isoformat(),
+            "interval_end": (start + datetime.timedelta(minutes=30 * (i + 1))).isoformat(),
+        }
+        for i in range(count)
+    ]
+
+
+class TestFleet(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.server = StubServer().__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        self.period_from = datetime.datetime(2022, 1, 1, tzinfo=pytz.utc)
+        self.period_to = datetime.datetime(2022, 1, 2, tzinfo=pytz.utc)
+
+    def fleet(self, meters, **kwargs):
+        fleet = FleetClient(meters, api_key="123456", session=create_session(backoff_factor=0, max_retries=0), **kwargs)
+        for client in fleet.clients.values():
+            client.base_url = self.server.url("/v1")
+        return fleet
+
+    def test_meter_config_client_kwargs(self):
+        meter = MeterConfig(ResourceType.GAS, "0987654321", "cba4321", product_code="12XFOO", region="A")
+        fleet = self.fleet([meter])
+        client = fleet.clients["gas:0987654321:cba4321"]
+
+        self.assertEqual(client.consumption_url(ResourceType.GAS), self.server.url("/v1/gas-meter-points/0987654321/meters/cba4321/consumption"))
+        self.assertEqual(client.tariff_url(ResourceType.GAS), self.server.url("/v1/products/12XFOO/gas-tariffs/G-1R-12XFOO-A"))
+
+    def test_client_kwargs_precedence(self):
+        meter = MeterConfig(ResourceType.ELECTRICITY, "1234567890", "abc1234", product_code="12XFOO", region="A")
+        fleet = FleetClient(
+            [meter], api_key="123456", timeout=5,
+            electricity_serial="other", electricity_product_code="GO-18-06-12", electricity_tariff_prefix="E-2R-"
+        )
+        client = fleet.clients[meter.key]
+
+        # The meter's identifiers win over the caller's, which still apply where the meter leaves them unset.
+        self.assertEqual(client.consumption_url(ResourceType.ELECTRICITY), "https://api.octopus.energy/v1/electricity-meter-points/1234567890/meters/abc1234/consumption")
+        self.assertEqual(client.tariff_url(ResourceType.ELECTRICITY), "https://api.octopus.energy/v1/products/12XFOO/electricity-tariffs/E-2R-12XFOO-A")
+        self.assertEqual(client.max_workers, 1)
+        self.assertEqual(client.timeout, 5)
+        self.assertIs(client.session, fleet.session)
+
+    def test_get_meter_points(self):
+        meters = [MeterConfig(ResourceType.ELECTRICITY, f"100{i}", f"abc{i}") for i in range(5)]
+        for i in range(5):
+            self.server.add(f"/v1/electricity-meter-points/100{i}", {"gsp": "_C", "mpan": f"100{i}", "profile_class": 1})
+
+        results = self.fleet(meters).get_meter_points()
+
+        self.assertEqual(list(results), [m.key for m in meters])
+        self.assertTrue(all(r.ok for r in results.values()))
+        self.assertEqual(results["electricity:1003:abc3"].data["mpan"], "1003")
+        # Every meter shares the same keep-alive connection pool.
+        self.assertLessEqual(self.server.connections, 5)
+
+    def test_errors_are_isolated(self):
+        meters = [
+            MeterConfig(ResourceType.ELECTRICITY, "1001", "abc1"),
+            MeterConfig(ResourceType.ELECTRICITY, "1002", "abc2"),
+            MeterConfig(ResourceType.GAS, "2001", "def1", key="gas-site"),
+        ]
+        results = consumption(300)
+        self.server.route("/v1/electricity-meter-points/1001/meters/abc1/consumption", paginated(self.server, results))
+        self.server.add("/v1/electricity-meter-points/1002/meters/abc2/consumption", {"detail": "Not found."}, status=404)
+        self.server.route("/v1/gas-meter-points/2001/meters/def1/consumption", paginated(self.server, results[:10]))
+
+        fleet_results = self.fleet(meters).get_consumption(self.period_from, self.period_to, page_size=100)
+
+        self.assertEqual(fleet_results["electricity:1001:abc1"].data["results"], results)
+        self.assertIsInstance(fleet_results["electricity:1002:abc2"].error, ValueError)
+        self.assertFalse(fleet_results["electricity:1002:abc2"].ok)
+        self.assertEqual(fleet_results["gas-site"].data["count"], 10)
+
+    def test_as_series(self):
+        meter = MeterConfig(ResourceType.ELECTRICITY, "1001", "abc1")
+        self.server.route("/v1/electricity-meter-points/1001/meters/abc1/consumption", paginated(self.server, consumption(48)))
+
+        result = self.fleet([meter]).get_consumption(self.period_from, self.period_to, as_series=True)[meter.key]
+        self.assertIsInstance(result.data, ConsumptionSeries)
+        self.assertEqual(len(result.data), 48)
+
+    def test_slow_meter_does_not_stall_batch(self):
+        meters = [MeterConfig(ResourceType.ELECTRICITY, f"100{i}", f"abc{i}") for i in range(4)]
+        for i in range(3):
+            self.server.route(f"/v1/electricity-meter-points/100{i}/meters/abc{i}/consumption", paginated(self.server, consumption(48)))
+        self.server.route("/v1/electricity-meter-points/1003/meters/abc3/consumption", paginated(self.server, consumption(48), delay=1))
+
+        start = time.perf_counter()
+        results = self.fleet(meters, max_workers=4).get_consumption(self.period_from, self.period_to, deadline=0.5)
+        elapsed = time.perf_counter() - start
+
+        self.assertLess(elapsed, 0.9)
+        self.assertEqual(sum(r.ok for r in results.values()), 3)
+        self.assertIsInstance(results["electricity:1003:abc3"].error, TimeoutError)
+
+
+if __name__ == '__main__':
+    unittest.main()
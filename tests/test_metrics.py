@@ -0,0 +1,161 @@
+from octopus_energy_client import OctopusEnergy, MetricsCollector, RequestEvent, ConsumptionSeries, ReplayTransport, create_session
+from octopus_energy_client.metrics import Histogram, url_template
+from octopus_energy_client.decoding import loads
+from stub_server import StubServer
+import requests
+import unittest
+
+
+class TestMetrics(unittest.TestCase):
+    def test_url_template(self):
+        for url, expected in (
+            ("https://api.octopus.energy/v1/electricity-meter-points/0123456789012/meters/abc1234/consumption?page=2", "/v1/electricity-meter-points/{mpan}/meters/{serial}/consumption"),
+            ("https://api.octopus.energy/v1/gas-meter-points/0987654321/", "/v1/gas-meter-points/{mprn}"),
+            ("https://api.octopus.energy/v1/products/AGILE-18-02-21/electricity-tariffs/E-1R-AGILE-18-02-21-C/standard-unit-rates?page_size=100", "/v1/products/{product_code}/electricity-tariffs/{tariff_code}/standard-unit-rates"),
+            ("https://api.octopus.energy/v1/industry/grid-supply-points?postcode=SW1A1AA", "/v1/industry/grid-supply-points"),
+        ):
+            self.assertEqual(url_template(url), expected)
+
+    def test_histogram(self):
+        histogram = Histogram((0.1, 0.5, 1.0))
+        self.assertIsNone(histogram.percentile(0.5))
+
+        for value in (0.05, 0.2, 0.3, 0.7, 2.0):
+            histogram.observe(value)
+
+        self.assertEqual(histogram.counts, [1, 3, 4])
+        self.assertEqual(histogram.percentile(0.5), 0.5)
+        self.assertEqual(histogram.percentile(0.8), 1.0)
+        self.assertEqual(histogram.percentile(0.99), float("inf"))
+
+    def test_collector(self):
+        metrics = MetricsCollector(buckets=(0.1, 1.0))
+        url = "https://api.octopus.energy/v1/industry/grid-supply-points"
+        metrics(RequestEvent(url, 200, bytes=100, dns=0.01, connect=0.02, ttfb=0.05, total=0.06, decode=0.001))
+        metrics(RequestEvent(url, 200, bytes=100, ttfb=0.5, total=0.6, decode=0.001, retries=2))
+        metrics(RequestEvent(url, total=1.5, error="ConnectionError"))
+
+        snapshot = metrics.snapshot()["/v1/industry/grid-supply-points"]
+        self.assertEqual(snapshot["requests"], {200: 2})
+        self.assertEqual(snapshot["errors"], {"ConnectionError": 1})
+        self.assertEqual(snapshot["bytes"], 200)
+        self.assertEqual(snapshot["retries"], 2)
+        self.assertEqual(snapshot["latency"]["dns"]["count"], 1)
+        self.assertEqual(snapshot["latency"]["total"]["count"], 3)
+        self.assertEqual(snapshot["latency"]["total"]["p50"], 1.0)
+        self.assertAlmostEqual(snapshot["latency"]["total"]["sum"], 2.16)
+
+        text = metrics.to_prometheus()
+        self.assertIn('octopus_energy_requests_total{endpoint="/v1/industry/grid-supply-points",status="200"} 2', text)
+        self.assertIn('octopus_energy_request_errors_total{endpoint="/v1/industry/grid-supply-points",error="ConnectionError"} 1', text)
+        self.assertIn('octopus_energy_request_duration_seconds_bucket{endpoint="/v1/industry/grid-supply-points",phase="total",le="0.1"} 1', text)
+        self.assertIn('octopus_energy_request_duration_seconds_bucket{endpoint="/v1/industry/grid-supply-points",phase="total",le="+Inf"} 3', text)
+        self.assertIn('octopus_energy_request_duration_seconds_count{endpoint="/v1/industry/grid-supply-points",phase="decode"} 2', text)
+        self.assertIn("# TYPE octopus_energy_request_duration_seconds histogram", text)
+
+        metrics.reset()
+        self.assertEqual(metrics.snapshot(), {})
+
+
+class TestClientHooks(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.server = StubServer().__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+
+        self.events = []
+        self.metrics = MetricsCollector()
+        self.client = OctopusEnergy(
+            api_key="123456",
+            electricity_serial="abc1234",
+            electricity_mpan="1234567890",
+            gas_serial="cba4321",
+            gas_mprn="0987654321",
+            session=create_session(backoff_factor=0, max_retries=1),
+            hooks=[self.events.append, self.metrics]
+        )
+        self.client.base_url = self.server.url("/v1")
+
+    def test_events(self):
+        expected = {'gsp': '_C', 'mpan': '1234567890', 'profile_class': 1}
+        self.server.add("/v1/electricity-meter-points/1234567890", {"detail": "Request was throttled."}, status=429, headers={"Retry-After": "0"})
+        self.server.add("/v1/electricity-meter-points/1234567890", expected)
+
+        url = self.server.url("/v1/electricity-meter-points/1234567890")
+        self.client.get_data(url)
+        self.client.get_data(url)
+
+        first, second = self.events
+        self.assertEqual(first.template, "/v1/electricity-meter-points/{mpan}")
+        self.assertEqual(first.status, 200)
+        self.assertEqual(first.retries, 1)
+        self.assertEqual(first.bytes, len(b'{"gsp": "_C", "mpan": "1234567890", "profile_class": 1}'))
+        self.assertIsNotNone(first.dns)
+        self.assertIsNotNone(first.connect)
+        self.assertLessEqual(first.ttfb, first.total)
+        self.assertIsNotNone(first.decode)
+        self.assertIsNone(first.error)
+
+        # The pooled connection is reused.
+        self.assertIsNone(second.dns)
+        self.assertIsNone(second.connect)
+        self.assertEqual(second.retries, 0)
+
+        self.assertEqual(self.metrics.snapshot()["/v1/electricity-meter-points/{mpan}"]["requests"], {200: 2})
+
+    def test_connection_error(self):
+        with StubServer() as closed:
+            url = closed.url("/v1/industry/grid-supply-points")
+
+        with self.assertRaises(requests.ConnectionError):
+            self.client.get_data(url)
+
+        self.assertEqual(self.events[0].error, "ConnectionError")
+        self.assertIsNone(self.events[0].status)
+
+    def test_invalid_body(self):
+        url = "https://api.octopus.energy/v1/electricity-meter-points/1234567890/meters/abc1234/consumption"
+        transport = ReplayTransport()
+        transport.add(url, "<html><body>502 Bad Gateway</body></html>", status=502)
+        self.client = OctopusEnergy(
+            api_key="123456",
+            electricity_serial="abc1234",
+            electricity_mpan="1234567890",
+            gas_serial="cba4321",
+            gas_mprn="0987654321",
+            transport=transport,
+            hooks=[self.events.append]
+        )
+
+        for decode in (ConsumptionSeries.from_json, loads):
+            with self.assertRaises(ValueError):
+                self.client.get_data(url, decode)
+
+        # Every decoding failure is reported, e.g. as "ValueError" or "JSONDecodeError".
+        self.assertEqual(len(self.events), 2)
+        self.assertTrue(all(event.error is not None for event in self.events))
+        self.assertEqual(self.events[0].status, 502)
+
+    def test_failing_hook(self):
+        def fail(event):
+            raise RuntimeError("hook failed")
+
+        self.client.hooks.insert(0, fail)
+        self.server.add("/v1/industry/grid-supply-points", {"count": 0, "next": None, "previous": None, "results": []})
+
+        with self.assertLogs("octopus_energy_client.client", "ERROR"):
+            self.client.get_data(self.server.url("/v1/industry/grid-supply-points"))
+        self.assertEqual(len(self.events), 1)
+
+    def test_stream_event(self):
+        self.server.add("/v1/industry/grid-supply-points", {"count": 1, "next": None, "previous": None, "results": [{"group_id": "_C"}]})
+
+        with self.client.get_data_stream(self.server.url("/v1/industry/grid-supply-points")) as page:
+            self.assertEqual(list(page), [{"group_id": "_C"}])
+
+        self.assertEqual(self.events[0].status, 200)
+        self.assertIsNone(self.events[0].bytes)
+
+
+if __name__ == '__main__':
+    unittest.main()
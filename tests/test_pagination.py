@@ -0,0 +1,64 @@
+from octopus_energy_client.client import OctopusEnergy
+from octopus_energy_client.pagination import page_count, merge_pages
+from octopus_energy_client import ResourceType, create_session
+from stub_server import StubServer, paginated
+import unittest
+import datetime
+import time
+import pytz
+
+
+class TestPagination(unittest.TestCase):
+    def test_page_count(self):
+        self.assertEqual(page_count(0, 100), 1)
+        self.assertEqual(page_count(100, 100), 1)
+        self.assertEqual(page_count(101, 100), 2)
+        self.assertEqual(page_count(17520, 1500), 12)
+
+    def test_merge_pages(self):
+        pages = [
+            {"count": 3, "next": "https://example.com/?page=2", "previous": None, "results": [1, 2]},
+            {"count": 3, "next": None, "previous": "https://example.com/?page=1", "results": [3]},
+        ]
+        self.assertDictEqual(merge_pages(pages), {"count": 3, "next": None, "previous": None, "results": [1, 2, 3]})
+
+    def test_merge_pages_error(self):
+        pages = [
+            {"count": 3, "next": "https://example.com/?page=2", "previous": None, "results": [1, 2]},
+            {"detail": "Invalid page."},
+        ]
+        with self.assertRaises(ValueError):
+            merge_pages(pages)
+
+    def test_all_pages_fetched_in_parallel(self):
+        with StubServer() as server:
+            client = OctopusEnergy(
+                api_key="123456",
+                electricity_serial="abc1234",
+                electricity_mpan="1234567890",
+                gas_serial="cba4321",
+                gas_mprn="0987654321",
+                session=create_session(backoff_factor=0),
+                max_workers=8
+            )
+            client.base_url = server.url("/v1")
+
+            start = datetime.datetime(2022, 1, 1, tzinfo=pytz.utc)
+            results = [
+                {"consumption": float(i), "interval_start": (start + datetime.timedelta(minutes=30 * i)).isoformat()}
+                for i in range(900)
+            ]
+            server.route("/v1/electricity-meter-points/1234567890/meters/abc1234/consumption", paginated(server, results, delay=0.1))
+
+            began = time.perf_counter()
+            response = client.get_consumption_for_period(ResourceType.ELECTRICITY, start, start + datetime.timedelta(days=20), all_pages=True)
+            elapsed = time.perf_counter() - began
+
+        self.assertEqual(response["results"], results)
+        self.assertEqual(len(server.requests), 9)
+        # The first page, then the remaining eight pages at once, rather than nine sequential requests.
+        self.assertLess(elapsed, 0.6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,307 @@
+from octopus_energy_client import OctopusEnergy, ResourceType, ChargeType, Aggregate, ConsumptionSeries, create_session
+from octopus_energy_client.planner import plan_ranges, date_runs, repair_ranges, stitch, consumption_gaps, rate_gaps
+from octopus_energy_client.localtime import local_day_bounds
+from octopus_energy_client.util import iso_format, to_timestamp
+from stub_server import StubServer, period_handler
+from urllib.parse import urlsplit, parse_qs
+import unittest
+import datetime
+import threading
+import time
+import pytz
+
+
+def utc(*args):
+    return datetime.datetime(*args, tzinfo=pytz.utc)
+
+
+class TestPlanRanges(unittest.TestCase):
+    def test_aligned_days(self):
+        self.assertEqual(plan_ranges(utc(2022, 1, 1, 12), utc(2022, 1, 4), max_rows=48), [
+            (utc(2022, 1, 1, 12), utc(2022, 1, 2)),
+            (utc(2022, 1, 2), utc(2022, 1, 3)),
+            (utc(2022, 1, 3), utc(2022, 1, 4)),
+        ])
+
+    def test_request_counts(self):
+        self.assertEqual(len(plan_ranges(utc(2020, 1, 1), utc(2023, 1, 1), 25000)), 3)
+        self.assertEqual(len(plan_ranges(utc(2022, 1, 1), utc(2023, 1, 1), 1500)), 12)
+        self.assertEqual(plan_ranges(utc(2022, 1, 1), utc(2022, 1, 1), 1500), [])
+
+    def test_chunks_are_within_limit(self):
+        for start, end in plan_ranges(utc(2021, 3, 7, 5, 30), utc(2022, 11, 2, 17), 1500):
+            self.assertLessEqual((end - start).total_seconds() / 1800, 1500)
+
+    def test_too_few_rows(self):
+        with self.assertRaises(ValueError):
+            plan_ranges(utc(2022, 1, 1), utc(2022, 1, 2), 47)
+
+    def test_date_runs(self):
+        dates = [datetime.date(2022, 3, 1), datetime.date(2022, 1, 5), datetime.date(2022, 1, 1), datetime.date(2022, 1, 2), datetime.date(2022, 1, 2)]
+        self.assertEqual(date_runs(dates), [(datetime.date(2022, 1, 1), datetime.date(2022, 1, 5)), (datetime.date(2022, 3, 1), datetime.date(2022, 3, 1))])
+        self.assertEqual(len(date_runs(dates, merge_gap=0)), 3)
+        self.assertEqual(date_runs([]), [])
+
+    def test_local_day_bounds(self):
+        self.assertEqual(local_day_bounds(datetime.date(2022, 1, 1)), (utc(2022, 1, 1), utc(2022, 1, 2)))
+        self.assertEqual(local_day_bounds(datetime.date(2022, 3, 27)), (utc(2022, 3, 27), utc(2022, 3, 27, 23)))
+        self.assertEqual(local_day_bounds(datetime.date(2022, 6, 1)), (utc(2022, 5, 31, 23), utc(2022, 6, 1, 23)))
+        self.assertEqual(local_day_bounds(datetime.date(2022, 10, 30)), (utc(2022, 10, 29, 23), utc(2022, 10, 31)))
+
+    def test_stitch(self):
+        pages = [
+            {"results": [{"interval_start": "2022-01-01T00:30:00Z", "c": 2}, {"interval_start": "2022-01-01T00:00:00Z", "c": 1}]},
+            {"results": [{"interval_start": "2022-01-01T00:30:00Z", "c": 2}, {"interval_start": "2022-01-01T01:00:00+01:00", "c": 1}]},
+        ]
+        self.assertEqual([r["c"] for r in stitch(pages, "interval_start")], [1, 2])
+        self.assertEqual(len(stitch(pages, "interval_start", reverse=True)), 2)
+
+    def test_gaps(self):
+        records = [{"interval_start": iso_format(utc(2022, 1, 1, 0, 30 * i))} for i in (0, 1)]
+        self.assertEqual(consumption_gaps(records, utc(2022, 1, 1), utc(2022, 1, 1, 2)), [(utc(2022, 1, 1, 1), utc(2022, 1, 1, 2))])
+
+        series = ConsumptionSeries.from_response([dict(record, interval_end=record["interval_start"], consumption=0.0) for record in records])
+        self.assertEqual(consumption_gaps(series, utc(2021, 12, 31, 23), utc(2022, 1, 1, 1)), [(utc(2021, 12, 31, 23), utc(2022, 1, 1))])
+
+        windows = [
+            {"valid_from": "2022-01-01T00:00:00Z", "valid_to": "2022-01-02T00:00:00Z"},
+            {"valid_from": "2022-01-03T00:00:00Z", "valid_to": None},
+        ]
+        self.assertEqual(rate_gaps(windows, utc(2021, 12, 31), utc(2022, 2, 1)), [
+            (utc(2021, 12, 31), utc(2022, 1, 1)),
+            (utc(2022, 1, 2), utc(2022, 1, 3)),
+        ])
+
+    def test_repair_ranges(self):
+        gaps = [(utc(2022, 1, 1, 0, 30), utc(2022, 1, 1, 1)), (utc(2022, 1, 1, 1, 30), utc(2022, 1, 1, 2)), (utc(2022, 1, 1, 5), utc(2022, 1, 1, 6))]
+        self.assertEqual(repair_ranges(gaps, merge_gap=2), [(utc(2022, 1, 1, 0, 30), utc(2022, 1, 1, 2)), (utc(2022, 1, 1, 5), utc(2022, 1, 1, 6))])
+        self.assertEqual(repair_ranges(gaps, merge_gap=6), [(utc(2022, 1, 1, 0, 30), utc(2022, 1, 1, 6))])
+        self.assertEqual(repair_ranges(gaps, merge_gap=0), gaps)
+        self.assertEqual(repair_ranges([]), [])
+
+        # Long gaps are split into ranges of at most max_rows intervals.
+        self.assertEqual(repair_ranges([(utc(2022, 1, 1, 12), utc(2022, 1, 3))], max_rows=48), [(utc(2022, 1, 1, 12), utc(2022, 1, 2)), (utc(2022, 1, 2), utc(2022, 1, 3))])
+
+
+class TestClientPlanner(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.server = StubServer().__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+
+        self.client = OctopusEnergy(
+            api_key="123456",
+            electricity_serial="abc1234",
+            electricity_mpan="1234567890",
+            electricity_product_code="21JBLAH",
+            electricity_region="Z",
+            gas_serial="cba4321",
+            gas_mprn="0987654321",
+            session=create_session(backoff_factor=0)
+        )
+        self.client.base_url = self.server.url("/v1")
+
+    def test_consumption_in_chunks(self):
+        start = utc(2022, 1, 1)
+        records = [
+            {
+                "consumption": float(i),
+                "interval_start": iso_format(start + datetime.timedelta(minutes=30 * i)),
+                "interval_end": iso_format(start + datetime.timedelta(minutes=30 * (i + 1))),
+            }
+            for i in range(48 * 10) if i != 100
+        ]
+        self.server.route("/v1/electricity-meter-points/1234567890/meters/abc1234/consumption", period_handler(self.server, records, "interval_start", "interval_end"))
+
+        response = self.client.get_consumption_in_chunks(ResourceType.ELECTRICITY, start, start + datetime.timedelta(days=10), max_rows=96)
+
+        self.assertEqual(response["results"], records)
+        self.assertEqual(response["count"], len(records))
+        self.assertEqual(response["gaps"], [(utc(2022, 1, 3, 2), utc(2022, 1, 3, 2, 30))])
+        # 5 chunks of 2 days. Full chunks followed by another chunk overflow onto a second page by the boundary
+        # interval, except the one containing the missing interval.
+        self.assertEqual(len(self.server.requests), 8)
+
+    def test_ranges_share_one_pool(self):
+        start = utc(2022, 1, 1)
+        records = [
+            {
+                "consumption": float(i),
+                "interval_start": iso_format(start + datetime.timedelta(minutes=30 * i)),
+                "interval_end": iso_format(start + datetime.timedelta(minutes=30 * (i + 1))),
+            }
+            for i in range(48 * 8)
+        ]
+        handler = period_handler(self.server, records, "interval_start", "interval_end")
+        lock = threading.Lock()
+        in_flight = [0, 0]
+
+        def counting_handler(request_path):
+            with lock:
+                in_flight[0] += 1
+                in_flight[1] = max(in_flight[1], in_flight[0])
+            time.sleep(0.02)
+            with lock:
+                in_flight[0] -= 1
+            return handler(request_path)
+
+        self.server.route("/v1/electricity-meter-points/1234567890/meters/abc1234/consumption", counting_handler)
+
+        # 4 ranges of 2 days, each of 4 pages of 24 intervals. All but the last overflow onto a 5th page by the
+        # boundary interval.
+        ranges = plan_ranges(start, start + datetime.timedelta(days=8), 96)
+        pages = self.client.get_ranges(
+            lambda period_from, period_to, page: self.client.consumption_data_url(ResourceType.ELECTRICITY, period_from, period_to, page_size=24, page=page),
+            ranges,
+            24
+        )
+
+        self.assertEqual(stitch(pages, "interval_start"), records)
+        self.assertEqual(len(self.server.requests), 19)
+        # Extra pages are requested on the same pool as the first pages, not a pool per range.
+        self.assertLessEqual(in_flight[1], self.client.max_workers)
+
+    def test_ranges_later_page_error(self):
+        start = utc(2022, 1, 1)
+        path = "/v1/electricity-meter-points/1234567890/meters/abc1234/consumption"
+        handler = period_handler(self.server, [
+            {
+                "consumption": float(i),
+                "interval_start": iso_format(start + datetime.timedelta(minutes=30 * i)),
+                "interval_end": iso_format(start + datetime.timedelta(minutes=30 * (i + 1))),
+            }
+            for i in range(48 * 4)
+        ], "interval_start", "interval_end")
+        expected = {"detail": "Invalid page."}
+
+        def failing_handler(request_path):
+            if "page=2" in request_path and "period_from=2022-01-03" in request_path:
+                return 404, {}, expected
+            return handler(request_path)
+
+        self.server.route(path, failing_handler)
+
+        # A failure of a later page is returned, as a failure of a first page is, rather than raised.
+        response = self.client.get_ranges(
+            lambda period_from, period_to, page: self.client.consumption_data_url(ResourceType.ELECTRICITY, period_from, period_to, page_size=24, page=page),
+            plan_ranges(start, start + datetime.timedelta(days=4), 96),
+            24
+        )
+        self.assertDictEqual(response, expected)
+
+    def test_repair_consumption(self):
+        start = utc(2022, 1, 1)
+        records = [
+            {
+                "consumption": float(i),
+                "interval_start": iso_format(start + datetime.timedelta(minutes=30 * i)),
+                "interval_end": iso_format(start + datetime.timedelta(minutes=30 * (i + 1))),
+            }
+            for i in range(48 * 365)
+        ]
+        # The server has every interval except the last two, which the meter has not yet reported.
+        self.server.route("/v1/electricity-meter-points/1234567890/meters/abc1234/consumption", period_handler(self.server, records[:-2], "interval_start", "interval_end"))
+
+        # A year of data missing a few intervals in March, a day in June and the end of December.
+        missing = {3000, 3001, 3010} | set(range(8000, 8048)) | set(range(len(records) - 5, len(records)))
+        retrieved = {"count": len(records) - len(missing), "next": None, "previous": None, "results": [record for i, record in enumerate(records) if i not in missing]}
+        retrieved["results"][0] = dict(retrieved["results"][0], consumption=-1.0)
+
+        response = self.client.repair_consumption(ResourceType.ELECTRICITY, retrieved, start, start + datetime.timedelta(days=365))
+
+        # Only the merged ranges around the gaps are requested: the March intervals together, the day in June and
+        # the end of December.
+        interval = datetime.timedelta(minutes=30)
+        requested = sorted(
+            (parse_qs(urlsplit(path).query)["period_from"][0], parse_qs(urlsplit(path).query)["period_to"][0])
+            for path in self.server.requests
+        )
+        self.assertEqual(requested, [
+            (iso_format(start + 3000 * interval), iso_format(start + 3011 * interval)),
+            (iso_format(start + 8000 * interval), iso_format(start + 8048 * interval)),
+            (iso_format(start + (len(records) - 5) * interval), iso_format(start + len(records) * interval)),
+        ])
+        self.assertEqual(response["results"][1:], records[1:-2])
+        # Intervals which were not refetched are kept.
+        self.assertEqual(response["results"][0]["consumption"], -1.0)
+        self.assertEqual(response["gaps"], [(utc(2022, 12, 31, 23), utc(2023, 1, 1))])
+
+        # Nothing is requested when there are no gaps.
+        response = self.client.repair_consumption(ResourceType.ELECTRICITY, records[:48], start, start + datetime.timedelta(days=1), reverse_order=True)
+        self.assertEqual(response["results"], records[:48][::-1])
+        self.assertEqual(len(self.server.requests), 3)
+
+        # A series is repaired in the same way.
+        response = self.client.repair_consumption(ResourceType.ELECTRICITY, ConsumptionSeries.from_response(retrieved), start, start + datetime.timedelta(days=365))
+        self.assertEqual(len(self.server.requests), 6)
+        self.assertEqual(response["results"][1:], records[1:-2])
+        self.assertEqual(response["results"][0]["consumption"], -1.0)
+
+    def test_aggregated_consumption_is_not_chunked(self):
+        records = [{"consumption": 1.0, "interval_start": "2022-01-01T00:00:00Z", "interval_end": "2022-01-02T00:00:00Z"}]
+        self.server.route("/v1/electricity-meter-points/1234567890/meters/abc1234/consumption", period_handler(self.server, records, "interval_start", "interval_end"))
+
+        response = self.client.get_consumption_in_chunks(ResourceType.ELECTRICITY, utc(2022, 1, 1), utc(2023, 1, 1), group_by=Aggregate.DAILY)
+        self.assertEqual(response["results"], records)
+        self.assertEqual(response["gaps"], [])
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_tariff_data_in_chunks(self):
+        start = utc(2022, 1, 1)
+        records = [
+            {
+                "value_exc_vat": float(i),
+                "value_inc_vat": float(i) * 1.05,
+                "valid_from": iso_format(start + datetime.timedelta(hours=6 * i)),
+                "valid_to": iso_format(start + datetime.timedelta(hours=6 * (i + 1))),
+            }
+            for i in reversed(range(4 * 6))
+        ]
+        self.server.route("/v1/products/21JBLAH/electricity-tariffs/E-1R-21JBLAH-Z/standard-unit-rates", period_handler(self.server, records, "valid_from", "valid_to"))
+
+        response = self.client.get_tariff_data_in_chunks(ResourceType.ELECTRICITY, ChargeType.STANDARD_UNIT_RATES, start, start + datetime.timedelta(days=7), max_rows=48)
+
+        self.assertEqual(response["results"], records)
+        self.assertEqual(response["gaps"], [(utc(2022, 1, 7), utc(2022, 1, 8))])
+        self.assertEqual(len(self.server.requests), 7)
+
+    def test_consumption_for_dates(self):
+        start = utc(2022, 3, 20)
+        records = [
+            {
+                "consumption": 1.0,
+                "interval_start": iso_format(start + datetime.timedelta(minutes=30 * i)),
+                "interval_end": iso_format(start + datetime.timedelta(minutes=30 * (i + 1))),
+            }
+            for i in range(48 * 240)
+        ]
+        self.server.route("/v1/electricity-meter-points/1234567890/meters/abc1234/consumption", period_handler(self.server, records, "interval_start", "interval_end"))
+
+        dates = [datetime.date(2022, 3, 26), datetime.date(2022, 3, 27), datetime.date(2022, 3, 29), datetime.date(2022, 10, 30)]
+        response = self.client.get_consumption_for_dates(ResourceType.ELECTRICITY, reversed(dates))
+
+        self.assertEqual(list(response), dates)
+        self.assertEqual([len(response[day]) for day in dates], [48, 46, 48, 50])
+        self.assertEqual(response[datetime.date(2022, 3, 29)][0]["interval_start"], "2022-03-28T23:00:00Z")
+        self.assertEqual(response[datetime.date(2022, 10, 30)][-1]["interval_start"], "2022-10-30T23:30:00Z")
+        # One range for the March dates and one for October.
+        self.assertEqual(len(self.server.requests), 2)
+
+        series = self.client.get_consumption_for_dates(ResourceType.ELECTRICITY, dates[:1], as_series=True)
+        self.assertEqual(len(series[dates[0]]), 48)
+
+    def test_consumption_for_dates_error(self):
+        self.server.add("/v1/electricity-meter-points/1234567890/meters/abc1234/consumption", {"detail": "Not found."}, status=404)
+
+        with self.assertRaises(ValueError):
+            self.client.get_consumption_for_dates(ResourceType.ELECTRICITY, [datetime.date(2022, 1, 1)])
+
+    def test_error(self):
+        self.server.add("/v1/electricity-meter-points/1234567890/meters/abc1234/consumption", {"detail": "Not found."}, status=404)
+
+        response = self.client.get_consumption_in_chunks(ResourceType.ELECTRICITY, utc(2022, 1, 1), utc(2022, 1, 3), max_rows=48)
+        self.assertEqual(response, {"detail": "Not found."})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+from octopus_energy_client import OctopusEnergy, RateLimiter, shared_rate_limiter, create_session
+from stub_server import StubServer
+import asyncio
+import threading
+import time
+import unittest
+
+
+class Clock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestRateLimiter(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.clock = Clock()
+        self.limiter = RateLimiter(rate=10, burst=2, min_rate=1, max_rate=12, recovery=1, clock=self.clock)
+
+    def test_burst_then_rate(self):
+        self.assertEqual(self.limiter.reserve(), 0)
+        self.assertEqual(self.limiter.reserve(), 0)
+        self.assertAlmostEqual(self.limiter.reserve(), 0.1)
+        self.assertAlmostEqual(self.limiter.reserve(), 0.2)
+
+        self.clock.now += 10
+        self.assertEqual(self.limiter.reserve(), 0)
+
+    def test_throttle_cuts_rate_once_per_cooldown(self):
+        self.limiter.update(429)
+        self.limiter.update(503)
+        self.assertEqual(self.limiter.rate, 5)
+        self.assertEqual(self.limiter.stats()["throttled"], 2)
+
+        self.clock.now += 1
+        self.limiter.update(429)
+        self.assertEqual(self.limiter.rate, 2.5)
+
+        for _ in range(10):
+            self.clock.now += 1
+            self.limiter.update(429)
+        self.assertEqual(self.limiter.rate, 1)
+
+    def test_throttle_empties_bucket(self):
+        self.limiter.update(429)
+        self.assertAlmostEqual(self.limiter.reserve(), 0.2)
+
+    def test_retry_after_delays_every_caller(self):
+        self.limiter.update(429, "3")
+        self.assertAlmostEqual(self.limiter.reserve(), 3.2)
+        self.assertAlmostEqual(self.limiter.reserve(), 3.4)
+
+    def test_retry_after_does_not_stack(self):
+        # Concurrent requests throttled with the same Retry-After delay callers once, not once per response.
+        for _ in range(10):
+            self.limiter.update(429, "5")
+        self.assertAlmostEqual(self.limiter.reserve(), 5.2)
+
+        # A later signal waits out its own Retry-After from now.
+        self.clock.now += 0.5
+        self.limiter.update(429, "5")
+        self.assertAlmostEqual(self.limiter.reserve(), 5.2)
+
+    def test_waiters_honour_later_retry_after(self):
+        limiter = RateLimiter(rate=10, burst=1)
+        limiter.reserve()
+        finished = []
+
+        def acquire():
+            limiter.acquire()
+            finished.append(time.monotonic())
+
+        # The thread reserves a slot 0.1s away, then a Retry-After arrives while it sleeps.
+        thread = threading.Thread(target=acquire)
+        thread.start()
+        time.sleep(0.02)
+        throttled = time.monotonic()
+        limiter.update(429, "0.3")
+        thread.join()
+
+        self.assertGreaterEqual(finished[0] - throttled, 0.3)
+        self.assertEqual(limiter.blocked_for(), 0)
+
+    def test_recovery(self):
+        self.limiter.update(429)
+        for _ in range(3):
+            self.limiter.update(200)
+        self.assertEqual(self.limiter.rate, 8)
+
+        for _ in range(10):
+            self.limiter.update(200)
+        self.assertEqual(self.limiter.rate, 12)
+
+        self.limiter.update(500)
+        self.limiter.update(None)
+        self.assertEqual(self.limiter.rate, 12)
+
+    def test_waiting(self):
+        limiter = RateLimiter(rate=20, burst=1)
+        limiter.reserve()
+
+        threads = [threading.Thread(target=limiter.acquire) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        while limiter.waiting < 3 and any(thread.is_alive() for thread in threads):
+            pass
+        self.assertGreater(limiter.waiting, 0)
+
+        for thread in threads:
+            thread.join()
+        self.assertEqual(limiter.waiting, 0)
+
+    def test_acquire_async(self):
+        limiter = RateLimiter(rate=100, burst=1)
+
+        async def acquire_all():
+            await asyncio.gather(*(limiter.acquire_async() for _ in range(5)))
+
+        asyncio.run(acquire_all())
+        self.assertEqual(limiter.waiting, 0)
+
+    def test_shared_rate_limiter(self):
+        self.assertIs(shared_rate_limiter(), shared_rate_limiter())
+
+
+class TestClientRateLimiting(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.server = StubServer().__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+
+        self.limiter = RateLimiter(rate=10, burst=10, recovery=1)
+        self.client = OctopusEnergy(
+            api_key="123456",
+            electricity_serial="abc1234",
+            electricity_mpan="1234567890",
+            gas_serial="cba4321",
+            gas_mprn="0987654321",
+            session=create_session(backoff_factor=0),
+            rate_limiter=self.limiter
+        )
+
+    def test_retried_throttles_are_reported(self):
+        url = self.server.url("/v1/industry/grid-supply-points")
+        expected = {"count": 0, "next": None, "previous": None, "results": []}
+        self.server.add("/v1/industry/grid-supply-points", {"detail": "Request was throttled."}, status=429, headers={"Retry-After": "0"})
+        self.server.add("/v1/industry/grid-supply-points", expected)
+
+        self.assertDictEqual(self.client.get_data(url), expected)
+        self.assertEqual(self.limiter.stats()["throttled"], 1)
+        self.assertEqual(self.limiter.rate, 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
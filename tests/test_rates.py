@@ -0,0 +1,115 @@
+from octopus_energy_client import RateIndex, RateSeries
+from octopus_energy_client.localtime import np
+from octopus_energy_client.util import OPEN_ENDED, iso_format, to_timestamp
+from array import array
+import unittest
+import datetime
+import random
+import pytz
+
+
+START = datetime.datetime(2022, 1, 1, tzinfo=pytz.utc)
+
+
+def agile(day, count=48):
+    """
+    A day of half-hourly windows, newest first as returned by the API, valued by their index in the day.
+    """
+    start = START + datetime.timedelta(days=day)
+    return {
+        "count": count,
+        "next": None,
+        "previous": None,
+        "results": [
+            {
+                "value_exc_vat": float(i),
+                "value_inc_vat": float(i) * 1.05,
+                "valid_from": iso_format(start + datetime.timedelta(minutes=30 * i)),
+                "valid_to": iso_format(start + datetime.timedelta(minutes=30 * (i + 1))),
+            }
+            for i in reversed(range(count))
+        ]
+    }
+
+
+def window(valid_from, valid_to, value):
+    return {"value_exc_vat": value, "value_inc_vat": value * 1.05, "valid_from": valid_from, "valid_to": valid_to}
+
+
+class TestRateIndex(unittest.TestCase):
+    def test_point_lookup(self):
+        index = RateIndex(agile(0))
+
+        self.assertEqual(len(index), 48)
+        self.assertEqual(index.rate_at("2022-01-01T17:30:00Z"), 35 * 1.05)
+        self.assertEqual(index.rate_at(START + datetime.timedelta(minutes=45), include_vat=False), 1.0)
+        self.assertEqual(index.rate_at(to_timestamp(START)), 0.0)
+        self.assertIsNone(index.rate_at("2021-12-31T23:59:59Z"))
+        self.assertIsNone(index.rate_at("2022-01-02T00:00:00Z"))
+
+    def test_open_ended_windows(self):
+        index = RateIndex([
+            window("2021-06-01T00:00:00Z", "2022-04-01T00:00:00Z", 20.0),
+            window("2022-04-01T00:00:00Z", None, 30.0),
+            window(None, "2021-06-01T00:00:00Z", 10.0),
+        ])
+
+        self.assertEqual(index.rate_at("2000-01-01T00:00:00Z", include_vat=False), 10.0)
+        self.assertEqual(index.rate_at("2022-03-31T23:59:59Z", include_vat=False), 20.0)
+        self.assertEqual(index.rate_at("2099-01-01T00:00:00Z", include_vat=False), 30.0)
+
+    def test_later_window_overrides_open_ended_window(self):
+        index = RateIndex([window("2021-01-01T00:00:00Z", None, 20.0)])
+        index.extend([window("2022-01-01T00:00:00Z", "2022-02-01T00:00:00Z", 25.0)])
+
+        self.assertEqual(index.rate_at("2021-12-31T00:00:00Z", include_vat=False), 20.0)
+        self.assertEqual(index.rate_at("2022-01-15T00:00:00Z", include_vat=False), 25.0)
+        self.assertEqual(index.rate_at("2022-03-01T00:00:00Z", include_vat=False), 20.0)
+        self.assertEqual(len(index), 3)
+
+    def test_append_published_windows(self):
+        index = RateIndex.from_pages([agile(1), agile(0)])
+        ends = list(index.ends[:96])
+
+        index.extend(agile(2))
+        self.assertEqual(len(index), 144)
+        self.assertEqual(list(index.ends[:96]), ends)
+        self.assertEqual(index.rate_at("2022-01-03T23:30:00Z", include_vat=False), 47.0)
+
+    def test_matches_linear_scan(self):
+        generator = random.Random(1)
+        windows = []
+        for _ in range(200):
+            valid_from = generator.randrange(0, 1000)
+            valid_to = valid_from + generator.randrange(1, 200) if generator.random() < 0.9 else OPEN_ENDED
+            windows.append((valid_from, valid_to, float(len(windows)), float(len(windows))))
+
+        index = RateIndex()
+        for w in windows:
+            index.add(*w)
+
+        for time in range(-10, 1300):
+            covering = [w for w in windows if w[0] <= time < w[1]]
+            # The latest start applies, and of windows starting together the last added.
+            expected = max(covering, key=lambda w: (w[0], w[2]))[2] if covering else None
+            self.assertEqual(index.rate_at(time), expected, time)
+
+        # Segments are disjoint and in order.
+        self.assertTrue(all(end <= start for end, start in zip(index.ends, index.starts[1:])))
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_batch_lookup(self):
+        index = RateIndex(RateSeries.from_response(agile(0)))
+        times = np.array([to_timestamp(START) - 1, to_timestamp(START) + 1800 * 10, to_timestamp(START) + 1800 * 10 + 1799, to_timestamp(START) + 86400])
+
+        np.testing.assert_array_equal(index.lookup(times, include_vat=False), [np.nan, 10.0, 10.0, np.nan])
+
+        # Cached arrays are refreshed when windows are added.
+        index.extend(agile(1))
+        self.assertEqual(index.lookup(times[-1:], include_vat=False)[0], 0.0)
+
+    def test_ignores_empty_windows(self):
+        index = RateIndex()
+        index.add(10, 10, 1.0, 1.0)
+        self.assertEqual(len(index), 0)
+        self.assertEqual(index.starts, array("q"))
@@ -0,0 +1,100 @@
+from octopus_energy_client.localtime import np
+from octopus_energy_client.util import iso_format, to_timestamp
+import unittest
+import datetime
+import random
+import pytz
+
+if np is not None:
+    from octopus_energy_client import SlotOptimizer
+
+
+START = datetime.datetime(2022, 1, 1, tzinfo=pytz.utc)
+
+
+def utc(*args):
+    return datetime.datetime(*args, tzinfo=pytz.utc)
+
+
+def rates(prices):
+    """
+    A tariff response with a half-hourly window for each price, newest first, skipping None prices.
+    """
+    return {"count": len(prices), "next": None, "previous": None, "results": [
+        {
+            "value_exc_vat": price,
+            "value_inc_vat": price * 1.05,
+            "valid_from": iso_format(START + datetime.timedelta(minutes=30 * i)),
+            "valid_to": iso_format(START + datetime.timedelta(minutes=30 * (i + 1))),
+        }
+        for i, price in reversed(list(enumerate(prices))) if price is not None
+    ]}
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestSlotOptimizer(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.prices = [20.0, 18.0, 5.0, 6.0, 30.0, 4.0, 4.0, 25.0, None, 1.0, 2.0, 15.0]
+        self.optimizer = SlotOptimizer(rates(self.prices), include_vat=False)
+
+    def test_cheapest_block(self):
+        self.assertEqual(self.optimizer.cheapest_block(2), (utc(2022, 1, 1, 4, 30), utc(2022, 1, 1, 5, 30), 1.5))
+        self.assertEqual(self.optimizer.cheapest_block(2, deadline=utc(2022, 1, 1, 4, 30)), (utc(2022, 1, 1, 2, 30), utc(2022, 1, 1, 3, 30), 4.0))
+        # The slot without a rate breaks blocks which span it.
+        self.assertEqual(self.optimizer.cheapest_block(3, earliest="2022-01-01T03:00:00Z"), (utc(2022, 1, 1, 4, 30), utc(2022, 1, 1, 6), 6.0))
+        self.assertIsNone(self.optimizer.cheapest_block(3, earliest=utc(2022, 1, 1, 4, 45)))
+        self.assertIsNone(self.optimizer.cheapest_block(13))
+
+    def test_cheapest_slots(self):
+        starts, mean_price = self.optimizer.cheapest_slots(3)
+        # Of the two slots at 4p, the earlier is chosen.
+        self.assertEqual(starts, [utc(2022, 1, 1, 2, 30), utc(2022, 1, 1, 4, 30), utc(2022, 1, 1, 5)])
+        self.assertAlmostEqual(mean_price, 7 / 3)
+
+        starts, _ = self.optimizer.cheapest_slots(2, earliest=utc(2022, 1, 1, 0, 10), deadline=utc(2022, 1, 1, 2))
+        self.assertEqual(starts, [utc(2022, 1, 1, 1), utc(2022, 1, 1, 1, 30)])
+        self.assertIsNone(self.optimizer.cheapest_slots(12))
+
+    def test_batches_match_brute_force(self):
+        generator = random.Random(3)
+        prices = [generator.choice([None] + [float(p) for p in range(-5, 40)]) if generator.random() < 0.1 else float(generator.randrange(-5, 40)) for _ in range(96)]
+        optimizer = SlotOptimizer(rates(prices), include_vat=False)
+
+        count = 500
+        slots = np.array([generator.randrange(1, 12) for _ in range(count)])
+        earliest = np.array([to_timestamp(START) + generator.randrange(0, 96 * 1800) for _ in range(count)])
+        deadline = earliest + np.array([generator.randrange(0, 40 * 1800) for _ in range(count)])
+
+        blocks = optimizer.cheapest_blocks(slots, earliest, deadline)
+        sets = optimizer.cheapest_slot_sets(slots, earliest, deadline)
+
+        for q in range(count):
+            lo = -(-(earliest[q] - to_timestamp(START)) // 1800)
+            hi = min(96, (deadline[q] - to_timestamp(START)) // 1800)
+            n = slots[q]
+
+            candidates = [sum(prices[i:i + n]) for i in range(lo, hi - n + 1) if None not in prices[i:i + n]]
+            if candidates:
+                self.assertTrue(blocks["found"][q])
+                self.assertAlmostEqual(blocks["mean_price"][q], min(candidates) / n)
+            else:
+                self.assertFalse(blocks["found"][q])
+                self.assertEqual(blocks["start"][q], -1)
+
+            available = sorted(p for p in prices[lo:hi] if p is not None)
+            if len(available) >= n:
+                self.assertAlmostEqual(sets["mean_price"][q], sum(available[:n]) / n)
+                self.assertEqual(sets["chosen"][q].sum(), n)
+            else:
+                self.assertFalse(sets["found"][q])
+                self.assertFalse(sets["chosen"][q].any())
+
+    def test_open_ended_rates(self):
+        fixed = {"count": 1, "next": None, "previous": None, "results": [{"value_exc_vat": 20.0, "value_inc_vat": 21.0, "valid_from": "2022-01-01T00:00:00Z", "valid_to": None}]}
+        with self.assertRaises(ValueError):
+            SlotOptimizer(fixed)
+
+        optimizer = SlotOptimizer(fixed, period_to=utc(2022, 1, 2))
+        self.assertEqual(len(optimizer), 48)
+        self.assertEqual(optimizer.cheapest_block(4), (utc(2022, 1, 1), utc(2022, 1, 1, 2), 21.0))
@@ -0,0 +1,151 @@
+from octopus_energy_client import OctopusEnergy, ResourceType, ChargeType, ConsumptionSeries, RateSeries
+from octopus_energy_client.series import np
+from octopus_energy_client.util import OPEN_ENDED, parse_timestamps, to_timestamp
+from octopus_energy_client import decoding
+import unittest
+import responses
+import json
+import datetime
+import pytz
+
+
+CONSUMPTION = {
+    "count": 3,
+    "next": None,
+    "previous": None,
+    "results": [
+        {"consumption": 0.113, "interval_start": "2022-03-27T00:00:00Z", "interval_end": "2022-03-27T00:30:00Z"},
+        {"consumption": 0.25, "interval_start": "2022-03-27T00:30:00Z", "interval_end": "2022-03-27T02:00:00+01:00"},
+        {"consumption": 0.5, "interval_start": "2022-03-27T02:00:00+01:00", "interval_end": "2022-03-27T02:30:00+01:00"},
+    ]
+}
+
+RATES = {
+    "count": 3,
+    "next": None,
+    "previous": None,
+    "results": [
+        {"value_exc_vat": 20.0, "value_inc_vat": 21.0, "valid_from": "2022-01-01T01:00:00Z", "valid_to": None},
+        {"value_exc_vat": 10.0, "value_inc_vat": 10.5, "valid_from": "2022-01-01T00:30:00Z", "valid_to": "2022-01-01T01:00:00Z"},
+        {"value_exc_vat": 5.0, "value_inc_vat": 5.25, "valid_from": "2022-01-01T00:00:00Z", "valid_to": "2022-01-01T00:30:00Z"},
+    ]
+}
+
+
+class TestSeries(unittest.TestCase):
+    def test_parse_timestamps(self):
+        values = [r["interval_start"] for r in CONSUMPTION["results"]] + [None]
+        expected = [to_timestamp(v) for v in values[:-1]] + [OPEN_ENDED]
+        self.assertEqual(list(parse_timestamps(values)), expected)
+
+    def test_consumption_series(self):
+        series = ConsumptionSeries.from_response(CONSUMPTION)
+        start = to_timestamp("2022-03-27T00:00:00Z")
+
+        self.assertEqual(len(series), 3)
+        self.assertEqual(list(series.interval_start), [start, start + 1800, start + 3600])
+        self.assertEqual(list(series.interval_end), [start + 1800, start + 3600, start + 5400])
+        self.assertEqual(series[1].consumption, 0.25)
+        self.assertEqual([r.interval_start for r in series], list(series.interval_start))
+
+        with self.assertRaises(AttributeError):
+            series[0].other = 1
+
+    def test_consumption_to_records(self):
+        records = ConsumptionSeries.from_response(CONSUMPTION).to_records()
+        self.assertEqual(records[0], CONSUMPTION["results"][0])
+        # Times are given in UTC.
+        self.assertEqual(records[2]["interval_start"], "2022-03-27T01:00:00Z")
+        self.assertEqual(ConsumptionSeries.from_response(records).interval_end, ConsumptionSeries.from_response(CONSUMPTION).interval_end)
+
+    def test_consumption_series_extend(self):
+        series = ConsumptionSeries.from_response(CONSUMPTION)
+        series.extend(ConsumptionSeries.from_response(CONSUMPTION["results"][:1]))
+        self.assertEqual(len(series), 4)
+
+    def test_rate_series_sorted(self):
+        series = RateSeries.from_response(RATES)
+        start = to_timestamp("2022-01-01T00:00:00Z")
+
+        self.assertEqual(list(series.valid_from), [start, start + 1800, start + 3600])
+        self.assertEqual(list(series.valid_to), [start + 1800, start + 3600, OPEN_ENDED])
+        self.assertEqual(list(series.value_inc_vat), [5.25, 10.5, 21.0])
+        self.assertEqual(series[2].value_exc_vat, 20.0)
+
+    def test_error_response(self):
+        with self.assertRaises(ValueError):
+            RateSeries.from_response({"detail": "This tariff has standard rates, not day and night."})
+
+    def test_from_json(self):
+        # Typed decoding gives the same series as parsing the response into dictionaries.
+        consumption = ConsumptionSeries.from_json(json.dumps(CONSUMPTION).encode("utf-8"))
+        expected = ConsumptionSeries.from_response(CONSUMPTION)
+        self.assertEqual(list(consumption.interval_start), list(expected.interval_start))
+        self.assertEqual(list(consumption.interval_end), list(expected.interval_end))
+        self.assertEqual(list(consumption.consumption), list(expected.consumption))
+
+        rates = RateSeries.from_json(json.dumps(RATES).encode("utf-8"))
+        expected = RateSeries.from_response(RATES)
+        self.assertEqual(list(rates.valid_from), list(expected.valid_from))
+        self.assertEqual(list(rates.valid_to), list(expected.valid_to))
+        self.assertEqual(list(rates.value_inc_vat), list(expected.value_inc_vat))
+
+        with self.assertRaises(ValueError):
+            RateSeries.from_json(b'{"detail": "This tariff has standard rates, not day and night."}')
+
+    def test_from_json_invalid(self):
+        # Bodies which are not JSON, e.g. a proxy's error page or a truncated response, raise ValueError.
+        for body in (b"<html><body>502 Bad Gateway</body></html>", json.dumps(CONSUMPTION).encode("utf-8")[:100]):
+            with self.assertRaises(ValueError):
+                ConsumptionSeries.from_json(body)
+            with self.assertRaises(ValueError):
+                RateSeries.from_json(body)
+            with self.assertRaises(ValueError):
+                decoding.loads(body)
+            if decoding.MSGSPEC_INSTALLED:
+                with self.assertRaises(ValueError):
+                    decoding._msgspec_loads(body)
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_numpy_views(self):
+        series = ConsumptionSeries.from_response(CONSUMPTION)
+        arrays = series.to_numpy()
+
+        self.assertEqual(arrays["interval_start"].dtype, np.int64)
+        self.assertEqual(arrays["consumption"].dtype, np.float64)
+        self.assertAlmostEqual(arrays["consumption"].sum(), 0.863)
+
+        # Views share memory with the series.
+        series.consumption[0] = 1.0
+        self.assertEqual(arrays["consumption"][0], 1.0)
+
+        self.assertEqual(len(ConsumptionSeries().to_numpy()["interval_start"]), 0)
+        self.assertEqual(RateSeries.from_response(RATES).to_numpy()["value_inc_vat"].tolist(), [5.25, 10.5, 21.0])
+
+    @responses.activate
+    def test_client_as_series(self):
+        client = OctopusEnergy(
+            api_key="123456",
+            electricity_serial="abc1234",
+            electricity_mpan="1234567890",
+            electricity_product_code="21JBLAH",
+            electricity_region="Z",
+            gas_serial="cba4321",
+            gas_mprn="0987654321"
+        )
+        period_from = datetime.datetime(2022, 3, 27, tzinfo=pytz.utc)
+        period_to = datetime.datetime(2022, 3, 28, tzinfo=pytz.utc)
+        responses.add(responses.GET, client.consumption_data_url(ResourceType.ELECTRICITY, period_from, period_to), json=CONSUMPTION, status=200)
+        responses.add(responses.GET, client.tariff_data_url(ResourceType.ELECTRICITY, ChargeType.STANDARD_UNIT_RATES), json=RATES, status=200)
+
+        consumption = client.get_consumption_for_period(ResourceType.ELECTRICITY, period_from, period_to, as_series=True)
+        self.assertIsInstance(consumption, ConsumptionSeries)
+        self.assertEqual(len(consumption), 3)
+
+        rates = client.get_tariff_data(ResourceType.ELECTRICITY, ChargeType.STANDARD_UNIT_RATES, as_series=True)
+        self.assertIsInstance(rates, RateSeries)
+        self.assertEqual(len(rates), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
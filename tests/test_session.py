@@ -0,0 +1,87 @@
+from octopus_energy_client import OctopusEnergy, create_session
+from stub_server import StubServer
+import unittest
+
+
+class TestSession(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.server = StubServer().__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+
+        self.client = OctopusEnergy(
+            api_key="123456",
+            electricity_serial="abc1234",
+            electricity_mpan="1234567890",
+            gas_serial="cba4321",
+            gas_mprn="0987654321",
+            session=create_session(backoff_factor=0),
+            timeout=5
+        )
+
+    def test_connections_are_reused(self):
+        url = self.server.url("/v1/electricity-meter-points/1234567890")
+        expected = {'gsp': '_C', 'mpan': '1234567890', 'profile_class': 1}
+        self.server.add("/v1/electricity-meter-points/1234567890", expected)
+
+        for _ in range(5):
+            self.assertDictEqual(self.client.get_data(url), expected)
+
+        self.assertEqual(len(self.server.requests), 5)
+        self.assertEqual(self.server.connections, 1)
+
+    def test_session_shared_between_clients(self):
+        url = self.server.url("/v1/industry/grid-supply-points")
+        self.server.add("/v1/industry/grid-supply-points", {"count": 0, "next": None, "previous": None, "results": []})
+
+        other = OctopusEnergy(
+            api_key="654321",
+            electricity_serial="abc1234",
+            electricity_mpan="1234567890",
+            gas_serial="cba4321",
+            gas_mprn="0987654321",
+            session=self.client.session
+        )
+
+        self.client.get_data(url)
+        other.get_data(url)
+        self.assertEqual(self.server.connections, 1)
+
+    def test_retry_after_rate_limit(self):
+        url = self.server.url("/v1/industry/grid-supply-points")
+        expected = {"count": 0, "next": None, "previous": None, "results": []}
+        self.server.add("/v1/industry/grid-supply-points", {"detail": "Request was throttled."}, status=429, headers={"Retry-After": "0"})
+        self.server.add("/v1/industry/grid-supply-points", expected)
+
+        self.assertDictEqual(self.client.get_data(url), expected)
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_retry_server_errors(self):
+        url = self.server.url("/v1/industry/grid-supply-points")
+        expected = {"count": 0, "next": None, "previous": None, "results": []}
+        self.server.add("/v1/industry/grid-supply-points", {"detail": "Bad gateway."}, status=502)
+        self.server.add("/v1/industry/grid-supply-points", {"detail": "Unavailable."}, status=503)
+        self.server.add("/v1/industry/grid-supply-points", expected)
+
+        self.assertDictEqual(self.client.get_data(url), expected)
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_retries_exhausted_returns_error_body(self):
+        url = self.server.url("/v1/industry/grid-supply-points")
+        expected = {"detail": "Unavailable."}
+        self.server.add("/v1/industry/grid-supply-points", expected, status=503)
+
+        self.assertDictEqual(self.client.get_data(url), expected)
+        self.assertEqual(len(self.server.requests), 4)
+
+    def test_client_errors_not_retried(self):
+        url = self.server.url("/v1/products/FOO/electricity-tariffs/E-1R-FOO-C/day-unit-rates")
+        expected = {"detail": "This tariff has standard rates, not day and night."}
+        self.server.add("/v1/products/FOO/electricity-tariffs/E-1R-FOO-C/day-unit-rates", expected, status=400)
+
+        self.assertDictEqual(self.client.get_data(url), expected)
+        self.assertEqual(len(self.server.requests), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
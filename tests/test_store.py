@@ -0,0 +1,146 @@
+from octopus_energy_client import OctopusEnergy, ResourceType, ConsumptionStore
+from octopus_energy_client.planner import MAX_CONSUMPTION_ROWS
+import unittest
+import responses
+import datetime
+import os
+import tempfile
+import pytz
+
+
+def consumption(start, count):
+    return [
+        {
+            "consumption": float(i),
+            "interval_start": (start + datetime.timedelta(minutes=30 * i)).isoformat().replace("+00:00", "Z"),
+            "interval_end": (start + datetime.timedelta(minutes=30 * (i + 1))).isoformat().replace("+00:00", "Z"),
+        }
+        for i in range(count)
+    ]
+
+
+class TestConsumptionStore(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.store = ConsumptionStore()
+        self.addCleanup(self.store.close)
+        self.start = datetime.datetime(2022, 1, 1, tzinfo=pytz.utc)
+
+    def test_upsert_and_get_range(self):
+        records = consumption(self.start, 48)
+        self.assertEqual(self.store.upsert("123", "abc", records), 48)
+
+        result = self.store.get_range("123", "abc", self.start + datetime.timedelta(hours=1), self.start + datetime.timedelta(hours=2))
+        self.assertEqual(result, records[2:4])
+
+        result = self.store.get_range("123", "abc", self.start, self.start + datetime.timedelta(days=1), reverse_order=True)
+        self.assertEqual(result, records[::-1])
+
+        self.assertEqual(self.store.get_range("123", "other", self.start, self.start + datetime.timedelta(days=1)), [])
+
+    def test_upsert_replaces(self):
+        records = consumption(self.start, 4)
+        self.store.upsert("123", "abc", records)
+        self.store.upsert("123", "abc", [dict(records[1], consumption=9.5)])
+
+        result = self.store.get_range("123", "abc", self.start, self.start + datetime.timedelta(hours=2))
+        self.assertEqual([r["consumption"] for r in result], [0.0, 9.5, 2.0, 3.0])
+
+    def test_watermark_and_missing_ranges(self):
+        records = consumption(self.start, 48)
+        self.store.upsert("123", "abc", records[:10] + records[12:24])
+
+        self.assertIsNone(self.store.watermark("123", "def"))
+        self.assertEqual(self.store.watermark("123", "abc"), self.start + datetime.timedelta(hours=12))
+        self.assertEqual(self.store.missing_ranges("123", "abc", self.start, self.start + datetime.timedelta(days=1)), [
+            (self.start + datetime.timedelta(hours=5), self.start + datetime.timedelta(hours=6)),
+            (self.start + datetime.timedelta(hours=12), self.start + datetime.timedelta(days=1)),
+        ])
+
+    def test_persists_to_disk(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "consumption.db")
+            store = ConsumptionStore(path)
+            store.upsert("123", "abc", consumption(self.start, 2))
+            store.close()
+
+            store = ConsumptionStore(path)
+            self.assertEqual(len(store.get_range("123", "abc", self.start, self.start + datetime.timedelta(days=1))), 2)
+            store.close()
+
+
+class TestClientWithStore(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.store = ConsumptionStore()
+        self.addCleanup(self.store.close)
+        self.client = OctopusEnergy(
+            api_key="123456",
+            electricity_serial="abc1234",
+            electricity_mpan="1234567890",
+            gas_serial="cba4321",
+            gas_mprn="0987654321",
+            store=self.store
+        )
+        self.start = datetime.datetime(2022, 1, 1, tzinfo=pytz.utc)
+
+    def add_page(self, period_from, period_to, results):
+        url = self.client.consumption_data_url(ResourceType.ELECTRICITY, period_from, period_to, page_size=MAX_CONSUMPTION_ROWS)
+        responses.add(responses.GET, url, json={"count": len(results), "next": None, "previous": None, "results": results}, status=200)
+
+    @responses.activate
+    def test_only_missing_intervals_fetched(self):
+        day = datetime.timedelta(days=1)
+        records = consumption(self.start, 96)
+        self.add_page(self.start, self.start + day, records[:48])
+        self.add_page(self.start + day, self.start + 2 * day, records[48:])
+
+        response = self.client.get_consumption_for_period(ResourceType.ELECTRICITY, self.start, self.start + day)
+        self.assertEqual(response["results"], records[:48])
+        self.assertEqual(len(responses.calls), 1)
+
+        # Answered entirely from the store.
+        response = self.client.get_consumption_for_period(ResourceType.ELECTRICITY, self.start, self.start + day, reverse_order=True)
+        self.assertEqual(response["results"], records[:48][::-1])
+        self.assertEqual(len(responses.calls), 1)
+
+        # Only the intervals after the watermark are requested.
+        response = self.client.get_consumption_for_period(ResourceType.ELECTRICITY, self.start, self.start + 2 * day)
+        self.assertEqual(response["count"], 96)
+        self.assertEqual(response["results"], records)
+        self.assertEqual(len(responses.calls), 2)
+
+    @responses.activate
+    def test_missing_year_fetched_in_one_request(self):
+        # Missing intervals are fetched in pages of the maximum size, whatever page size the caller asked for.
+        year_to = datetime.datetime(2023, 1, 1, tzinfo=pytz.utc)
+        records = consumption(self.start, 365 * 48)
+        self.add_page(self.start, year_to, records)
+
+        response = self.client.get_consumption_for_period(ResourceType.ELECTRICITY, self.start, year_to, page_size=100, all_pages=True)
+        self.assertEqual(response["count"], 365 * 48)
+        self.assertEqual(len(responses.calls), 1)
+
+    @responses.activate
+    def test_holes_fetched(self):
+        records = consumption(self.start, 48)
+        self.store.upsert("1234567890", "abc1234", records[:20] + records[22:])
+        hole_from = self.start + datetime.timedelta(hours=10)
+        self.add_page(hole_from, hole_from + datetime.timedelta(hours=1), records[20:22])
+
+        response = self.client.get_consumption_for_period(ResourceType.ELECTRICITY, self.start, self.start + datetime.timedelta(days=1))
+        self.assertEqual(response["results"], records)
+        self.assertEqual(len(responses.calls), 1)
+
+    @responses.activate
+    def test_error_response_returned(self):
+        url = self.client.consumption_data_url(ResourceType.ELECTRICITY, self.start, self.start + datetime.timedelta(days=1), page_size=MAX_CONSUMPTION_ROWS)
+        expected = {"detail": "Authentication credentials were not provided."}
+        responses.add(responses.GET, url, json=expected, status=401)
+
+        response = self.client.get_consumption_for_period(ResourceType.ELECTRICITY, self.start, self.start + datetime.timedelta(days=1))
+        self.assertDictEqual(response, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+from octopus_energy_client import OctopusEnergy, ResourceType, StreamedPage, create_session
+from stub_server import StubServer, paginated
+import unittest
+import datetime
+import json
+import pytz
+
+
+def chunked(text, size):
+    data = text.encode("utf-8")
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class TestStreamedPage(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.page = {
+            "count": 12345,
+            "next": "https://api.octopus.energy/v1/electricity-meter-points/1234567890/meters/abc1234/consumption?page=2",
+            "previous": None,
+            "results": [
+                {"consumption": 0.113, "interval_start": "2022-01-01T00:00:00Z", "interval_end": "2022-01-01T00:30:00Z"},
+                {"consumption": 12.5, "interval_start": "2022-01-01T00:30:00Z", "interval_end": "2022-01-01T01:00:00Z", "note": "café ☃"},
+                {"consumption": 7, "interval_start": "2022-01-01T01:00:00Z", "interval_end": "2022-01-01T01:30:00Z"},
+            ]
+        }
+
+    def test_any_chunk_size(self):
+        text = json.dumps(self.page, indent=2, ensure_ascii=False)
+        for size in (1, 2, 3, 7, 64, len(text) * 2):
+            with self.subTest(size=size):
+                page = StreamedPage(chunked(text, size))
+                self.assertEqual(page.count, 12345)
+                self.assertEqual(page.next, self.page["next"])
+                self.assertIsNone(page.previous)
+                self.assertEqual(list(page), self.page["results"])
+
+    def test_fields_after_results(self):
+        text = json.dumps({"results": self.page["results"], "count": 3, "next": None})
+        page = StreamedPage(chunked(text, 5))
+
+        # Fields which follow the results are only known once the results have been read.
+        self.assertIsNone(page.count)
+        self.assertEqual(list(page), self.page["results"])
+        self.assertEqual(page.count, 3)
+        self.assertIsNone(page.next)
+
+    def test_read(self):
+        self.assertEqual(StreamedPage(chunked(json.dumps(self.page), 10)).read(), self.page)
+
+    def test_empty_results(self):
+        page = StreamedPage([b'{"count": 0, "next": null, "previous": null, "results": []}'])
+        self.assertTrue(page.is_paginated)
+        self.assertEqual(list(page), [])
+        self.assertEqual(page.count, 0)
+
+    def test_error_response(self):
+        page = StreamedPage([b'{"detail": "Not found."}'])
+        self.assertFalse(page.is_paginated)
+        self.assertEqual(list(page), [])
+        self.assertEqual(page.fields, {"detail": "Not found."})
+
+    def test_truncated_response(self):
+        page = StreamedPage([b'{"count": 2, "results": [{"consumption": 1.0}, {"consump'])
+        with self.assertRaises(ValueError):
+            list(page)
+
+    def test_iterated_once(self):
+        page = StreamedPage([json.dumps(self.page).encode("utf-8")])
+        list(page)
+        with self.assertRaises(RuntimeError):
+            list(page)
+
+    def test_memory_is_flat(self):
+        count = 200000
+        record = '{"consumption": 0.113, "interval_start": "2022-01-01T00:00:00Z", "interval_end": "2022-01-01T00:30:00Z"}'
+
+        def body():
+            yield f'{{"count": {count}, "next": null, "previous": null, "results": ['.encode("utf-8")
+            for i in range(count):
+                yield (record + ("," if i < count - 1 else "")).encode("utf-8")
+            yield b']}'
+
+        page = StreamedPage(body())
+        largest = 0
+        total = 0
+        for _ in page:
+            largest = max(largest, len(page._parser._buffer))
+            total += 1
+
+        self.assertEqual(total, count)
+        self.assertLess(largest, 128 * 1024)
+
+
+class TestClientStreaming(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.server = StubServer().__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+
+        self.client = OctopusEnergy(
+            api_key="123456",
+            electricity_serial="abc1234",
+            electricity_mpan="1234567890",
+            electricity_product_code="21JBLAH",
+            electricity_region="Z",
+            gas_serial="cba4321",
+            gas_mprn="0987654321",
+            session=create_session(backoff_factor=0)
+        )
+        self.client.base_url = self.server.url("/v1")
+
+    def test_get_data_stream(self):
+        expected = {"count": 1, "next": None, "previous": None, "results": [{"group_id": "_C"}]}
+        self.server.add("/v1/industry/grid-supply-points", expected)
+
+        with self.client.get_data_stream(self.server.url("/v1/industry/grid-supply-points"), chunk_size=8) as page:
+            self.assertEqual(page.read(), expected)
+
+    def test_iter_consumption_stream(self):
+        start = datetime.datetime(2022, 1, 1, tzinfo=pytz.utc)
+        results = [
+            {
+                "consumption": float(i),
+                "interval_start": (start + datetime.timedelta(minutes=30 * i)).isoformat(),
+                "interval_end": (start + datetime.timedelta(minutes=30 * (i + 1))).isoformat(),
+            }
+            for i in range(250)
+        ]
+        self.server.route("/v1/electricity-meter-points/1234567890/meters/abc1234/consumption", paginated(self.server, results))
+
+        records = list(self.client.iter_consumption(ResourceType.ELECTRICITY, start, start + datetime.timedelta(days=7), stream=True))
+        self.assertEqual(records, results)
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual(self.server.connections, 1)
+
+    def test_iter_stream_error(self):
+        self.server.add("/v1/electricity-meter-points/1234567890/meters/abc1234/consumption", {"detail": "Not found."}, status=404)
+
+        with self.assertRaises(ValueError):
+            list(self.client.iter_consumption(ResourceType.ELECTRICITY, datetime.datetime(2022, 1, 1, tzinfo=pytz.utc), datetime.datetime(2022, 1, 2, tzinfo=pytz.utc), stream=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
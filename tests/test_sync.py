@@ -0,0 +1,148 @@
+from octopus_energy_client import OctopusEnergy, ResourceType, ChargeType, SyncScheduler, ConsumptionJob, TariffJob, create_session
+from octopus_energy_client.util import iso_format, to_timestamp
+from stub_server import StubServer, period_handler
+import unittest
+import datetime
+import tempfile
+import os
+import pytz
+
+
+CONSUMPTION_PATH = "/v1/electricity-meter-points/1234567890/meters/abc1234/consumption"
+RATES_PATH = "/v1/products/21JBLAH/electricity-tariffs/E-1R-21JBLAH-Z/standard-unit-rates"
+
+
+def utc(*args):
+    return datetime.datetime(*args, tzinfo=pytz.utc)
+
+
+def half_hours(start, count, **fields):
+    return [
+        {
+            "interval_start": iso_format(start + datetime.timedelta(minutes=30 * i)),
+            "interval_end": iso_format(start + datetime.timedelta(minutes=30 * (i + 1))),
+            **fields
+        }
+        for i in range(count)
+    ]
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = to_timestamp(now)
+
+    def __call__(self):
+        return self.now
+
+
+class TestSync(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.server = StubServer().__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        temporary = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary.cleanup)
+        self.state_path = os.path.join(temporary.name, "sync.json")
+
+        self.client = OctopusEnergy(
+            api_key="123456",
+            electricity_serial="abc1234",
+            electricity_mpan="1234567890",
+            electricity_product_code="21JBLAH",
+            electricity_region="Z",
+            gas_serial="cba4321",
+            gas_mprn="0987654321",
+            session=create_session(backoff_factor=0, max_retries=0)
+        )
+        self.client.base_url = self.server.url("/v1")
+
+        self.readings = half_hours(utc(2022, 1, 1), 48 * 3, consumption=0.1)
+        self.server.route(CONSUMPTION_PATH, period_handler(self.server, self.readings, "interval_start", "interval_end"))
+        self.received = {}
+
+    def on_data(self, key, records):
+        self.received.setdefault(key, []).extend(records)
+
+    def scheduler(self, jobs, clock):
+        scheduler = SyncScheduler(jobs, state_path=self.state_path, clock=clock)
+        self.addCleanup(scheduler.close)
+        return scheduler
+
+    def consumption_job(self):
+        return ConsumptionJob(self.client, ResourceType.ELECTRICITY, self.on_data, start=utc(2022, 1, 1))
+
+    def test_watermark_and_backoff(self):
+        clock = Clock(utc(2022, 1, 2))
+        scheduler = self.scheduler([self.consumption_job()], clock)
+        key = "electricity:1234567890:abc1234:consumption"
+
+        self.assertEqual(scheduler.run_pending(), {key: 48})
+        self.assertEqual(scheduler.state[key]["watermark"], "2022-01-02T00:00:00Z")
+        self.assertEqual(scheduler.seconds_until_due(), 1800)
+
+        # Nothing is due until the interval has passed, and empty polls back off.
+        self.assertEqual(scheduler.run_pending(), {})
+        clock.now += 1800
+        self.assertEqual(scheduler.run_pending(), {key: 1})
+        clock.now += 1800
+        self.server.requests.clear()
+        self.assertEqual(scheduler.run_pending(), {key: 1})
+        self.assertIn("period_from=2022-01-02T00:30:00Z", self.server.requests[0])
+
+        self.readings[:] = self.readings[:50]
+        clock.now += 1800
+        self.assertEqual(scheduler.run_pending(), {key: 0})
+        self.assertEqual(scheduler.seconds_until_due(), 3600)
+        clock.now += 3600
+        scheduler.run_pending()
+        self.assertEqual(scheduler.seconds_until_due(), 7200)
+
+        self.assertEqual(len(self.received[key]), 50)
+        self.assertEqual(self.received[key][-1]["interval_end"], "2022-01-02T01:00:00Z")
+
+    def test_state_persists(self):
+        clock = Clock(utc(2022, 1, 2))
+        self.scheduler([self.consumption_job()], clock).run_pending()
+
+        clock.now = to_timestamp(utc(2022, 1, 3))
+        self.server.requests.clear()
+        restarted = self.scheduler([self.consumption_job()], clock)
+        self.assertEqual(restarted.run_pending(), {"electricity:1234567890:abc1234:consumption": 48})
+        self.assertIn("period_from=2022-01-02T00:00:00Z", self.server.requests[0])
+
+    def test_tariff_publish_time(self):
+        rates = half_hours(utc(2022, 1, 1), 48 * 2, value_exc_vat=10.0, value_inc_vat=10.5)
+        for rate in rates:
+            rate["valid_from"], rate["valid_to"] = rate.pop("interval_start"), rate.pop("interval_end")
+        self.server.route(RATES_PATH, period_handler(self.server, rates[::-1], "valid_from", "valid_to"))
+
+        clock = Clock(utc(2022, 1, 1, 17))
+        job = TariffJob(self.client, ResourceType.ELECTRICITY, ChargeType.STANDARD_UNIT_RATES, self.on_data, start=utc(2022, 1, 1), publish_time=datetime.time(16))
+        scheduler = self.scheduler([job], clock)
+
+        self.assertEqual(scheduler.run_pending(), {job.key: 96})
+        self.assertEqual(job.key, "/products/21JBLAH/electricity-tariffs/E-1R-21JBLAH-Z/standard-unit-rates")
+        self.assertEqual([r["valid_from"] for r in self.received[job.key][:2]], ["2022-01-01T00:00:00Z", "2022-01-01T00:30:00Z"])
+
+        # The next day's rates are not expected until 16:00 tomorrow.
+        self.assertEqual(scheduler.state[job.key]["next_run"], to_timestamp(utc(2022, 1, 2, 16)))
+
+        clock.now = to_timestamp(utc(2022, 1, 2, 16))
+        self.assertEqual(scheduler.run_pending(), {job.key: 0})
+        self.assertEqual(scheduler.seconds_until_due(), 3600)
+
+    def test_failed_job_does_not_affect_others(self):
+        self.server.add("/v1/gas-meter-points/0987654321/meters/cba4321/consumption", {"detail": "Not found."}, status=404)
+        clock = Clock(utc(2022, 1, 2))
+        gas = ConsumptionJob(self.client, ResourceType.GAS, self.on_data)
+        scheduler = self.scheduler([self.consumption_job(), gas], clock)
+
+        results = scheduler.run_pending()
+        self.assertEqual(results["electricity:1234567890:abc1234:consumption"], 48)
+        self.assertIsInstance(results[gas.key], Exception)
+        self.assertEqual(scheduler.state[gas.key]["failures"], 1)
+        self.assertEqual(scheduler.state[gas.key]["next_run"], clock.now + 3600)
+
+    def test_duplicate_keys(self):
+        with self.assertRaises(ValueError):
+            SyncScheduler([self.consumption_job(), self.consumption_job()])
@@ -0,0 +1,172 @@
+from octopus_energy_client import OctopusEnergy, ResourceType, ConsumptionSeries, UrllibTransport, ReplayTransport
+from octopus_energy_client.transport import basic_auth
+from stub_server import StubServer, paginated
+import octopus_energy_client
+import unittest
+import datetime
+import os
+import subprocess
+import sys
+import tempfile
+import pytz
+
+
+POINTS = {"count": 0, "next": None, "previous": None, "results": []}
+CONSUMPTION_PATH = "/v1/electricity-meter-points/1234567890/meters/abc1234/consumption"
+START = datetime.datetime(2022, 1, 1, tzinfo=pytz.utc)
+
+
+def consumption(count):
+    return [
+        {
+            "consumption": float(i),
+            "interval_start": (START + datetime.timedelta(minutes=30 * i)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "interval_end": (START + datetime.timedelta(minutes=30 * (i + 1))).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        }
+        for i in range(count)
+    ]
+
+
+class TestUrllibTransport(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.server = StubServer().__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+
+        self.transport = UrllibTransport(backoff_factor=0)
+        self.addCleanup(self.transport.close)
+        self.client = OctopusEnergy(
+            api_key="123456",
+            electricity_serial="abc1234",
+            electricity_mpan="1234567890",
+            gas_serial="cba4321",
+            gas_mprn="0987654321",
+            transport=self.transport,
+            timeout=5
+        )
+        self.client.base_url = self.server.url("/v1")
+
+    def test_basic_auth(self):
+        self.assertEqual(basic_auth("123456"), "Basic MTIzNDU2Og==")
+
+    def test_connections_are_reused(self):
+        url = self.server.url("/v1/industry/grid-supply-points")
+        self.server.add("/v1/industry/grid-supply-points", POINTS)
+
+        for _ in range(5):
+            self.assertDictEqual(self.client.get_data(url), POINTS)
+
+        self.assertEqual(len(self.server.requests), 5)
+        self.assertEqual(self.server.connections, 1)
+        self.assertIsNone(self.client.session)
+
+    def test_retry_server_errors(self):
+        url = self.server.url("/v1/industry/grid-supply-points")
+        self.server.add("/v1/industry/grid-supply-points", {"detail": "Request was throttled."}, status=429, headers={"Retry-After": "0"})
+        self.server.add("/v1/industry/grid-supply-points", {"detail": "Unavailable."}, status=503)
+        self.server.add("/v1/industry/grid-supply-points", POINTS)
+
+        r = self.transport.get(url, "123456")
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.retries, [429, 503])
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_retries_exhausted_returns_error_body(self):
+        url = self.server.url("/v1/industry/grid-supply-points")
+        expected = {"detail": "Unavailable."}
+        self.server.add("/v1/industry/grid-supply-points", expected, status=503)
+
+        self.assertDictEqual(self.client.get_data(url), expected)
+        self.assertEqual(len(self.server.requests), 4)
+
+    def test_all_pages(self):
+        self.server.route(CONSUMPTION_PATH, paginated(self.server, consumption(250)))
+
+        series = self.client.get_consumption_for_period(ResourceType.ELECTRICITY, START, START + datetime.timedelta(days=7), all_pages=True, as_series=True)
+        self.assertIsInstance(series, ConsumptionSeries)
+        self.assertEqual(len(series), 250)
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_stream(self):
+        records = consumption(100)
+        self.server.route(CONSUMPTION_PATH, paginated(self.server, records))
+
+        streamed = list(self.client.iter_consumption(ResourceType.ELECTRICITY, START, START + datetime.timedelta(days=7), page_size=40, stream=True))
+        self.assertEqual(streamed, records)
+        # Connections are returned to the pool once each streamed page has been read.
+        self.assertEqual(self.server.connections, 1)
+
+
+class TestReplayTransport(unittest.TestCase):
+    def make_client(self, transport, base_url="https://api.octopus.energy/v1"):
+        client = OctopusEnergy(
+            api_key="123456",
+            electricity_serial="abc1234",
+            electricity_mpan="1234567890",
+            gas_serial="cba4321",
+            gas_mprn="0987654321",
+            transport=transport
+        )
+        client.base_url = base_url
+        return client
+
+    def test_replay(self):
+        expected = {'gsp': '_C', 'mpan': '1234567890', 'profile_class': 1}
+        transport = ReplayTransport()
+        transport.add("https://api.octopus.energy/v1/electricity-meter-points/1234567890", expected)
+
+        client = self.make_client(transport)
+        self.assertDictEqual(client.get_meter_point(ResourceType.ELECTRICITY), expected)
+        self.assertDictEqual(client.get_meter_point(ResourceType.GAS), {"detail": "Not found."})
+        self.assertEqual(transport.requests, [
+            "https://api.octopus.energy/v1/electricity-meter-points/1234567890",
+            "https://api.octopus.energy/v1/gas-meter-points/0987654321",
+        ])
+
+    def test_record_and_load(self):
+        expected = {'gsp': '_C', 'mpan': '1234567890', 'profile_class': 1}
+        with StubServer() as server:
+            server.add("/v1/electricity-meter-points/1234567890", expected)
+            recorder = ReplayTransport(transport=UrllibTransport())
+            client = self.make_client(recorder, server.url("/v1"))
+            self.assertDictEqual(client.get_meter_point(ResourceType.ELECTRICITY), expected)
+            recorder.transport.close()
+            base_url = server.url("/v1")
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "recordings.json")
+            recorder.save(path)
+            replay = ReplayTransport.load(path)
+
+        # The server has stopped, so the response comes from the recording.
+        client = self.make_client(replay, base_url)
+        self.assertDictEqual(client.get_meter_point(ResourceType.ELECTRICITY), expected)
+
+
+class TestLazyImports(unittest.TestCase):
+    def test_import_is_lazy(self):
+        # requests and numpy are only imported when something which needs them is used.
+        script = (
+            "import sys\n"
+            "import octopus_energy_client\n"
+            "from octopus_energy_client import OctopusEnergy, UrllibTransport, ResourceType\n"
+            "OctopusEnergy(api_key='123456', electricity_serial='abc1234', electricity_mpan='1234567890', gas_serial='cba4321', gas_mprn='0987654321', transport=UrllibTransport())\n"
+            "print(sorted(name for name in ('requests', 'numpy', 'aiohttp') if name in sys.modules))\n"
+            "octopus_energy_client.CostEngine\n"
+            "octopus_energy_client.create_session\n"
+            "print('requests' in sys.modules)\n"
+        )
+        package_dir = os.path.dirname(os.path.dirname(octopus_energy_client.__file__))
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [package_dir, os.environ.get("PYTHONPATH")])))
+        output = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True, text=True, check=True).stdout
+
+        self.assertEqual(output.split("\n")[:2], ["[]", "True"])
+
+    def test_exports(self):
+        for name in octopus_energy_client.__all__:
+            self.assertTrue(hasattr(octopus_energy_client, name), name)
+        self.assertIn("UrllibTransport", dir(octopus_energy_client))
+
+
+if __name__ == '__main__':
+    unittest.main()
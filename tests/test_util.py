@@ -1,4 +1,5 @@
 from octopus_energy_client import iso_format
+from octopus_energy_client.util import to_timestamp, from_timestamp, missing_ranges
 import unittest
 import mock
 import responses
@@ -9,4 +10,19 @@ import pytz
 class TestClient(unittest.TestCase):
     def test_iso_format(self):
         dt = datetime.datetime(2022, 1, 1, 15, 23, 13, tzinfo=pytz.utc)
-        self.assertEqual(iso_format(dt), "2022-01-01T15:23:13Z")
\ No newline at end of file
+        self.assertEqual(iso_format(dt), "2022-01-01T15:23:13Z")
+
+    def test_to_timestamp(self):
+        self.assertEqual(to_timestamp("2022-01-01T00:30:00Z"), 1640997000)
+        self.assertEqual(to_timestamp("2022-06-01T00:30:00+01:00"), 1654039800)
+        self.assertEqual(to_timestamp(datetime.datetime(2022, 1, 1, 0, 30, tzinfo=pytz.utc)), 1640997000)
+        self.assertEqual(to_timestamp(datetime.datetime(2022, 1, 1, 0, 30)), 1640997000)
+
+    def test_from_timestamp(self):
+        self.assertEqual(from_timestamp(1640997000), datetime.datetime(2022, 1, 1, 0, 30, tzinfo=pytz.utc))
+
+    def test_missing_ranges(self):
+        starts = [0, 1800, 5400]
+        self.assertEqual(missing_ranges(starts, 0, 10800), [(3600, 5400), (7200, 10800)])
+        self.assertEqual(missing_ranges(starts, 0, 7200), [(3600, 5400)])
+        self.assertEqual(missing_ranges([], 900, 3600), [(1800, 3600)])